@@ -0,0 +1,58 @@
+# app/bootstrap.py
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Bootstrap, User
+
+# Once the marker row exists it never goes away, so after this process
+# has seen it, registration skips the bootstrap table entirely.
+_initialized = False
+
+
+def _insert(db: AsyncSession):
+    return pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+
+
+def is_initialized() -> bool:
+    """
+    True once this process knows the first account exists. False only
+    means "not known yet": claim_first_account() gives the real answer.
+    """
+    return _initialized
+
+
+async def claim_first_account(db: AsyncSession) -> bool:
+    """
+    Try to make the current transaction's registration the first one.
+    Returns True if it is; the claim only sticks if the transaction
+    commits, so a failed registration leaves the install uninitialized.
+    Concurrent claimers wait on the row and exactly one wins.
+    """
+    global _initialized
+    stmt = _insert(db)(Bootstrap).values(id=1).on_conflict_do_nothing().returning(Bootstrap.id)
+    claimed = (await db.execute(stmt)).first() is not None
+    if not claimed:
+        _initialized = True
+    return claimed
+
+
+def mark_initialized() -> None:
+    """
+    Record that the first account committed.
+    """
+    global _initialized
+    _initialized = True
+
+
+async def ensure_bootstrap_marker(db: AsyncSession) -> None:
+    """
+    Startup: installs that had users before the marker table existed get
+    the marker, so nobody can claim the first (superadmin) account there.
+    """
+    if (await db.execute(select(User.id).limit(1))).first() is not None:
+        await db.execute(_insert(db)(Bootstrap).values(id=1).on_conflict_do_nothing())
+        await db.commit()
+    if await db.get(Bootstrap, 1) is not None:
+        mark_initialized()
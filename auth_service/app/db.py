@@ -1,5 +1,6 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import declarative_base
 from dotenv import load_dotenv
 import os
 
@@ -10,15 +11,57 @@ DATABASE_URL = os.getenv("AUTH_DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("AUTH_DATABASE_URL is missing in .env")
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+# ---------------------------------------------------------
+# Pool settings (per replica)
+# ---------------------------------------------------------
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# Seconds a request waits for a free connection before failing
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Reconnect before Postgres / proxies drop long-lived idle connections
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# Postgres cancels any single statement running longer (0 = no limit)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "10000"))
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# The URL keeps its sync form (postgresql://, sqlite:///) so it stays
+# shared with tooling; the engine swaps in the asyncio driver.
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_url(url: str):
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+
+def _connect_args(url) -> dict:
+    if url.get_backend_name() != "postgresql":
+        return {}
+    return {
+        "server_settings": {
+            "statement_timeout": str(DB_STATEMENT_TIMEOUT_MS),
+            "application_name": "auth_service",
+        },
+    }
+
+
+ASYNC_DATABASE_URL = async_url(DATABASE_URL)
+
+engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    connect_args=_connect_args(ASYNC_DATABASE_URL),
+)
+
+# expire_on_commit=False: attributes stay readable after commit without
+# an implicit (and, under asyncio, impossible) lazy reload
+SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:    
-        db.close()
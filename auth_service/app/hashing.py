@@ -1,11 +1,105 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+from app.observability.metrics import PASSWORD_HASH_REJECTED
+
+# ---------------------------------------------------------
+# Settings
+# ---------------------------------------------------------
+# Argon2id cost. Changing these only affects new hashes: every hash
+# carries its own parameters, so existing passwords keep verifying.
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+
+# Worker processes doing Argon2. Keep HASH_WORKERS * ARGON2_PARALLELISM
+# at or below the cores the service may spend on hashing, so request
+# handling (e.g. /users/me) always has CPU left.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "2"))
+# Hash/verify calls running or queued at once; beyond that callers get
+# a 429 straight away instead of queueing behind a login burst.
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", str(HASH_WORKERS * 4)))
+# Workers run at a lower CPU priority, so when cores are contended the
+# scheduler favours request handling over hashing
+HASH_WORKER_NICE = int(os.getenv("HASH_WORKER_NICE", "10"))
+HASH_RETRY_AFTER_SECONDS = 1
+
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__rounds=ARGON2_TIME_COST,
+    argon2__memory_cost=ARGON2_MEMORY_COST,
+    argon2__parallelism=ARGON2_PARALLELISM,
+)
+
+
+# ---------------------------------------------------------
+# Process pool (Argon2 is deliberately CPU and memory heavy)
+# ---------------------------------------------------------
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+_pending = threading.BoundedSemaphore(HASH_MAX_PENDING)
+
+
+def _init_worker() -> None:
+    if HASH_WORKER_NICE:
+        os.nice(HASH_WORKER_NICE)
+
 
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=HASH_WORKERS, initializer=_init_worker)
+        return _pool
 
-def hash_password(password: str) -> str:
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+async def _run(operation: str, fn, *args):
+    """
+    Run fn in the hashing pool and await it, or raise 429 if
+    HASH_MAX_PENDING calls are already in flight. The event loop (and
+    the I/O threadpool) never waits on Argon2 itself.
+    """
+    if not _pending.acquire(blocking=False):
+        PASSWORD_HASH_REJECTED.labels(operation=operation).inc()
+        raise HTTPException(
+            status_code=429,
+            detail="Too many login attempts in progress, retry shortly",
+            headers={"Retry-After": str(HASH_RETRY_AFTER_SECONDS)},
+        )
+    try:
+        future = _get_pool().submit(fn, *args)
+    except BaseException:
+        _pending.release()
+        raise
+    future.add_done_callback(lambda _: _pending.release())
+    return await asyncio.wrap_future(future)
+
+
+def _hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
\ No newline at end of file
+def _verify(plain: str, hashed: str) -> bool:
+    return pwd_context.verify(plain, hashed)
+
+
+async def hash_password(password: str) -> str:
+    return await _run("hash", _hash, password)
+
+
+async def verify_password(plain: str, hashed: str) -> bool:
+    return await _run("verify", _verify, plain, hashed)
@@ -1,58 +1,166 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from jose import jwt
+from jose import jwk, jwt
+import asyncio
 import os
+import threading
+import uuid
+
+from shared.jwks import algorithm_for, public_jwk, verification_keys
+from app.revocation import revocation_list
 
 # ============================================================
-# Load RSA Keys
+# Load Signing Keys
 # ============================================================
+# Every *.pem in JWT_KEYS_DIR is published at /.well-known/jwks.json
+# (kid = the key's RFC 7638 thumbprint); JWT_SIGNING_KEY names the one
+# new tokens are signed with. To rotate: add the new private key and
+# restart (published, not used yet), wait JWKS_REFRESH_SECONDS for
+# services to pick it up, point JWT_SIGNING_KEY at it, and delete the
+# old key once the last token it signed has expired.
+#
+# The algorithm follows the key: RSA keys sign RS256, EC P-256 keys
+# ES256 (P-384 / P-521: ES384 / ES512). Moving RS256 -> ES256 is the
+# same rotation with an EC key, e.g.
+#   openssl ecparam -name prime256v1 -genkey -noout | openssl pkcs8 -topk8 -nocrypt -out es256.pem
+# Services verify each token with the key (and algorithm) its kid names,
+# so both kinds of token are accepted side by side during the switch.
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-KEYS_DIR = os.path.join(BASE_DIR, "keys")
+KEYS_DIR = os.getenv("JWT_KEYS_DIR", os.path.join(BASE_DIR, "keys"))
+SIGNING_KEY_FILE = os.getenv("JWT_SIGNING_KEY", "private.pem")
+
+def _published_keys() -> dict[str, dict]:
+    published = {}
+    for name in sorted(os.listdir(KEYS_DIR)):
+        if name.endswith(".pem"):
+            with open(os.path.join(KEYS_DIR, name), "r") as f:
+                public = public_jwk(f.read())
+            published[public["kid"]] = public   # a key pair is one entry
+    return published
 
-PRIVATE_KEY_PATH = os.path.join(KEYS_DIR, "private.pem")
-PUBLIC_KEY_PATH = os.path.join(KEYS_DIR, "public.pem")
 
-with open(PRIVATE_KEY_PATH, "r") as f:
+with open(os.path.join(KEYS_DIR, SIGNING_KEY_FILE), "r") as f:
     PRIVATE_KEY = f.read()
 
-with open(PUBLIC_KEY_PATH, "r") as f:
-    PUBLIC_KEY = f.read()
+SIGNING_ALG = algorithm_for(PRIVATE_KEY)
+SIGNING_KID = public_jwk(PRIVATE_KEY, SIGNING_ALG)["kid"]
+SIGNING_KEY = jwk.construct(PRIVATE_KEY, SIGNING_ALG)
+
+JWKS = {"keys": list(_published_keys().values())}
+VERIFY_KEYS = verification_keys(JWKS)
+
+ACCESS_TOKEN_MINUTES = 15
+REFRESH_TOKEN_DAYS = 7
 
-ALGO = "RS256"
+# Threads that sign tokens. Kept apart from the I/O threadpool so a
+# burst of issuance cannot hold up Redis calls, and vice versa.
+SIGNING_WORKERS = int(os.getenv("SIGNING_WORKERS", str(os.cpu_count() or 1)))
+
+_signing_pool: ThreadPoolExecutor | None = None
+_signing_pool_lock = threading.Lock()
 
 # ============================================================
 # Token Creation Only (Auth service does NOT verify tokens)
 # ============================================================
 
-def create_access_token(data: dict, expires_minutes: int = 15):
+def create_access_token(data: dict, expires_minutes: int = ACCESS_TOKEN_MINUTES):
     """
-    Create short-lived access token.
+    Create short-lived access token. Its `jti` lets it be revoked
+    (logout) before it expires.
     """
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=expires_minutes)
-    to_encode.update({"exp": expire, "iss": "pharma-auth"})
-    token = jwt.encode(to_encode, PRIVATE_KEY, algorithm=ALGO)
+    to_encode.update({"exp": expire, "iss": "pharma-auth", "typ": "access", "jti": uuid.uuid4().hex})
+    token = jwt.encode(to_encode, SIGNING_KEY, algorithm=SIGNING_ALG, headers={"kid": SIGNING_KID})
     return token
 
 
-def create_refresh_token(data: dict, expires_days: int = 7):
+def create_refresh_token(data: dict, expires_days: int = REFRESH_TOKEN_DAYS, family: str | None = None):
     """
-    Create long-lived refresh token.
+    Create long-lived refresh token. Each one has its own `jti` and
+    belongs to a `fam`ily: a new one per login, kept across rotations.
     """
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=expires_days)
-    to_encode.update({"exp": expire, "iss": "pharma-auth"})
-    token = jwt.encode(to_encode, PRIVATE_KEY, algorithm=ALGO)
+    to_encode.update({
+        "exp": expire,
+        "iss": "pharma-auth",
+        "typ": "refresh",
+        "jti": uuid.uuid4().hex,
+        "fam": family or uuid.uuid4().hex,
+    })
+    token = jwt.encode(to_encode, SIGNING_KEY, algorithm=SIGNING_ALG, headers={"kid": SIGNING_KID})
     return token
 
 
-def verify_access_token(token: str):
+def _token_pair(claims: dict, family: str | None) -> dict:
+    return {
+        "access_token": create_access_token(claims),
+        "refresh_token": create_refresh_token(claims, family=family),
+        "token_type": "bearer",
+    }
+
+
+async def issue_tokens(claims: dict, family: str | None = None) -> dict:
     """
-    Verify access token and return payload.
+    Access + refresh token pair (the login / refresh response), both
+    signed in one hop to the signing pool.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_signing_pool(), _token_pair, claims, family)
+
+
+def _get_signing_pool() -> ThreadPoolExecutor:
+    global _signing_pool
+    with _signing_pool_lock:
+        if _signing_pool is None:
+            _signing_pool = ThreadPoolExecutor(max_workers=SIGNING_WORKERS, thread_name_prefix="jwt-sign")
+        return _signing_pool
+
+
+def shutdown_signing_pool() -> None:
+    global _signing_pool
+    with _signing_pool_lock:
+        if _signing_pool is not None:
+            _signing_pool.shutdown(cancel_futures=True)
+            _signing_pool = None
+
+
+def _decode(token: str) -> dict:
+    # Tokens from before kids were added were signed with the same key
+    kid = jwt.get_unverified_header(token).get("kid") or SIGNING_KID
+    key, algorithm = VERIFY_KEYS[kid]
+    return jwt.decode(token, key, algorithms=[algorithm])
+
+
+async def verify_access_token(token: str):
+    """
+    Verify access token and return payload. Async so that a revocation
+    filter hit is confirmed against Redis off the event loop.
     """
     try:
         # Verify signature and expiration
-        payload = jwt.decode(token, PUBLIC_KEY, algorithms=[ALGO])
-        return payload
+        payload = _decode(token)
     except Exception:
         return None
+    # A refresh token is never accepted in place of an access token
+    if payload.get("typ") == "refresh":
+        return None
+    if payload.get("jti") and await revocation_list.is_revoked_async(payload["jti"]):
+        return None
+    return payload
+
+
+def verify_refresh_token(token: str):
+    """
+    Verify refresh token and return payload (signature, expiry and
+    type only: whether it was already used is up to refresh_store).
+    """
+    try:
+        payload = _decode(token)
+    except Exception:
+        return None
+    if payload.get("typ") != "refresh" or not payload.get("jti") or not payload.get("fam"):
+        return None
+    return payload
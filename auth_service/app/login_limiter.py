@@ -0,0 +1,173 @@
+# app/login_limiter.py
+import ipaddress
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from functools import lru_cache
+
+import redis
+from fastapi import HTTPException, Request
+
+from app.redis_client import get_redis
+from app.observability.metrics import LOGIN_THROTTLED
+
+logger = logging.getLogger("uvicorn")
+
+# ---------------------------------------------------------
+# Settings
+# ---------------------------------------------------------
+LOGIN_WINDOW_SECONDS = int(os.getenv("LOGIN_WINDOW_SECONDS", "300"))
+# Attempts allowed per window. Per-username stops guessing one account's
+# password; per-IP stops one client spraying many accounts.
+LOGIN_MAX_PER_USERNAME = int(os.getenv("LOGIN_MAX_PER_USERNAME", "10"))
+LOGIN_MAX_PER_IP = int(os.getenv("LOGIN_MAX_PER_IP", "50"))
+# Shared windows across replicas. With it off, or Redis down, each
+# process keeps its own windows (limits then apply per replica).
+LOGIN_LIMIT_REDIS = os.getenv("LOGIN_LIMIT_REDIS", "true").lower() == "true"
+# Proxies in front of us that append to X-Forwarded-For (Kong or the
+# gateway: 1). 0 trusts no header and uses the socket peer.
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+# Where those proxies connect from (comma-separated CIDRs). The header is
+# only read on connections from these; anyone else could forge it.
+TRUSTED_PROXY_CIDRS = [
+    ipaddress.ip_network(cidr.strip())
+    for cidr in os.getenv("TRUSTED_PROXY_CIDRS", "").split(",")
+    if cidr.strip()
+]
+# Bounds the in-memory fallback when usernames are sprayed
+MEMORY_MAX_KEYS = 100_000
+
+
+def _is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXY_CIDRS)
+
+
+def client_ip(request: Request) -> str:
+    """
+    Address of the caller as seen by our outermost trusted proxy. Entries
+    left of that are client-supplied and ignored, and so is the whole
+    header unless the socket peer is a trusted proxy.
+    """
+    peer = request.client.host if request.client else "unknown"
+    if TRUSTED_PROXY_HOPS and _is_trusted_proxy(peer):
+        hops = [h.strip() for h in request.headers.get("x-forwarded-for", "").split(",") if h.strip()]
+        if len(hops) >= TRUSTED_PROXY_HOPS:
+            return hops[-TRUSTED_PROXY_HOPS]
+    return peer
+
+
+# ---------------------------------------------------------
+# Redis sliding log (one sorted set of attempt times per key)
+# ---------------------------------------------------------
+# Checks every key, and records the attempt in all of them only if none
+# is full, so throttled attempts do not extend the lockout.
+#   KEYS[i] -> window key, ARGV[1] -> now (ms), ARGV[2] -> window (ms)
+#   ARGV[3] -> unique member for this attempt, ARGV[3 + i] -> limit for KEYS[i]
+# Returns {0, 0} (allowed) or {i, ms until KEYS[i] has room}
+SLIDING_WINDOW_LUA = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+for i, key in ipairs(KEYS) do
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    if redis.call('ZCARD', key) >= tonumber(ARGV[3 + i]) then
+        local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+        return {i, tonumber(oldest[2]) + window - now}
+    end
+end
+for _, key in ipairs(KEYS) do
+    redis.call('ZADD', key, now, ARGV[3])
+    redis.call('PEXPIRE', key, window)
+end
+return {0, 0}
+"""
+
+
+@lru_cache
+def _window_script():
+    return get_redis().register_script(SLIDING_WINDOW_LUA)
+
+
+def _redis_hit(keys: list[str], limits: list[int], now_ms: int, window_ms: int) -> tuple[int, int]:
+    return tuple(_window_script()(
+        keys=keys,
+        args=[now_ms, window_ms, uuid.uuid4().hex, *limits],
+    ))
+
+
+class SlidingWindowLog:
+    """
+    In-process equivalent of SLIDING_WINDOW_LUA, used when Redis is off
+    or unreachable.
+    """
+
+    def __init__(self, max_keys: int = MEMORY_MAX_KEYS):
+        self.max_keys = max_keys
+        self._windows: OrderedDict[str, deque] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, keys: list[str], limits: list[int], now_ms: int, window_ms: int) -> tuple[int, int]:
+        with self._lock:
+            windows = []
+            for i, (key, limit) in enumerate(zip(keys, limits), start=1):
+                window = self._windows.get(key)
+                if window is None:
+                    window = self._windows[key] = deque()
+                self._windows.move_to_end(key)
+                while window and window[0] <= now_ms - window_ms:
+                    window.popleft()
+                if len(window) >= limit:
+                    return i, window[0] + window_ms - now_ms
+                windows.append(window)
+            for window in windows:
+                window.append(now_ms)
+            while len(self._windows) > self.max_keys:
+                self._windows.popitem(last=False)
+            return 0, 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._windows.clear()
+
+
+memory_log = SlidingWindowLog()
+
+
+# ---------------------------------------------------------
+# Login check
+# ---------------------------------------------------------
+def check_login_allowed(request: Request, username: str) -> None:
+    """
+    Record a login attempt, or raise 429 (with Retry-After) if the
+    username or the client IP used up its window. Runs before any
+    database or hashing work, so throttled attempts cost almost nothing.
+    """
+    scopes = ["username", "ip"]
+    keys = [f"auth:login:user:{username}", f"auth:login:ip:{client_ip(request)}"]
+    limits = [LOGIN_MAX_PER_USERNAME, LOGIN_MAX_PER_IP]
+    now_ms, window_ms = int(time.time() * 1000), LOGIN_WINDOW_SECONDS * 1000
+
+    result = None
+    if LOGIN_LIMIT_REDIS:
+        try:
+            result = _redis_hit(keys, limits, now_ms, window_ms)
+        except redis.RedisError as exc:
+            logger.warning("Login limiter falling back to memory: %s", exc)
+    if result is None:
+        result = memory_log.hit(keys, limits, now_ms, window_ms)
+
+    full, retry_ms = result
+    if full:
+        LOGIN_THROTTLED.labels(scope=scopes[full - 1]).inc()
+        raise HTTPException(
+            status_code=429,
+            detail="Too many login attempts, retry later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_ms / 1000)))},
+        )
@@ -1,5 +1,10 @@
 from fastapi import FastAPI
-from app.db import Base, engine
+from fastapi.responses import JSONResponse
+from app.db import Base, SessionLocal, engine
+from app.bootstrap import ensure_bootstrap_marker
+from app.hashing import shutdown_pool
+from app.jwt_utils import JWKS, shutdown_signing_pool
+from app.user_cache import start_invalidation_listener
 from app.routers.auth import router as auth_router
 from app.routers.users import router as users_router
 from app.observability.metrics import metrics_middleware, metrics_endpoint
@@ -13,10 +18,23 @@ app.middleware("http")(metrics_middleware("auth"))
 
 
 @app.on_event("startup")
-def startup():
+async def startup():
     print("📌 AUTH SERVICE — Creating tables...")
-    Base.metadata.create_all(bind=engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with SessionLocal() as db:
+        await ensure_bootstrap_marker(db)
     print("✅ AUTH SERVICE — Tables ready!")
+    app.state.cache_listener = start_invalidation_listener()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    if app.state.cache_listener is not None:
+        app.state.cache_listener.stop()
+    shutdown_pool()
+    shutdown_signing_pool()
+    await engine.dispose()
 
 
 @app.get("/health")
@@ -28,6 +46,14 @@ def health():
 def root():
     return {"service": "auth", "status": "running"}
 
+# Services poll this on their own schedule (JWKS_REFRESH_SECONDS)
+@app.get("/.well-known/jwks.json")
+def jwks():
+    """
+    Public keys that verify our tokens, selected by the token's kid.
+    """
+    return JSONResponse(JWKS, headers={"Cache-Control": "public, max-age=300"})
+
 @app.get("/metrics")
 def metrics():
     return metrics_endpoint()
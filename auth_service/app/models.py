@@ -10,3 +10,14 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
     role = Column(String, default="user")  # user/admin
+
+
+class Bootstrap(Base):
+    """
+    Holds a single row (id=1) once the first account exists. The primary
+    key makes claiming it at-most-once, so exactly one registration can
+    be the first - without counting users.
+    """
+    __tablename__ = "auth_bootstrap"
+
+    id = Column(Integer, primary_key=True)
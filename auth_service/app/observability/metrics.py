@@ -14,6 +14,28 @@ REQUEST_LATENCY = Histogram(
     ["service", "method", "path"]
 )
 
+# Hash/verify calls turned away with a 429 because the hashing pool was full
+PASSWORD_HASH_REJECTED = Counter(
+    "auth_password_hash_rejected_total",
+    "Password hash/verify calls rejected while the hashing pool was saturated",
+    ["operation"]
+)
+
+# User profile lookups by tier that answered (memory / redis / miss = Postgres)
+USER_CACHE = Counter(
+    "auth_user_cache_requests_total",
+    "User profile cache lookups",
+    ["result"]
+)
+
+# Login attempts refused by the sliding-window limiter, by the window
+# that was full (username / ip)
+LOGIN_THROTTLED = Counter(
+    "auth_login_throttled_total",
+    "Login attempts rejected by the rate limiter",
+    ["scope"]
+)
+
 def metrics_middleware(service_name: str):
     async def middleware(request: Request, call_next):
         start_time = time.time()
@@ -0,0 +1,79 @@
+# app/refresh_store.py
+import logging
+import time
+from functools import lru_cache
+
+import redis
+from fastapi import HTTPException
+
+from app.jwt_utils import REFRESH_TOKEN_DAYS
+from app.redis_client import get_redis
+
+logger = logging.getLogger("uvicorn")
+
+# Every refresh token can be redeemed once. Its jti is marked used for
+# the rest of its lifetime; a second redemption means it leaked (or was
+# replayed), so its whole family - every token rotated from the same
+# login - is revoked. Keys expire with the tokens they track, so the
+# store only ever holds live entries.
+#   KEYS[1] -> used jti, KEYS[2] -> revoked family
+#   ARGV[1] -> seconds until the token expires, ARGV[2] -> family lifetime
+# Returns 1 (rotated), 0 (reused: family now revoked), -1 (family revoked)
+REDEEM_LUA = """
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    return -1
+end
+if redis.call('SET', KEYS[1], '1', 'NX', 'EX', ARGV[1]) then
+    return 1
+end
+redis.call('SET', KEYS[2], '1', 'EX', ARGV[2])
+return 0
+"""
+FAMILY_TTL = REFRESH_TOKEN_DAYS * 24 * 3600
+
+
+def _used_key(jti: str) -> str:
+    return f"auth:refresh:used:{jti}"
+
+
+def _revoked_family_key(family: str) -> str:
+    return f"auth:refresh:revoked:{family}"
+
+
+@lru_cache
+def _redeem_script():
+    return get_redis().register_script(REDEEM_LUA)
+
+
+def redeem_refresh_token(claims: dict) -> None:
+    """
+    Mark a verified refresh token as used, in one round trip. Raises 401
+    if it was already used or its family is revoked, and 503 if Redis is
+    unreachable: without the store, rotation cannot be enforced, so
+    clients fall back to logging in.
+    """
+    ttl = max(1, int(claims["exp"] - time.time()))
+    try:
+        result = _redeem_script()(
+            keys=[_used_key(claims["jti"]), _revoked_family_key(claims["fam"])],
+            args=[ttl, FAMILY_TTL],
+        )
+    except redis.RedisError as exc:
+        logger.warning("Refresh token store unavailable: %s", exc)
+        raise HTTPException(status_code=503, detail="Token refresh unavailable, log in again")
+
+    if result == 0:
+        logger.warning("Refresh token reused for %s; revoking its family", claims.get("sub"))
+    if result != 1:
+        raise HTTPException(status_code=401, detail="Refresh token revoked")
+
+
+def revoke_family(family: str) -> None:
+    """
+    Revoke every refresh token rotated from one login (logout).
+    """
+    try:
+        get_redis().set(_revoked_family_key(family), "1", ex=FAMILY_TTL)
+    except redis.RedisError as exc:
+        logger.warning("Refresh token store unavailable: %s", exc)
+        raise HTTPException(status_code=503, detail="Token revocation unavailable")
@@ -0,0 +1,96 @@
+# app/revocation.py
+import logging
+import os
+import threading
+import time
+
+import redis
+from fastapi import HTTPException
+
+from app.redis_client import get_redis
+from shared.revocation import BloomFilter, RevocationList
+
+logger = logging.getLogger("uvicorn")
+
+# ---------------------------------------------------------
+# Settings
+# ---------------------------------------------------------
+# Revoked jtis, scored by the token's exp so expired ones can be pruned
+REVOKED_KEY = "auth:revoked"
+# Bumped on every revocation; services send it back as If-None-Match
+VERSION_KEY = "auth:revoked:version"
+# Published filter: sized for at least this many jtis at this error rate
+BLOOM_MIN_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "1024"))
+BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+# How often this replica re-reads the filter for its own verification
+REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", "10"))
+REVOCATION_RETRY_SECONDS = float(os.getenv("REVOCATION_RETRY_SECONDS", "2"))
+
+
+def _unavailable(exc: Exception) -> HTTPException:
+    logger.warning("Revocation store unavailable: %s", exc)
+    return HTTPException(status_code=503, detail="Token revocation unavailable")
+
+
+def revoke(jti: str, exp: float) -> None:
+    """
+    Revoke a token until it would have expired anyway.
+    """
+    try:
+        pipe = get_redis().pipeline(transaction=True)
+        pipe.zadd(REVOKED_KEY, {jti: exp})
+        pipe.zremrangebyscore(REVOKED_KEY, "-inf", time.time())
+        pipe.incr(VERSION_KEY)
+        pipe.execute()
+    except redis.RedisError as exc:
+        raise _unavailable(exc)
+
+
+def is_revoked(jti: str) -> bool:
+    """
+    Exact check (one round trip); services only ask after a filter hit.
+    """
+    try:
+        exp = get_redis().zscore(REVOKED_KEY, jti)
+    except redis.RedisError as exc:
+        raise _unavailable(exc)
+    return exp is not None and exp > time.time()
+
+
+# Filters are rebuilt once per version, not once per poll
+_snapshot: tuple[str, BloomFilter] | None = None
+_snapshot_lock = threading.Lock()
+
+
+def snapshot() -> tuple[str, BloomFilter]:
+    """
+    (version, bloom filter of every unexpired revoked jti).
+    """
+    global _snapshot
+    try:
+        r = get_redis()
+        version = r.get(VERSION_KEY) or "0"
+        cached = _snapshot
+        if cached is not None and cached[0] == version:
+            return cached
+        jtis = r.zrangebyscore(REVOKED_KEY, time.time(), "+inf")
+    except redis.RedisError as exc:
+        raise _unavailable(exc)
+
+    bloom = BloomFilter.for_capacity(max(BLOOM_MIN_CAPACITY, 2 * len(jtis)), BLOOM_ERROR_RATE)
+    for jti in jtis:
+        bloom.add(jti)
+    with _snapshot_lock:
+        _snapshot = (version, bloom)
+    return version, bloom
+
+
+def _fetch(version: str | None):
+    latest = snapshot()
+    return None if latest[0] == version else latest
+
+
+# This replica's own view, read straight from Redis rather than over HTTP
+revocation_list = RevocationList(
+    _fetch, is_revoked, REVOCATION_SYNC_SECONDS, REVOCATION_RETRY_SECONDS
+)
@@ -1,122 +1,220 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from fastapi.security import OAuth2PasswordRequestForm, HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Request
-from app.jwt_utils import create_access_token, create_refresh_token, verify_access_token
+from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from app.jwt_utils import issue_tokens, verify_access_token, verify_refresh_token
 from app.hashing import verify_password, hash_password
 from app.db import get_db
 from app.models import User
-from app.schemas import UserRegister
+from app.schemas import UserRegister, RefreshRequest, LogoutRequest
+from app.refresh_store import redeem_refresh_token, revoke_family
+from app import revocation
+from app.user_cache import get_user, invalidate_user
+from app.login_limiter import check_login_allowed
+from app.bootstrap import claim_first_account, is_initialized, mark_initialized
+from app.routers.users import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, list_users_page
 
 router = APIRouter(tags=["Auth"])
 security = HTTPBearer()
 
-def get_current_user_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def get_current_user_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
-    payload = verify_access_token(token)
+    payload = await verify_access_token(token)
     if not payload:
          raise HTTPException(status_code=401, detail="Invalid or expired token")
     return payload
 
 
 @router.post("/register", status_code=status.HTTP_201_CREATED)
-def register_user(
+async def register_user(
     payload: UserRegister,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Register a new user.
     - First user can be superadmin without any header.
     - After that, only SUPERADMIN can create another SUPERADMIN.
+
+    One INSERT ... ON CONFLICT per registration: duplicate usernames are
+    caught by the unique index rather than a pre-check, and "is this the
+    first user" comes from the bootstrap marker, not a COUNT.
     """
 
-    user_count = db.query(User).count()
-
-    # If trying to create a superadmin:
-    if payload.role == "superadmin":
-        if user_count > 0:  # only enforce for non-first user
-            # SECURITY FIX: Check for Authorization header instead of x-role
-            # We manually check header here to avoid imposing strict auth on first run
-            auth_header = request.headers.get("Authorization")
-            if not auth_header:
-                 raise HTTPException(status_code=403, detail="Auth required for superadmin creation")
-            
+    role = payload.role or "user"
+
+    # A superadmin token may always create a superadmin
+    authorized = False
+    denied = "Auth required for superadmin creation"
+    if role == "superadmin":
+        auth_header = request.headers.get("Authorization")
+        if auth_header:
             try:
                 token = auth_header.split(" ")[1]
-                claims = verify_access_token(token)
-                if not claims or claims.get("role") != "superadmin":
-                     raise HTTPException(status_code=403, detail="Only superadmin can create another superadmin.")
+                claims = await verify_access_token(token)
             except Exception:
-                 raise HTTPException(status_code=403, detail="Invalid auth for superadmin creation")
-
-    existing = db.query(User).filter(User.username == payload.username).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Username already exists")
-
-    hashed = hash_password(payload.password)
-
-    user = User(
-        username=payload.username,
-        full_name=payload.full_name,
-        hashed_password=hashed,
-        role=payload.role or "user",
-        is_active=True,
+                claims = None
+            authorized = bool(claims) and claims.get("role") == "superadmin"
+            denied = "Only superadmin can create another superadmin."
+        if not authorized and is_initialized():
+            raise HTTPException(status_code=403, detail=denied)
+
+    hashed = await hash_password(payload.password)
+
+    # Until this process knows an account exists, every registration
+    # tries to claim the marker: the first account of any role closes
+    # the superadmin bootstrap window.
+    first = not is_initialized() and await claim_first_account(db)
+    if role == "superadmin" and not first and not authorized:
+        await db.rollback()
+        raise HTTPException(status_code=403, detail=denied)
+
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    stmt = (
+        insert(User)
+        .values(
+            username=payload.username,
+            full_name=payload.full_name,
+            hashed_password=hashed,
+            role=role,
+            is_active=True,
+        )
+        .on_conflict_do_nothing(index_elements=["username"])
+        .returning(User.id)
     )
+    if (await db.execute(stmt)).first() is None:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Username already exists")
 
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    if first:
+        mark_initialized()
+    await run_in_threadpool(invalidate_user, payload.username)
 
     return {
         "message": "User registered successfully",
-        "username": user.username,
-        "role": user.role,
+        "username": payload.username,
+        "role": role,
     }
 
 
 
 @router.post("/login")
-def login(
+async def login(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     REAL login: read from Postgres, verify password, issue JWT.
+    Rate limited per username and per client IP before any of that.
     """
+    await run_in_threadpool(check_login_allowed, request, form_data.username)
 
-    user = db.query(User).filter(User.username == form_data.username).first()
+    user = await get_user(db, form_data.username, with_password=True)
 
     if not user:
         raise HTTPException(status_code=400, detail="Invalid credentials")
 
-    if not verify_password(form_data.password, user.hashed_password):
+    profile, hashed_password = user
+    if not await verify_password(form_data.password, hashed_password):
         raise HTTPException(status_code=400, detail="Invalid credentials")
 
-    if not user.is_active:
+    if not profile["is_active"]:
         raise HTTPException(status_code=403, detail="Inactive user")
 
     # Include role in token
-    claims = {"sub": user.username, "role": user.role}
+    claims = {"sub": profile["username"], "role": profile["role"]}
 
-    access = create_access_token(claims)
-    refresh = create_refresh_token(claims)
+    return await issue_tokens(claims)
 
-    return {
-        "access_token": access,
-        "refresh_token": refresh,
-        "token_type": "bearer",
-    }
 
+@router.post("/refresh")
+async def refresh_tokens(
+    payload: RefreshRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Swap a refresh token for a new access + refresh token pair, with no
+    password check (so no Argon2 work). Each refresh token works once;
+    presenting a used one revokes every token rotated from the same
+    login. Role and active flag are re-read, so changes apply at the
+    next refresh.
+    """
+    claims = verify_refresh_token(payload.refresh_token)
+    if not claims:
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+
+    user = await get_user(db, claims["sub"])
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+    profile, _ = user
+    if not profile["is_active"]:
+        raise HTTPException(status_code=403, detail="Inactive user")
+
+    await run_in_threadpool(redeem_refresh_token, claims)
+
+    new_claims = {"sub": profile["username"], "role": profile["role"]}
+    return await issue_tokens(new_claims, family=claims["fam"])
+
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    body: LogoutRequest | None = None,
+    payload: dict = Depends(get_current_user_token),
+):
+    """
+    Revoke the access token used for this call and, if given, the whole
+    refresh token family it came with. Services stop accepting the
+    access token within REVOCATION_SYNC_SECONDS; this replica at once.
+    """
+    if payload.get("jti"):
+        await run_in_threadpool(revocation.revoke, payload["jti"], payload["exp"])
+    if body and body.refresh_token:
+        claims = verify_refresh_token(body.refresh_token)
+        if claims and claims["sub"] == payload.get("sub"):
+            await run_in_threadpool(revoke_family, claims["fam"])
+    await run_in_threadpool(revocation.revocation_list.refresh)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+# Polled by every service that verifies tokens (REVOCATION_URL); internal
+@router.get("/revocations")
+async def revocation_filter(if_none_match: str | None = Header(None)):
+    """
+    Bloom filter of revoked access token ids. ETag is the filter
+    version: send it back as If-None-Match to get a 304 until it changes.
+    """
+    version, bloom = await run_in_threadpool(revocation.snapshot)
+    etag = f'"{version}"'
+    if if_none_match in (etag, version):
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse({"version": version, "filter": bloom.to_dict()}, headers={"ETag": etag})
+
+
+@router.get("/revocations/{jti}")
+async def revocation_status(jti: str):
+    """
+    Exact answer for a jti the filter matched (it may be a false positive).
+    """
+    return {"jti": jti, "revoked": await run_in_threadpool(revocation.is_revoked, jti)}
 
 
 @router.get("/users")
-def list_users(
+async def list_users(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: int | None = None,
     payload=Depends(get_current_user_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Only SUPERADMIN can list all users.
+    Only SUPERADMIN can list all users (paginated).
     """
     role = payload.get("role")
 
@@ -126,15 +224,4 @@ def list_users(
             detail="Access forbidden: requires superadmin role"
         )
 
-    users = db.query(User).all()
-
-    return [
-        {
-            "id": u.id,
-            "username": u.username,
-            "full_name": u.full_name,
-            "role": u.role,
-            "is_active": u.is_active
-        }
-        for u in users
-    ]
\ No newline at end of file
+    return await list_users_page(db, response, limit, cursor)
\ No newline at end of file
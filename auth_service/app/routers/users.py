@@ -1,17 +1,25 @@
-from fastapi import APIRouter, Request, HTTPException, Depends
+from fastapi import APIRouter, Request, HTTPException, Depends, Query, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import get_db
 from app.models import User
 from app.jwt_utils import verify_access_token
+from app.schemas import UserUpdate
+from app.user_cache import get_user, invalidate_user, profile_of
 
 router = APIRouter(tags=["Users"])
 security = HTTPBearer()
 
-def get_current_user_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# async: verifying is cheap, not worth a threadpool hop
+async def get_current_user_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
-    payload = verify_access_token(token)
+    payload = await verify_access_token(token)
     if not payload:
          raise HTTPException(status_code=401, detail="Invalid or expired token")
     return payload
@@ -21,42 +29,58 @@ def get_current_user_token(credentials: HTTPAuthorizationCredentials = Depends(s
 # GET CURRENT USER (requires valid JWT)
 # ===========================================================
 @router.get("/users/me")
-def read_users_me(
+async def read_users_me(
     payload: dict = Depends(get_current_user_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Uses JWT token to identify user.
+    Uses JWT token to identify user. Served from the user cache, so
+    frequent polling does not reach Postgres.
     """
     username = payload.get("sub")
 
     if not username:
         raise HTTPException(status_code=401, detail="Invalid token payload")
 
-    user = db.query(User).filter(User.username == username).first()
+    user = await get_user(db, username)
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    return {
-        "id": user.id,
-        "username": user.username,
-        "full_name": user.full_name,
-        "is_active": user.is_active,
-        "role": user.role,
-    }
+    profile, _ = user
+    return profile
+
+
+async def list_users_page(db: AsyncSession, response: Response, limit: int, cursor: int | None) -> list[dict]:
+    """
+    One page of users by id. Pass the `X-Next-Cursor` response header
+    back as `cursor` for the next page; it is absent on the last page.
+    """
+    query = select(User).order_by(User.id)
+    if cursor is not None:
+        query = query.where(User.id > cursor)
+
+    # Fetch one extra row to know whether another page exists
+    users = (await db.execute(query.limit(limit + 1))).scalars().all()
+    if len(users) > limit:
+        users = users[:limit]
+        response.headers["X-Next-Cursor"] = str(users[-1].id)
+    return [profile_of(u) for u in users]
 
 
 # ===========================================================
 # GET ALL USERS — SUPERADMIN ONLY
 # ===========================================================
 @router.get("/users")
-def list_all_users(
+async def list_all_users(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: int | None = None,
     payload: dict = Depends(get_current_user_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Only SUPERADMIN can fetch full user list.
+    Only SUPERADMIN can fetch the user list (paginated).
     """
     role = payload.get("role")
 
@@ -66,15 +90,38 @@ def list_all_users(
             detail="Only superadmin can view all users"
         )
 
-    users = db.query(User).all()
-
-    return [
-        {
-            "id": u.id,
-            "username": u.username,
-            "full_name": u.full_name,
-            "role": u.role,
-            "is_active": u.is_active
-        }
-        for u in users
-    ]
+    return await list_users_page(db, response, limit, cursor)
+
+
+# ===========================================================
+# CHANGE ROLE / ACTIVE FLAG — SUPERADMIN ONLY
+# ===========================================================
+@router.patch("/users/{username}")
+async def update_user(
+    username: str,
+    changes: UserUpdate,
+    payload: dict = Depends(get_current_user_token),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Change a user's role and/or active flag. Takes effect on the user's
+    next login or token refresh.
+    """
+    if payload.get("role") != "superadmin":
+        raise HTTPException(
+            status_code=403,
+            detail="Only superadmin can change users"
+        )
+
+    user = (await db.execute(select(User).where(User.username == username))).scalars().first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    if changes.role is not None:
+        user.role = changes.role
+    if changes.is_active is not None:
+        user.is_active = changes.is_active
+    await db.commit()
+    await run_in_threadpool(invalidate_user, username)
+
+    return profile_of(user)
@@ -6,3 +6,13 @@ class UserRegister(BaseModel):
     password: str
     full_name: Optional[str] = None
     role: Optional[str] = "user"
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
+class UserUpdate(BaseModel):
+    role: Optional[str] = None
+    is_active: Optional[bool] = None
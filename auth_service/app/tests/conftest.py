@@ -0,0 +1,98 @@
+# tests/conftest.py
+import os
+import tempfile
+
+import fakeredis
+import pytest
+
+# app.db refuses to import without a database URL; tests run on SQLite.
+os.environ.setdefault(
+    "AUTH_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'auth_test.db')}",
+)
+# Cheap Argon2 so the suite stays fast (production keeps the defaults)
+os.environ.setdefault("ARGON2_TIME_COST", "1")
+os.environ.setdefault("ARGON2_MEMORY_COST", "1024")
+os.environ.setdefault("ARGON2_PARALLELISM", "1")
+# No background sync thread; tests (and logout) refresh the list directly
+os.environ.setdefault("REVOCATION_SYNC_SECONDS", "0")
+
+
+@pytest.fixture(autouse=True)
+def fake_redis(monkeypatch):
+    """
+    In-memory Redis for the refresh-token store, user cache, login
+    limiter and revocation list.
+    """
+    from app import login_limiter, refresh_store, revocation, user_cache
+
+    r = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(refresh_store, "get_redis", lambda: r)
+    monkeypatch.setattr(user_cache, "get_redis", lambda: r)
+    monkeypatch.setattr(login_limiter, "get_redis", lambda: r)
+    monkeypatch.setattr(revocation, "get_redis", lambda: r)
+    monkeypatch.setattr(revocation, "_snapshot", None)
+    refresh_store._redeem_script.cache_clear()
+    user_cache._fill_script.cache_clear()
+    login_limiter._window_script.cache_clear()
+    user_cache.user_cache.invalidate()
+    login_limiter.memory_log.clear()
+    revocation.revocation_list.refresh()
+    yield r
+    refresh_store._redeem_script.cache_clear()
+    user_cache._fill_script.cache_clear()
+    login_limiter._window_script.cache_clear()
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def register(client):
+    def register(username: str, password: str = "s3cret-pass", **fields):
+        resp = client.post("/auth/register", json={"username": username, "password": password, **fields})
+        assert resp.status_code == 201, resp.text
+        return resp.json()
+
+    return register
+
+
+@pytest.fixture
+def sync_db():
+    """
+    Plain sync session on the test database, for setup and assertions
+    outside the app's event loop.
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    engine = create_engine(os.environ["AUTH_DATABASE_URL"])
+    with Session(engine) as db:
+        yield db
+    engine.dispose()
+
+
+@pytest.fixture
+def superadmin(client, sync_db):
+    """
+    Authorization headers for a freshly created superadmin.
+    """
+    import asyncio
+    import uuid
+
+    from app.hashing import hash_password
+    from app.models import User
+
+    username = f"root-{uuid.uuid4().hex[:8]}"
+    hashed = asyncio.run(hash_password("s3cret-pass"))
+    sync_db.add(User(username=username, hashed_password=hashed, role="superadmin", is_active=True))
+    sync_db.commit()
+    resp = client.post("/auth/login", data={"username": username, "password": "s3cret-pass"})
+    assert resp.status_code == 200, resp.text
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
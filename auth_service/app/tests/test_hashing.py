@@ -0,0 +1,37 @@
+# tests/test_hashing.py
+import asyncio
+import threading
+import uuid
+
+from app import hashing
+
+
+def _login(client, username, password="s3cret-pass"):
+    return client.post("/auth/login", data={"username": username, "password": password})
+
+
+def test_login_hashes_in_the_pool_with_configured_parameters(client, register):
+    username = f"u{uuid.uuid4().hex[:8]}"
+    register(username)
+
+    assert _login(client, username).status_code == 200
+    assert _login(client, username, "wrong").status_code == 400
+
+    stored = asyncio.run(hashing.hash_password("x"))
+    assert stored.startswith("$argon2id$") and "m=1024,t=1,p=1" in stored
+    assert hashing._pool is not None
+
+
+def test_saturated_pool_rejects_fast_with_429(client, register, monkeypatch):
+    username = f"u{uuid.uuid4().hex[:8]}"
+    register(username)
+
+    monkeypatch.setattr(hashing, "_pending", threading.BoundedSemaphore(1))
+    hashing._pending.acquire()  # the one slot is taken by another login
+
+    resp = _login(client, username)
+    assert resp.status_code == 429
+    assert resp.headers["retry-after"] == "1"
+
+    hashing._pending.release()
+    assert _login(client, username).status_code == 200
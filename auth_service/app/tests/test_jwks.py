@@ -0,0 +1,140 @@
+# tests/test_jwks.py
+import time
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from fastapi import HTTPException
+from jose import jwk, jwt
+
+from shared import auth_utils
+from shared.jwks import RemoteKeySet, algorithm_for, public_jwk, verification_keys
+
+
+def _new_rsa_pem() -> str:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+
+
+def _new_ec_pem(curve=None) -> str:
+    key = ec.generate_private_key(curve or ec.SECP256R1())
+    return key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+
+
+def _wait_for(keyset, kid):
+    deadline = time.monotonic() + 2
+    while keyset.get(kid) is None:
+        assert time.monotonic() < deadline, f"kid {kid} never showed up"
+        time.sleep(0.01)
+    return keyset.get(kid)
+
+
+def test_tokens_carry_the_kid_published_in_jwks(client, register):
+    register("jwks-user")
+    token = client.post("/auth/login", data={"username": "jwks-user", "password": "s3cret-pass"}).json()["access_token"]
+
+    resp = client.get("/.well-known/jwks.json")
+    assert resp.status_code == 200
+    assert "max-age" in resp.headers["cache-control"]
+    published = {key["kid"]: key for key in resp.json()["keys"]}
+
+    kid = jwt.get_unverified_header(token)["kid"]
+    assert published[kid]["alg"] == "RS256"
+    assert "d" not in published[kid]  # public half only
+    assert auth_utils.verify_jwt(f"Bearer {token}").sub == "jwks-user"
+
+
+def test_keyset_follows_rotation_without_blocking(monkeypatch):
+    old_pem, new_pem = _new_rsa_pem(), _new_rsa_pem()
+    old, new = public_jwk(old_pem, "RS256"), public_jwk(new_pem, "RS256")
+    document = {"keys": [old]}
+
+    keyset = RemoteKeySet("http://auth/jwks", refresh_seconds=60, retry_seconds=0.01)
+    monkeypatch.setattr(keyset, "_fetch", lambda: verification_keys(document))
+    monkeypatch.setattr(auth_utils, "verification_keyset", keyset)
+    _wait_for(keyset, old["kid"])
+
+    # Auth starts signing with a key this service has never seen
+    document["keys"] = [old, new]
+    token = jwt.encode({"sub": "u", "role": "user"}, new_pem, algorithm="RS256", headers={"kid": new["kid"]})
+    assert keyset.get(new["kid"]) is None      # answered from memory, refresh woken
+    _wait_for(keyset, new["kid"])
+    assert auth_utils.verify_jwt(f"Bearer {token}").sub == "u"
+
+    # Retired keys stop verifying once auth stops publishing them
+    document["keys"] = [new]
+    keyset._wake.set()
+    deadline = time.monotonic() + 2
+    while keyset.get(old["kid"]) is not None:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_algorithm_comes_from_the_key_not_the_header():
+    kid = auth_utils.BUNDLED_KID
+    forged = jwt.encode({"sub": "admin", "role": "admin"}, "guessable", algorithm="HS256", headers={"kid": kid})
+
+    with pytest.raises(HTTPException) as exc:
+        auth_utils.verify_jwt(f"Bearer {forged}")
+    assert exc.value.status_code == 401
+
+
+def test_algorithm_follows_the_key_type():
+    assert algorithm_for(_new_rsa_pem()) == "RS256"
+    assert algorithm_for(_new_ec_pem()) == "ES256"
+    assert algorithm_for(_new_ec_pem(ec.SECP384R1())) == "ES384"
+    assert public_jwk(_new_ec_pem())["alg"] == "ES256"
+
+    ed_pem = ed25519.Ed25519PrivateKey.generate().private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    with pytest.raises(ValueError):
+        algorithm_for(ed_pem)
+
+
+def test_rs256_and_es256_tokens_verify_side_by_side(monkeypatch):
+    from app import jwt_utils
+
+    rsa_pem, ec_pem = _new_rsa_pem(), _new_ec_pem()
+    rsa_jwk, ec_jwk = public_jwk(rsa_pem), public_jwk(ec_pem)
+    monkeypatch.setattr(auth_utils, "verification_keyset", verification_keys({"keys": [rsa_jwk, ec_jwk]}))
+
+    # Auth switches its signing key mid-way; tokens of both kinds stay valid
+    tokens = []
+    for pem, public in ((rsa_pem, rsa_jwk), (ec_pem, ec_jwk)):
+        monkeypatch.setattr(jwt_utils, "SIGNING_ALG", public["alg"])
+        monkeypatch.setattr(jwt_utils, "SIGNING_KID", public["kid"])
+        monkeypatch.setattr(jwt_utils, "SIGNING_KEY", jwk.construct(pem, public["alg"]))
+        tokens.append(jwt_utils.create_access_token({"sub": "u", "role": "user"}))
+
+    assert [jwt.get_unverified_header(t)["alg"] for t in tokens] == ["RS256", "ES256"]
+    for token in tokens:
+        assert auth_utils.verify_jwt(f"Bearer {token}").sub == "u"
+
+    # The ES256 kid only ever verifies ES256
+    forged = jwt.encode({"sub": "admin"}, rsa_pem, algorithm="RS256", headers={"kid": ec_jwk["kid"]})
+    with pytest.raises(HTTPException):
+        auth_utils.verify_jwt(f"Bearer {forged}")
+
+
+def test_verified_tokens_skip_the_signature_check(monkeypatch):
+    pem = _new_ec_pem()
+    public = public_jwk(pem)
+    monkeypatch.setattr(auth_utils, "verification_keyset", verification_keys({"keys": [public]}))
+    token = jwt.encode({"sub": "u", "exp": time.time() + 60}, pem, algorithm="ES256", headers={"kid": public["kid"]})
+
+    calls = []
+    decode = jwt.decode
+    monkeypatch.setattr(auth_utils.jwt, "decode", lambda *a, **kw: calls.append(1) or decode(*a, **kw))
+    for _ in range(3):
+        assert auth_utils.verify_jwt(f"Bearer {token}").sub == "u"
+    assert len(calls) == 1
+
+    # Unpublishing the key also retires tokens verified with it
+    monkeypatch.setattr(auth_utils, "verification_keyset", {})
+    with pytest.raises(HTTPException):
+        auth_utils.verify_jwt(f"Bearer {token}")
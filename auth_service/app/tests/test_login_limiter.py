@@ -0,0 +1,93 @@
+# tests/test_login_limiter.py
+import uuid
+from types import SimpleNamespace
+
+import ipaddress
+
+import pytest
+import redis
+from fastapi.testclient import TestClient
+
+from app import hashing, login_limiter
+from app.observability.metrics import LOGIN_THROTTLED
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(login_limiter, "LOGIN_MAX_PER_USERNAME", 3)
+    monkeypatch.setattr(login_limiter, "LOGIN_MAX_PER_IP", 5)
+    monkeypatch.setattr(login_limiter, "TRUSTED_PROXY_HOPS", 1)
+    monkeypatch.setattr(login_limiter, "TRUSTED_PROXY_CIDRS", [ipaddress.ip_network("10.0.0.0/8")])
+
+
+@pytest.fixture
+def client(client):
+    # Logins arrive through a proxy on the trusted network
+    with TestClient(client.app, client=("10.0.0.2", 50000)) as proxied:
+        yield proxied
+
+
+def _login(client, username, password="wrong", ip="203.0.113.7"):
+    return client.post(
+        "/auth/login",
+        data={"username": username, "password": password},
+        headers={"X-Forwarded-For": f"198.51.100.1, {ip}"},
+    )
+
+
+def test_username_is_throttled_before_hashing(client, register, limits, monkeypatch):
+    username = f"u{uuid.uuid4().hex[:8]}"
+    register(username)
+    for _ in range(3):
+        assert _login(client, username).status_code == 400
+
+    def no_hashing(*args):
+        raise AssertionError("throttled logins must not hash")
+
+    monkeypatch.setattr(hashing, "_run", no_hashing)
+    before = LOGIN_THROTTLED.labels(scope="username")._value.get()
+
+    resp = _login(client, username, "s3cret-pass")
+    assert resp.status_code == 429
+    assert 1 <= int(resp.headers["Retry-After"]) <= login_limiter.LOGIN_WINDOW_SECONDS
+    assert LOGIN_THROTTLED.labels(scope="username")._value.get() == before + 1
+
+
+def test_ip_is_throttled_across_usernames(client, limits):
+    for i in range(5):
+        assert _login(client, f"nobody-{i}").status_code == 400
+    assert _login(client, "nobody-5").status_code == 429
+    # Another client is unaffected; the spoofable left-most entry is ignored
+    assert _login(client, "nobody-5", ip="203.0.113.8").status_code == 400
+
+
+def test_window_slides(client, limits, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(login_limiter, "time", SimpleNamespace(time=lambda: now[0]))
+
+    for _ in range(3):
+        _login(client, "slider")
+    assert _login(client, "slider").status_code == 429
+
+    now[0] += login_limiter.LOGIN_WINDOW_SECONDS + 1
+    assert _login(client, "slider").status_code == 400
+
+
+def test_falls_back_to_memory_without_redis(client, limits, monkeypatch):
+    def unreachable():
+        raise redis.ConnectionError("down")
+
+    monkeypatch.setattr(login_limiter, "get_redis", unreachable)
+    login_limiter._window_script.cache_clear()
+
+    for _ in range(3):
+        assert _login(client, "fallback").status_code == 400
+    assert _login(client, "fallback").status_code == 429
+
+
+def test_forwarded_for_is_ignored_from_untrusted_peers(client, limits):
+    with TestClient(client.app, client=("192.0.2.10", 50000)) as direct:
+        for i in range(5):
+            assert _login(direct, f"direct-{i}", ip=f"203.0.113.{i}").status_code == 400
+        # Rotating the forged header does not buy more attempts
+        assert _login(direct, "direct-5", ip="203.0.113.99").status_code == 429
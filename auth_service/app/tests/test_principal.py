@@ -0,0 +1,56 @@
+# tests/test_principal.py
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app import jwt_utils
+from shared import auth_utils
+from shared.auth_utils import ADMIN_ROLES, Principal, require_role, verify_jwt
+
+
+def test_principal_is_built_once_per_token():
+    token = jwt_utils.create_access_token({"sub": "ops", "role": "superadmin"})
+
+    principal = verify_jwt(f"Bearer {token}")
+    assert (principal.sub, principal.role, principal.token) == ("ops", "superadmin", token)
+    assert principal.is_admin and principal.is_superadmin
+    assert verify_jwt(f"Bearer {token}") is principal
+    with pytest.raises(AttributeError):
+        principal.extra = 1
+
+
+def test_refresh_tokens_are_rejected_and_not_cached():
+    auth_utils.verified_tokens.clear()
+    token = jwt_utils.create_refresh_token({"sub": "ops", "role": "user"}, family="family")
+
+    with pytest.raises(HTTPException):
+        verify_jwt(f"Bearer {token}")
+    assert auth_utils.verified_tokens.get(token) is None
+
+
+def test_require_role_resolves_the_principal_once_per_request():
+    app = FastAPI()
+    calls = []
+
+    def principal():
+        calls.append(1)
+        return Principal("t", {"sub": "ops", "role": "admin"})
+
+    @app.get("/ops")
+    def ops(
+        admin: Principal = Depends(require_role(*ADMIN_ROLES)),
+        again: Principal = Depends(require_role(*ADMIN_ROLES)),
+        user: Principal = Depends(verify_jwt),
+    ):
+        assert admin is again is user
+        return {"sub": admin.sub}
+
+    @app.get("/root")
+    def root(admin: Principal = Depends(require_role("superadmin"))):
+        return {}
+
+    app.dependency_overrides[verify_jwt] = principal
+    with TestClient(app) as client:
+        assert client.get("/ops").json() == {"sub": "ops"}
+        assert calls == [1]
+        assert client.get("/root").status_code == 403
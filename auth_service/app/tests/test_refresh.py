@@ -0,0 +1,83 @@
+# tests/test_refresh.py
+import threading
+import uuid
+
+import redis
+
+from app import hashing, refresh_store
+
+
+def _login(client, register):
+    username = f"u{uuid.uuid4().hex[:8]}"
+    register(username)
+    resp = client.post("/auth/login", data={"username": username, "password": "s3cret-pass"})
+    assert resp.status_code == 200
+    return resp.json()
+
+
+def _refresh(client, token):
+    return client.post("/auth/refresh", json={"refresh_token": token})
+
+
+def test_refresh_rotates_without_hashing(client, register, monkeypatch):
+    tokens = _login(client, register)
+
+    def no_hashing(*args):
+        raise AssertionError("refresh must not hash")
+
+    monkeypatch.setattr(hashing, "_run", no_hashing)
+
+    resp = _refresh(client, tokens["refresh_token"])
+    assert resp.status_code == 200
+    rotated = resp.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+
+    me = client.get("/auth/users/me", headers={"Authorization": f"Bearer {rotated['access_token']}"})
+    assert me.status_code == 200
+    assert _refresh(client, rotated["refresh_token"]).status_code == 200
+
+
+def test_reused_refresh_token_revokes_the_family(client, register):
+    tokens = _login(client, register)
+    rotated = _refresh(client, tokens["refresh_token"]).json()
+
+    # The old token is replayed: it and everything rotated from it stop working
+    assert _refresh(client, tokens["refresh_token"]).status_code == 401
+    assert _refresh(client, rotated["refresh_token"]).status_code == 401
+
+    # A fresh login starts a new family
+    assert _refresh(client, _login(client, register)["refresh_token"]).status_code == 200
+
+
+def test_token_types_are_not_interchangeable(client, register):
+    tokens = _login(client, register)
+
+    assert _refresh(client, tokens["access_token"]).status_code == 401
+    me = client.get("/auth/users/me", headers={"Authorization": f"Bearer {tokens['refresh_token']}"})
+    assert me.status_code == 401
+
+
+def test_refresh_fails_closed_without_redis(client, register, monkeypatch):
+    tokens = _login(client, register)
+
+    def broken():
+        raise redis.ConnectionError("down")
+
+    monkeypatch.setattr(refresh_store, "get_redis", broken)
+    assert _refresh(client, tokens["refresh_token"]).status_code == 503
+
+
+def test_tokens_are_signed_in_the_signing_pool(client, register, monkeypatch):
+    from app import jwt_utils
+
+    threads = []
+    sign = jwt_utils.create_access_token
+
+    def recording(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return sign(*args, **kwargs)
+
+    monkeypatch.setattr(jwt_utils, "create_access_token", recording)
+    tokens = _login(client, register)
+    assert _refresh(client, tokens["refresh_token"]).status_code == 200
+    assert len(threads) == 2 and all(name.startswith("jwt-sign") for name in threads)
@@ -0,0 +1,99 @@
+# tests/test_registration.py
+import threading
+import uuid
+
+import pytest
+from sqlalchemy import delete, event
+
+from app import bootstrap
+from app.db import engine
+from app.models import Bootstrap, User
+
+
+@pytest.fixture
+def fresh_install(client, sync_db, monkeypatch):
+    """
+    An empty users table, as on first deploy.
+    """
+    sync_db.execute(delete(User))
+    sync_db.execute(delete(Bootstrap))
+    sync_db.commit()
+    monkeypatch.setattr(bootstrap, "_initialized", False)
+
+
+def _register_concurrently(client, bodies):
+    statuses = []
+    barrier = threading.Barrier(len(bodies))
+
+    def worker(body):
+        barrier.wait()
+        statuses.append(client.post("/auth/register", json=body).status_code)
+
+    threads = [threading.Thread(target=worker, args=(body,)) for body in bodies]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(statuses)
+
+
+def test_registration_is_one_insert(client, register):
+    register(f"u{uuid.uuid4().hex[:8]}")  # this process now knows the install is initialized
+
+    seen = []
+
+    def record(conn, cursor, statement, *args):
+        seen.append(statement.split()[0].upper())
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        register(f"u{uuid.uuid4().hex[:8]}")
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+    assert seen == ["INSERT"]
+
+
+def test_concurrent_duplicate_usernames(client):
+    username = f"u{uuid.uuid4().hex[:8]}"
+    bodies = [{"username": username, "password": "s3cret-pass"}] * 4
+    assert _register_concurrently(client, bodies) == [201, 400, 400, 400]
+
+
+def test_only_one_first_superadmin(client, sync_db, fresh_install):
+    bodies = [
+        {"username": f"root-{uuid.uuid4().hex[:8]}", "password": "s3cret-pass", "role": "superadmin"}
+        for _ in range(4)
+    ]
+    assert _register_concurrently(client, bodies) == [201, 403, 403, 403]
+
+    assert sync_db.query(User).filter(User.role == "superadmin").count() == 1
+
+
+def test_first_regular_user_closes_bootstrap(client, register, fresh_install):
+    register(f"u{uuid.uuid4().hex[:8]}")
+    assert bootstrap.is_initialized()
+
+    # A replica that has not seen the marker yet still refuses
+    bootstrap._initialized = False
+    resp = client.post(
+        "/auth/register",
+        json={"username": f"root-{uuid.uuid4().hex[:8]}", "password": "s3cret-pass", "role": "superadmin"},
+    )
+    assert resp.status_code == 403
+
+
+def test_startup_marks_existing_installs(sync_db, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app):  # creates the tables
+        pass
+    # Users from before the marker table existed
+    sync_db.add(User(username=f"u{uuid.uuid4().hex[:8]}", hashed_password="x"))
+    sync_db.execute(delete(Bootstrap))
+    sync_db.commit()
+    monkeypatch.setattr(bootstrap, "_initialized", False)
+
+    with TestClient(app):
+        assert bootstrap.is_initialized()
+    assert sync_db.get(Bootstrap, 1) is not None
@@ -0,0 +1,134 @@
+# tests/test_revocation.py
+import asyncio
+import threading
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from shared import auth_utils
+from shared.revocation import BloomFilter, RevocationList
+
+
+def _login(client, register):
+    username = f"u{uuid.uuid4().hex[:8]}"
+    register(username)
+    resp = client.post("/auth/login", data={"username": username, "password": "s3cret-pass"})
+    assert resp.status_code == 200
+    return resp.json()
+
+
+def _bearer(tokens):
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+def test_logout_revokes_access_token_and_refresh_family(client, register):
+    tokens = _login(client, register)
+    other = _login(client, register)
+
+    resp = client.post("/auth/logout", json={"refresh_token": tokens["refresh_token"]}, headers=_bearer(tokens))
+    assert resp.status_code == 204
+
+    assert client.get("/auth/users/me", headers=_bearer(tokens)).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+    # Other sessions are untouched
+    assert client.get("/auth/users/me", headers=_bearer(other)).status_code == 200
+
+
+def test_revocation_filter_is_versioned(client, register):
+    first = client.get("/auth/revocations")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert client.get("/auth/revocations", headers={"If-None-Match": etag}).status_code == 304
+
+    tokens = _login(client, register)
+    client.post("/auth/logout", headers=_bearer(tokens))
+
+    resp = client.get("/auth/revocations", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag
+    jti = auth_utils.jwt.get_unverified_claims(tokens["access_token"])["jti"]
+    assert jti in BloomFilter.from_dict(resp.json()["filter"])
+    assert client.get(f"/auth/revocations/{jti}").json()["revoked"] is True
+    assert client.get(f"/auth/revocations/{uuid.uuid4().hex}").json()["revoked"] is False
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter.for_capacity(1000, 0.01)
+    revoked = [uuid.uuid4().hex for _ in range(1000)]
+    for jti in revoked:
+        bloom.add(jti)
+    restored = BloomFilter.from_dict(bloom.to_dict())
+
+    assert all(jti in restored for jti in revoked)
+    false_positives = sum(uuid.uuid4().hex in restored for _ in range(10_000))
+    assert false_positives < 300
+
+
+def _list(revoked, confirm=None):
+    bloom = BloomFilter.for_capacity(100, 0.001)
+    for jti in revoked:
+        bloom.add(jti)
+    calls = []
+
+    def exact(jti):
+        calls.append(jti)
+        return confirm(jti) if confirm else jti in revoked
+
+    revocations = RevocationList(lambda version: ("1", bloom), exact, sync_seconds=0, retry_seconds=0)
+    return revocations, calls
+
+
+def test_only_filter_hits_are_confirmed():
+    revocations, calls = _list({"gone"})
+    assert revocations.is_revoked("gone") is False  # nothing synced yet
+
+    revocations.refresh()
+    assert not any(revocations.is_revoked(uuid.uuid4().hex) for _ in range(200))
+    assert revocations.is_revoked("gone") is True
+    assert revocations.is_revoked("gone") is True
+    assert calls == ["gone"]
+
+
+def test_async_check_confirms_hits_off_the_event_loop():
+    threads = []
+
+    def confirm(jti):
+        threads.append(threading.get_ident())
+        return True
+
+    revocations, _ = _list({"gone"}, confirm=confirm)
+    revocations.refresh()
+
+    async def check():
+        loop_thread = threading.get_ident()
+        assert await revocations.is_revoked_async(uuid.uuid4().hex) is False
+        assert threads == []
+        assert await revocations.is_revoked_async("gone") is True
+        assert await revocations.is_revoked_async("gone") is True
+        return loop_thread
+
+    loop_thread = asyncio.run(check())
+    assert len(threads) == 1 and threads[0] != loop_thread
+
+
+def test_unconfirmable_hit_is_treated_as_revoked():
+    def down(jti):
+        raise OSError("auth unreachable")
+
+    revocations, _ = _list({"gone"}, confirm=down)
+    revocations.refresh()
+    assert revocations.is_revoked("gone") is True
+
+
+def test_services_reject_revoked_tokens(client, register, monkeypatch):
+    tokens = _login(client, register)
+    jti = auth_utils.jwt.get_unverified_claims(tokens["access_token"])["jti"]
+    revocations, _ = _list({jti})
+    monkeypatch.setattr(auth_utils, "revocation_list", revocations)
+
+    assert auth_utils.verify_jwt(f"Bearer {tokens['access_token']}").sub
+    revocations.refresh()
+    with pytest.raises(HTTPException) as exc:
+        auth_utils.verify_jwt(f"Bearer {tokens['access_token']}")
+    assert exc.value.status_code == 401
@@ -0,0 +1,111 @@
+# tests/test_user_cache.py
+import uuid
+
+import pytest
+import redis
+from sqlalchemy import event
+
+from app import user_cache
+from app.db import engine
+
+
+@pytest.fixture
+def statements():
+    """
+    SQL statements executed while the test runs.
+    """
+    seen = []
+
+    def record(conn, cursor, statement, *args):
+        seen.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+
+def _login(client, register, **fields):
+    username = f"u{uuid.uuid4().hex[:8]}"
+    register(username, **fields)
+    resp = client.post("/auth/login", data={"username": username, "password": "s3cret-pass"})
+    assert resp.status_code == 200
+    return username, {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+def test_users_me_is_served_from_cache(client, register, statements):
+    username, headers = _login(client, register)
+
+    statements.clear()
+    for _ in range(3):
+        resp = client.get("/auth/users/me", headers=headers)
+        assert resp.status_code == 200
+        assert resp.json()["username"] == username
+    assert statements == []
+
+
+def test_redis_tier_serves_other_replicas(client, register, statements):
+    username, headers = _login(client, register)
+    # Login keeps the password hash in memory only; a profile read fills Redis
+    user_cache.user_cache.invalidate()
+    client.get("/auth/users/me", headers=headers)
+
+    # A replica with a cold memory cache still skips Postgres
+    user_cache.user_cache.invalidate()
+    statements.clear()
+    assert client.get("/auth/users/me", headers=headers).json()["username"] == username
+    assert statements == []
+
+
+def test_role_change_invalidates(client, register, superadmin):
+    username, _ = _login(client, register)
+    refresh = client.post("/auth/login", data={"username": username, "password": "s3cret-pass"}).json()["refresh_token"]
+
+    resp = client.patch(f"/auth/users/{username}", json={"role": "admin"}, headers=superadmin)
+    assert resp.status_code == 200
+    assert resp.json()["role"] == "admin"
+
+    rotated = client.post("/auth/refresh", json={"refresh_token": refresh}).json()
+    me = client.get("/auth/users/me", headers={"Authorization": f"Bearer {rotated['access_token']}"})
+    assert me.json()["role"] == "admin"
+
+    client.patch(f"/auth/users/{username}", json={"is_active": False}, headers=superadmin)
+    resp = client.post("/auth/login", data={"username": username, "password": "s3cret-pass"})
+    assert resp.status_code == 403
+
+
+def test_update_requires_superadmin(client, register):
+    username, headers = _login(client, register)
+    resp = client.patch(f"/auth/users/{username}", json={"role": "superadmin"}, headers=headers)
+    assert resp.status_code == 403
+
+
+def test_works_without_redis(client, register, monkeypatch):
+    def unreachable():
+        raise redis.ConnectionError("down")
+
+    monkeypatch.setattr(user_cache, "get_redis", unreachable)
+    user_cache._fill_script.cache_clear()
+
+    username, headers = _login(client, register)
+    for _ in range(2):
+        assert client.get("/auth/users/me", headers=headers).json()["username"] == username
+
+
+def test_user_list_is_paginated(client, register, superadmin):
+    for _ in range(3):
+        _login(client, register)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2} | ({"cursor": cursor} if cursor else {})
+        resp = client.get("/auth/users", params=params, headers=superadmin)
+        assert resp.status_code == 200
+        page = resp.json()
+        assert len(page) <= 2
+        seen += [u["id"] for u in page]
+        cursor = resp.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert seen == sorted(seen)
+    assert len(seen) == len(set(seen)) >= 4
@@ -0,0 +1,235 @@
+# app/user_cache.py
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+import redis
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import User
+from app.redis_client import get_redis
+from app.observability.metrics import USER_CACHE
+
+logger = logging.getLogger("uvicorn")
+
+# ---------------------------------------------------------
+# Settings
+# ---------------------------------------------------------
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+# In-process entries; also bounds staleness if an invalidation is lost
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "30"))
+# Shared Redis tier (profiles only, never password hashes). Optional:
+# with it off, or Redis down, lookups go memory -> Postgres.
+USER_CACHE_REDIS = os.getenv("USER_CACHE_REDIS", "true").lower() == "true"
+USER_REDIS_TTL = int(os.getenv("USER_REDIS_TTL", "300"))
+# The generation counter must outlive any cached profile
+GENERATION_TTL = 24 * 3600
+INVALIDATION_CHANNEL = "auth:users:invalidate"
+
+
+def profile_of(user: User) -> dict:
+    return {
+        "id": user.id,
+        "username": user.username,
+        "full_name": user.full_name,
+        "is_active": user.is_active,
+        "role": user.role,
+    }
+
+
+class UserCache:
+    """
+    LRU + TTL cache of (profile, password hash or None), keyed by
+    username. The hash is only held here, in process memory, and only
+    when the entry was loaded from Postgres.
+
+    A reader that missed records the generation first and fills only if
+    no invalidation happened meanwhile, so a slow read can never put a
+    pre-update profile back after the update's invalidation.
+    """
+
+    def __init__(self, max_size: int = USER_CACHE_SIZE, ttl: float = USER_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, dict, str | None]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def get(self, username: str) -> tuple[tuple[dict, str | None] | None, int]:
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is not None:
+                expires_at, profile, hashed_password = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(username)
+                    return (profile, hashed_password), self._generation
+                del self._entries[username]
+            return None, self._generation
+
+    def put(self, username: str, profile: dict, hashed_password: str | None, generation: int) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[username] = (time.monotonic() + self.ttl, profile, hashed_password)
+            self._entries.move_to_end(username)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, username: str | None = None) -> None:
+        """
+        Drop one user, or everyone when username is None.
+        """
+        with self._lock:
+            self._generation += 1
+            if username is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(username, None)
+
+
+user_cache = UserCache()
+
+
+# ---------------------------------------------------------
+# Redis tier
+# ---------------------------------------------------------
+# Fill only if no invalidation happened since the reader looked.
+#   KEYS[1] -> generation counter, KEYS[2] -> cached profile
+#   ARGV[1] -> generation seen on the miss, ARGV[2] -> payload, ARGV[3] -> ttl
+FILL_IF_UNCHANGED_LUA = """
+if (redis.call('GET', KEYS[1]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+
+def _profile_key(username: str) -> str:
+    return f"auth:user:{username}"
+
+
+def _generation_key(username: str) -> str:
+    return f"auth:user:gen:{username}"
+
+
+@lru_cache
+def _fill_script():
+    return get_redis().register_script(FILL_IF_UNCHANGED_LUA)
+
+
+def _redis_get(username: str) -> tuple[dict | None, str | None]:
+    """
+    (cached profile or None, generation) in one round trip; generation
+    is None when Redis is off or unreachable (then nothing is filled).
+    """
+    if not USER_CACHE_REDIS:
+        return None, None
+    try:
+        payload, generation = get_redis().mget(_profile_key(username), _generation_key(username))
+    except redis.RedisError as exc:
+        logger.warning("User cache read failed: %s", exc)
+        return None, None
+    return (json.loads(payload) if payload else None), generation or "0"
+
+
+def _redis_fill(username: str, profile: dict, generation: str) -> None:
+    try:
+        _fill_script()(
+            keys=[_generation_key(username), _profile_key(username)],
+            args=[generation, json.dumps(profile), USER_REDIS_TTL],
+        )
+    except redis.RedisError as exc:
+        logger.warning("User cache write failed: %s", exc)
+
+
+# ---------------------------------------------------------
+# Lookups
+# ---------------------------------------------------------
+async def get_user(db: AsyncSession, username: str, with_password: bool = False) -> tuple[dict, str | None] | None:
+    """
+    (profile, password hash) for a username, or None if there is no such
+    user. The hash is only guaranteed with `with_password` (login); plain
+    profile reads may be served from Redis, which never stores it.
+    """
+    cached, generation = user_cache.get(username)
+    if cached is not None and (cached[1] is not None or not with_password):
+        USER_CACHE.labels(result="memory").inc()
+        return cached
+
+    redis_generation = None
+    if not with_password:
+        profile, redis_generation = await run_in_threadpool(_redis_get, username)
+        if profile is not None:
+            USER_CACHE.labels(result="redis").inc()
+            user_cache.put(username, profile, None, generation)
+            return profile, None
+
+    USER_CACHE.labels(result="miss").inc()
+    user = (await db.execute(select(User).where(User.username == username))).scalars().first()
+    if not user:
+        return None
+
+    profile = profile_of(user)
+    user_cache.put(username, profile, user.hashed_password, generation)
+    if redis_generation is not None:
+        await run_in_threadpool(_redis_fill, username, profile, redis_generation)
+    return profile, user.hashed_password
+
+
+def invalidate_user(username: str) -> None:
+    """
+    Drop a user everywhere: this replica's memory, Redis, and (via
+    pub/sub) the other replicas. Call after the write commits.
+    """
+    user_cache.invalidate(username)
+    if not USER_CACHE_REDIS:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.incr(_generation_key(username))
+        pipe.expire(_generation_key(username), GENERATION_TTL)
+        pipe.delete(_profile_key(username))
+        pipe.publish(INVALIDATION_CHANNEL, username)
+        pipe.execute()
+    except redis.RedisError as exc:
+        logger.warning("User cache invalidation failed: %s", exc)
+
+
+# ---------------------------------------------------------
+# Cross-replica invalidation (Redis pub/sub)
+# ---------------------------------------------------------
+def _on_invalidation(message: dict) -> None:
+    user_cache.invalidate(message["data"])
+
+
+def _on_subscriber_error(exc, pubsub, thread) -> None:
+    # Messages may have been missed while disconnected
+    logger.warning("User cache invalidation subscriber error: %s", exc)
+    user_cache.invalidate()
+    time.sleep(1)
+
+
+def start_invalidation_listener():
+    """
+    Subscribe this replica to invalidations from the others. Returns the
+    worker thread (stop() it on shutdown), or None if the Redis tier is
+    off or unreachable, in which case entries only expire by TTL.
+    """
+    if not USER_CACHE_REDIS:
+        return None
+    try:
+        pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{INVALIDATION_CHANNEL: _on_invalidation})
+    except redis.RedisError as exc:
+        logger.warning("User cache invalidation listener not started: %s", exc)
+        return None
+    return pubsub.run_in_thread(
+        sleep_time=1.0, daemon=True, exception_handler=_on_subscriber_error
+    )
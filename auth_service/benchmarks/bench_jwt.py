@@ -0,0 +1,80 @@
+"""
+JWT sign / verify benchmark
+===========================
+Signs and verifies a typical access token with each supported algorithm
+for S seconds per operation, the way auth_service (jwt_utils) and every
+other service (shared.auth_utils) do it: keys constructed once, the
+verify key picked from a JWKS entry. Prints ops/s per algorithm, plus
+shared.auth_utils.verify_jwt for a token it has already verified (the
+common case: clients reuse an access token until it expires).
+
+Verification runs once per hop (gateway, then the service), so its
+ops/s matters as much as signing does.
+
+    cd auth_service
+    python benchmarks/bench_jwt.py [--seconds S]
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from jose import jwk, jwt
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from shared import auth_utils  # noqa: E402
+from shared.jwks import public_jwk, verification_keys  # noqa: E402
+
+KEYS = {
+    "RS256": lambda: rsa.generate_private_key(public_exponent=65537, key_size=2048),
+    "ES256": lambda: ec.generate_private_key(ec.SECP256R1()),
+    "ES384": lambda: ec.generate_private_key(ec.SECP384R1()),
+}
+
+
+def rate(fn, seconds: float) -> float:
+    n, deadline = 0, time.perf_counter() + seconds
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        fn()
+        n += 1
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=3)
+    args = parser.parse_args()
+
+    claims = {
+        "sub": "bench-user",
+        "role": "user",
+        "exp": datetime.utcnow() + timedelta(minutes=15),
+        "iss": "pharma-auth",
+        "typ": "access",
+    }
+    print(f"{'alg':6} {'sign/s':>10} {'verify/s':>10} {'cached/s':>10} {'token bytes':>12}")
+    for algorithm, generate in KEYS.items():
+        pem = generate().private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ).decode()
+        public = public_jwk(pem, algorithm)
+        signing_key = jwk.construct(pem, algorithm)
+        verify_key, verify_alg = verification_keys({"keys": [public]})[public["kid"]]
+
+        token = jwt.encode(claims, signing_key, algorithm=algorithm, headers={"kid": public["kid"]})
+        signs = rate(lambda: jwt.encode(claims, signing_key, algorithm=algorithm, headers={"kid": public["kid"]}), args.seconds)
+        verifies = rate(lambda: jwt.decode(token, verify_key, algorithms=[verify_alg]), args.seconds)
+
+        auth_utils.verification_keyset = {public["kid"]: (verify_key, verify_alg)}
+        cached = rate(lambda: auth_utils.verify_jwt(f"Bearer {token}"), args.seconds)
+        print(f"{algorithm:6} {signs:10,.0f} {verifies:10,.0f} {cached:10,.0f} {len(token):12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Login throughput benchmark
+==========================
+Registers one user, then hammers POST /auth/login from C threads for S
+seconds while another thread polls GET /auth/users/me. Prints successful
+logins/s (total and per hashing core), how many attempts got a fast 429
+because the hashing pool was full, and /users/me latency under that load.
+
+Argon2 and pool settings come from the environment as in production
+(ARGON2_*, HASH_WORKERS, HASH_MAX_PENDING). Runs against
+AUTH_DATABASE_URL (a fresh SQLite file by default).
+
+    cd auth_service
+    HASH_WORKERS=2 python benchmarks/bench_login.py [--seconds S] [--concurrency C]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault(
+    "AUTH_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_auth.db')}",
+)
+# One user logging in nonstop is exactly what the login limiter blocks
+os.environ.setdefault("LOGIN_MAX_PER_USERNAME", "1000000000")
+os.environ.setdefault("LOGIN_MAX_PER_IP", "1000000000")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app import hashing  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    username, password = f"bench-{uuid.uuid4().hex[:8]}", "bench-password"
+    statuses: dict[int, int] = {}
+    me_latencies: list[float] = []
+    lock = threading.Lock()
+
+    with TestClient(app) as client:
+        client.post("/auth/register", json={"username": username, "password": password}).raise_for_status()
+        token = client.post("/auth/login", data={"username": username, "password": password}).json()["access_token"]
+        deadline = time.perf_counter() + args.seconds
+
+        def login_loop():
+            while time.perf_counter() < deadline:
+                status = client.post("/auth/login", data={"username": username, "password": password}).status_code
+                with lock:
+                    statuses[status] = statuses.get(status, 0) + 1
+
+        def me_loop():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                client.get("/auth/users/me", headers={"Authorization": f"Bearer {token}"})
+                me_latencies.append(time.perf_counter() - start)
+                time.sleep(0.01)
+
+        threads = [threading.Thread(target=login_loop) for _ in range(args.concurrency)]
+        threads.append(threading.Thread(target=me_loop))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    cores = min(os.cpu_count() or 1, hashing.HASH_WORKERS * hashing.ARGON2_PARALLELISM)
+    ok, rejected = statuses.pop(200, 0), statuses.pop(429, 0)
+    me_latencies.sort()
+    print(f"argon2id t={hashing.ARGON2_TIME_COST} m={hashing.ARGON2_MEMORY_COST} KiB "
+          f"p={hashing.ARGON2_PARALLELISM}; {hashing.HASH_WORKERS} workers, "
+          f"max {hashing.HASH_MAX_PENDING} pending; {args.concurrency} clients")
+    print(f"logins: {ok / args.seconds:.1f}/s ({ok / args.seconds / cores:.1f}/s per hashing core)  "
+          f"429: {rejected / args.seconds:.1f}/s  other: {statuses or 0}")
+    print(f"/users/me under load: p50 {statistics.median(me_latencies) * 1000:.1f} ms  "
+          f"p99 {me_latencies[int(len(me_latencies) * 0.99)] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Token issuance benchmark (one replica)
+======================================
+Starts one auth replica (a single uvicorn worker) in a subprocess and
+drives it over HTTP from several client processes:
+
+    refresh  POST /auth/refresh only: every response is a freshly
+             signed access + refresh token pair (no Argon2)
+    mixed    the same refresh load plus logins (Argon2) and
+             GET /auth/users/me polling, as under real traffic
+
+Prints token pairs issued per second and p50/p99 latency per route, so
+the mixed run shows whether signing and hashing starve profile reads.
+Run it on two commits to compare them.
+
+Argon2 and pool settings come from the environment as in production.
+Runs against AUTH_DATABASE_URL (a fresh SQLite file by default) and
+REDIS_URL (an in-process fake Redis server if unset).
+
+    cd auth_service
+    python benchmarks/bench_tokens.py [--seconds S] [--clients P] [--concurrency C]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault(
+    "AUTH_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_tokens.db')}",
+)
+
+PORT = 8766
+BASE_URL = f"http://127.0.0.1:{PORT}"
+FAKE_REDIS_PORT = 6390
+PASSWORD = "bench-password"
+
+
+def serve() -> None:
+    import uvicorn
+
+    from app.main import app
+
+    uvicorn.run(app, host="127.0.0.1", port=PORT, log_level="warning", access_log=False)
+
+
+def start_server() -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(sys.path),
+        # Every client logs in from 127.0.0.1 as the same user
+        "LOGIN_MAX_PER_USERNAME": "1000000000",
+        "LOGIN_MAX_PER_IP": "1000000000",
+    }
+    server = subprocess.Popen([sys.executable, __file__, "--serve"], cwd=ROOT, env=env)
+    for _ in range(300):
+        try:
+            if httpx.get(f"{BASE_URL}/health").status_code == 200:
+                return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("auth replica did not start")
+
+
+def start_fake_redis() -> None:
+    from fakeredis import TcpFakeServer
+
+    server = TcpFakeServer(("127.0.0.1", FAKE_REDIS_PORT))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["REDIS_URL"] = f"redis://127.0.0.1:{FAKE_REDIS_PORT}/0"
+
+
+def setup(sessions: int) -> tuple[str, list[str]]:
+    """
+    One user, and one refresh token chain per connection (logins run
+    one at a time so the hashing pool never turns them away).
+    """
+    username = f"bench-{uuid.uuid4().hex[:8]}"
+    with httpx.Client(base_url=BASE_URL, timeout=None) as client:
+        client.post("/auth/register", json={"username": username, "password": PASSWORD}).raise_for_status()
+        tokens = []
+        for _ in range(sessions):
+            resp = client.post("/auth/login", data={"username": username, "password": PASSWORD})
+            resp.raise_for_status()
+            tokens.append(resp.json())
+    return username, tokens
+
+
+async def drive(mode: str, username: str, tokens: list[dict], seconds: float) -> dict[str, list]:
+    """
+    One connection per token chain. In mixed mode every fourth
+    connection logs in instead and every fourth polls /users/me.
+    """
+    results: dict[str, list] = {"refresh": [], "login": [], "me": [], "errors": []}
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=len(tokens), max_keepalive_connections=len(tokens))
+
+    async with httpx.AsyncClient(base_url=BASE_URL, limits=limits, timeout=60) as client:
+        async def worker(i: int, pair: dict):
+            role = "refresh" if mode == "refresh" else ("login", "me", "refresh", "refresh")[i % 4]
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                if role == "refresh":
+                    resp = await client.post("/auth/refresh", json={"refresh_token": pair["refresh_token"]})
+                    if resp.status_code == 200:
+                        pair = resp.json()
+                elif role == "login":
+                    resp = await client.post("/auth/login", data={"username": username, "password": PASSWORD})
+                else:
+                    resp = await client.get(
+                        "/auth/users/me", headers={"Authorization": f"Bearer {pair['access_token']}"}
+                    )
+                if resp.status_code == 200:
+                    results[role].append(time.perf_counter() - start)
+                else:
+                    results["errors"].append(resp.status_code)
+
+        await asyncio.gather(*(worker(i, pair) for i, pair in enumerate(tokens)))
+    return results
+
+
+def client_process(args) -> dict[str, list]:
+    return asyncio.run(drive(*args))
+
+
+def main():
+    if "--serve" in sys.argv:
+        return serve()
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--clients", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=16, help="connections per client process")
+    args = parser.parse_args()
+
+    if "REDIS_URL" not in os.environ:
+        start_fake_redis()
+    server = start_server()
+    try:
+        username, tokens = setup(args.clients * args.concurrency)
+        print(f"auth: {args.clients} x {args.concurrency} connections, {args.seconds:.0f}s per mode")
+        with multiprocessing.Pool(args.clients) as pool:
+            for mode in ("refresh", "mixed"):
+                jobs = [
+                    (mode, username, tokens[i * args.concurrency:(i + 1) * args.concurrency], args.seconds)
+                    for i in range(args.clients)
+                ]
+                results = pool.map(client_process, jobs)
+                # Each chain was rotated; the next mode continues from fresh logins
+                tokens = setup(args.clients * args.concurrency)[1] if mode == "refresh" else tokens
+                errors: dict[int, int] = {}
+                for result in results:
+                    for status in result["errors"]:
+                        errors[status] = errors.get(status, 0) + 1
+                for route in ("refresh", "login", "me"):
+                    latencies = sorted(l for result in results for l in result[route])
+                    if not latencies:
+                        continue
+                    p99 = latencies[int(len(latencies) * 0.99)]
+                    print(f"{mode:7} {route:7} {len(latencies) / args.seconds:8,.1f} req/s  "
+                          f"p50 {statistics.median(latencies) * 1000:7.1f} ms  p99 {p99 * 1000:7.1f} ms")
+                print(f"{mode:7} errors  {errors or 0}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
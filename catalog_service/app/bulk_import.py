@@ -0,0 +1,217 @@
+# app/bulk_import.py
+import csv
+import json
+import logging
+import os
+import tempfile
+from functools import lru_cache
+from typing import AsyncIterator, Iterator
+
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import iterate_in_threadpool
+
+from app.db import SessionLocal
+from app.drug_cache import invalidate_all_drugs
+from app.models import Product
+from app.schemas import DrugImportRow
+from app.search import reindex_drugs
+
+logger = logging.getLogger("uvicorn")
+
+# ---------------------------------------------------------
+# Settings
+# ---------------------------------------------------------
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(500 * 1024 * 1024)))
+# Per-row errors past this many are still counted, just not listed
+MAX_REPORTED_ERRORS = 1000
+
+# Content-Type -> format
+IMPORT_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+# Columns an import may change on an existing drug (matched by ndc)
+UPSERT_COLUMNS = ("name", "manufacturer", "form", "strength", "price")
+
+
+async def spool_body(request: Request) -> str:
+    """
+    Stream the request body to a temp file off the event loop and return
+    its path. The caller owns (and must delete) the file.
+    """
+    fd, path = tempfile.mkstemp(suffix=".import")
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > IMPORT_MAX_BYTES:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Import larger than {IMPORT_MAX_BYTES // (1024 * 1024)} MB",
+                    )
+                await run_in_threadpool(out.write, chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+# ---------------------------------------------------------
+# Parsing: (line number, record dict or error message)
+# ---------------------------------------------------------
+def _csv_records(f) -> Iterator[tuple[int, dict | str]]:
+    reader = csv.DictReader(f)
+    for record in reader:
+        if None in record:
+            yield reader.line_num, "Too many fields"
+        else:
+            yield reader.line_num, record
+
+
+def _ndjson_records(f) -> Iterator[tuple[int, dict | str]]:
+    for line_no, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_no, "Invalid JSON"
+            continue
+        yield line_no, record if isinstance(record, dict) else "Expected a JSON object"
+
+
+_PARSERS = {"csv": _csv_records, "ndjson": _ndjson_records}
+
+
+# ---------------------------------------------------------
+# Upsert
+# ---------------------------------------------------------
+@lru_cache
+def _upsert_statement(dialect: str):
+    """
+    INSERT ... ON CONFLICT (ndc) DO UPDATE ... RETURNING id, built once per
+    dialect so its compiled form is cached across batches. Rows whose
+    values did not change are left alone (same version, same ETag) and
+    return nothing.
+    """
+    insert = pg_insert if dialect == "postgresql" else sqlite_insert
+    stmt = insert(Product)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["ndc"],
+        set_={
+            **{c: getattr(stmt.excluded, c) for c in UPSERT_COLUMNS},
+            "version": Product.version + 1,
+            # the insert default, i.e. now (onupdate does not apply here)
+            "updated_at": stmt.excluded.updated_at,
+        },
+        where=or_(*(getattr(Product, c).is_distinct_from(getattr(stmt.excluded, c)) for c in UPSERT_COLUMNS)),
+    )
+    return stmt.returning(Product.id)
+
+
+async def _upsert(db: AsyncSession, rows: list[dict]) -> list[int]:
+    """
+    Upsert one batch; returns the ids of the rows inserted or updated.
+    Executed as an executemany, which SQLAlchemy batches into multi-row
+    VALUES ("insertmanyvalues").
+    """
+    # Same key order in every transaction -> no deadlocks between importers
+    rows = sorted(rows, key=lambda row: row["ndc"])
+    stmt = _upsert_statement(db.bind.dialect.name)
+    conn = await db.connection()
+    return list((await conn.execute(stmt, rows)).scalars())
+
+
+def _batches(
+    path: str, fmt: str, username: str, totals: dict
+) -> Iterator[tuple[dict[str, tuple[int, dict]], list[dict]]]:
+    """
+    Parse and validate the spooled file, yielding (rows by NDC, per-row
+    errors) every IMPORT_BATCH_SIZE valid rows. Counts processed,
+    superseded and failed rows into `totals`. File reads and validation
+    are blocking: iterate this in the threadpool.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        batch: dict[str, tuple[int, dict]] = {}
+        errors: list[dict] = []
+        for line_no, record in _PARSERS[fmt](f):
+            totals["processed"] += 1
+            if isinstance(record, str):
+                totals["failed"] += 1
+                errors.append({"line": line_no, "errors": [record]})
+                continue
+            try:
+                row = DrugImportRow.model_validate(record).model_dump()
+            except ValidationError as exc:
+                totals["failed"] += 1
+                errors.append({
+                    "line": line_no,
+                    "errors": [f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors()],
+                })
+                continue
+
+            # Within a batch the last row for an NDC wins
+            if batch.pop(row["ndc"], None) is not None:
+                totals["superseded"] += 1
+            batch[row["ndc"]] = (line_no, {**row, "created_by": username})
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                yield batch, errors
+                batch, errors = {}, []
+
+        yield batch, errors
+
+
+async def run_import(path: str, fmt: str, username: str) -> AsyncIterator[bytes]:
+    """
+    Import the spooled file batch by batch, yielding one NDJSON progress
+    line per committed batch and a final summary line. Deletes the file
+    when done.
+    """
+    # processed = written + unchanged + superseded + failed
+    totals = {"processed": 0, "written": 0, "unchanged": 0, "superseded": 0, "failed": 0}
+    reported_errors = 0
+
+    def line(payload: dict) -> bytes:
+        return json.dumps(payload).encode() + b"\n"
+
+    async def flush(db: AsyncSession, batch: dict[str, tuple[int, dict]], errors: list[dict]) -> bytes:
+        nonlocal reported_errors
+        if batch:
+            try:
+                written = await _upsert(db, [row for _, row in batch.values()])
+                await db.commit()
+                totals["written"] += len(written)
+                totals["unchanged"] += len(batch) - len(written)
+            except DBAPIError as exc:
+                await db.rollback()
+                logger.warning("Import batch failed: %s", exc.orig)
+                totals["failed"] += len(batch)
+                errors.append({"lines": sorted(n for n, _ in batch.values()), "errors": [str(exc.orig)]})
+            else:
+                await reindex_drugs(db, written)
+                await run_in_threadpool(invalidate_all_drugs)
+
+        listed = errors[:max(0, MAX_REPORTED_ERRORS - reported_errors)]
+        reported_errors += len(listed)
+        return line({**totals, "errors": listed})
+
+    try:
+        async with SessionLocal() as db:
+            async for batch, errors in iterate_in_threadpool(_batches(path, fmt, username, totals)):
+                yield await flush(db, batch, errors)
+    except UnicodeDecodeError:
+        yield line({**totals, "errors": [{"line": None, "errors": ["File is not UTF-8"]}]})
+    finally:
+        os.remove(path)
+
+    yield line({"done": True, **totals, "errors_truncated": reported_errors >= MAX_REPORTED_ERRORS})
@@ -1,24 +1,166 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from contextlib import asynccontextmanager
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.schema import CreateColumn, CreateIndex
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import declarative_base
 from dotenv import load_dotenv
+import logging
 import os
 
 load_dotenv()
 
+logger = logging.getLogger("uvicorn")
+
 DATABASE_URL = os.getenv("CATALOG_DATABASE_URL")
 
 if not DATABASE_URL:
     raise RuntimeError("CATALOG_DATABASE_URL missing!")
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+# ---------------------------------------------------------
+# Pool settings (per replica)
+# ---------------------------------------------------------
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# Seconds a request waits for a free connection before failing
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Reconnect before Postgres / proxies drop long-lived idle connections
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# Postgres cancels any single statement running longer (0 = no limit)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+# Prepared statements asyncpg keeps per connection. Set 0 behind
+# PgBouncer in transaction mode, which cannot share them.
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "500"))
+
+# The URL keeps its sync form (postgresql://, sqlite:///) so it stays
+# shared with tooling; the engine swaps in the asyncio driver.
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_url(url: str):
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def _connect_args(url) -> dict:
+    if url.get_backend_name() != "postgresql":
+        return {}
+    return {
+        "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        "server_settings": {
+            "statement_timeout": str(DB_STATEMENT_TIMEOUT_MS),
+            "application_name": "catalog_service",
+        },
+    }
+
+
+ASYNC_DATABASE_URL = async_url(DATABASE_URL)
+
+engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    connect_args=_connect_args(ASYNC_DATABASE_URL),
+)
+
+# expire_on_commit=False: attributes stay readable after commit without
+# an implicit (and, under asyncio, impossible) lazy reload
+SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+# ---------------------------------------------------------
+# Schema setup (startup only)
+# ---------------------------------------------------------
+@asynccontextmanager
+async def _ddl_connection():
+    """
+    AUTOCOMMIT connection without the statement timeout, so building an
+    index on a large table is never cancelled half way.
+    """
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        postgres = conn.dialect.name == "postgresql"
+        if postgres:
+            await conn.execute(text("SET statement_timeout = 0"))
+        try:
+            yield conn
+        finally:
+            if postgres:
+                await conn.execute(text("RESET statement_timeout"))
+
+
+async def create_tables() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def ensure_extensions() -> None:
+    """
+    Postgres extensions the schema relies on (pg_trgm: fuzzy drug search).
+    Must run before create_all builds the trigram indexes.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    async with _ddl_connection() as conn:
+        try:
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        except DBAPIError as exc:
+            # a replica created it at the same moment
+            logger.warning("pg_trgm extension not created: %s", exc.orig)
+
+
+async def ensure_columns(table) -> None:
+    """
+    Add columns that were added to a model after its table already existed
+    (create_all never alters tables). Only for additive columns with a
+    server default or NULL allowed. A replica racing on the same column is
+    harmless: the duplicate error is logged and skipped.
+    """
+    async with _ddl_connection() as conn:
+        existing = await conn.run_sync(
+            lambda sync_conn: {column["name"] for column in inspect(sync_conn).get_columns(table.name)}
+        )
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = CreateColumn(column).compile(dialect=conn.dialect)
+            try:
+                await conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN {ddl}'))
+            except DBAPIError as exc:
+                logger.warning("Column %s.%s not added: %s", table.name, column.name, exc.orig)
+
+
+async def ensure_indexes(table) -> None:
+    """
+    Create indexes that were added to a table after it already existed
+    (create_all only builds indexes together with new tables).
+
+    Postgres: CREATE INDEX CONCURRENTLY IF NOT EXISTS, so writes are not
+    blocked while a large table is indexed. Another replica racing on the
+    same index is harmless: the duplicate error is logged and skipped.
+    """
+    async with _ddl_connection() as conn:
+        for index in table.indexes:
+            try:
+                if conn.dialect.name == "postgresql":
+                    options = index.dialect_options["postgresql"]
+                    options["concurrently"] = True
+                    try:
+                        await conn.execute(CreateIndex(index, if_not_exists=True))
+                    finally:
+                        options["concurrently"] = False
+                else:
+                    # honours ddl_if(dialect=...) on Postgres-only indexes
+                    await conn.run_sync(lambda sync_conn: index.create(bind=sync_conn, checkfirst=True))
+            except DBAPIError as exc:
+                logger.warning("Index %s not created: %s", index.name, exc.orig)
@@ -0,0 +1,142 @@
+# app/drug_cache.py
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import redis
+
+from app.redis_client import get_redis
+from app.search import search_index
+from app.observability.metrics import DRUG_CACHE
+
+logger = logging.getLogger("uvicorn")
+
+# ---------------------------------------------------------
+# Settings
+# ---------------------------------------------------------
+DRUG_CACHE_SIZE = int(os.getenv("DRUG_CACHE_SIZE", "10000"))
+# Upper bound on staleness if an invalidation message is ever lost
+DRUG_CACHE_TTL = float(os.getenv("DRUG_CACHE_TTL", "60"))
+INVALIDATION_CHANNEL = "catalog:drugs:invalidate"
+# Message meaning "drop every drug" (bulk writes)
+INVALIDATE_ALL = "*"
+
+
+class DrugCache:
+    """
+    LRU + TTL cache of (ETag, serialized DrugResponse JSON), keyed by
+    drug id.
+
+    A reader that missed records the generation first and fills only if
+    no invalidation happened meanwhile, so a slow read can never put a
+    pre-update row back after the update's invalidation.
+    """
+
+    def __init__(self, max_size: int = DRUG_CACHE_SIZE, ttl: float = DRUG_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[int, tuple[float, str, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def get(self, drug_id: int) -> tuple[tuple[str, bytes] | None, int]:
+        """
+        Return ((etag, JSON) or None, generation). Pass the generation to
+        put() after a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(drug_id)
+            if entry is not None:
+                expires_at, etag, payload = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(drug_id)
+                    DRUG_CACHE.labels(result="hit").inc()
+                    return (etag, payload), self._generation
+                del self._entries[drug_id]
+            DRUG_CACHE.labels(result="miss").inc()
+            return None, self._generation
+
+    def put(self, drug_id: int, etag: str, payload: bytes, generation: int) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[drug_id] = (time.monotonic() + self.ttl, etag, payload)
+            self._entries.move_to_end(drug_id)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, drug_id: int | None = None) -> None:
+        """
+        Drop one drug, or everything when drug_id is None.
+        """
+        with self._lock:
+            self._generation += 1
+            if drug_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(drug_id, None)
+
+
+drug_cache = DrugCache()
+
+
+# ---------------------------------------------------------
+# Cross-replica invalidation (Redis pub/sub)
+# ---------------------------------------------------------
+def _on_invalidation(message: dict) -> None:
+    # Local only: never re-publish what came off the channel
+    data = message["data"]
+    drug_id = None if data == INVALIDATE_ALL else int(data)
+    drug_cache.invalidate(drug_id)
+    search_index.invalidate(None if drug_id is None else [drug_id])
+
+
+def _on_subscriber_error(exc, pubsub, thread) -> None:
+    # Messages may have been missed while disconnected
+    logger.warning("Drug cache invalidation subscriber error: %s", exc)
+    drug_cache.invalidate()
+    time.sleep(1)
+
+
+def _broadcast(message: str) -> None:
+    try:
+        get_redis().publish(INVALIDATION_CHANNEL, message)
+    except redis.RedisError as exc:
+        logger.warning("Drug cache invalidation broadcast failed: %s", exc)
+
+
+def invalidate_drug(drug_id: int) -> None:
+    """
+    Drop a drug from this replica's cache and tell the other replicas.
+    Call after the write commits. If Redis is down the other replicas
+    catch up within DRUG_CACHE_TTL.
+    """
+    drug_cache.invalidate(drug_id)
+    _broadcast(str(drug_id))
+
+
+def invalidate_all_drugs() -> None:
+    """
+    Same as invalidate_drug(), for writes that touch many drugs at once.
+    """
+    drug_cache.invalidate()
+    _broadcast(INVALIDATE_ALL)
+
+
+def start_invalidation_listener():
+    """
+    Subscribe this replica to invalidations from the others. Returns the
+    worker thread (stop() it on shutdown), or None if Redis is unreachable,
+    in which case entries only expire by TTL.
+    """
+    try:
+        pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{INVALIDATION_CHANNEL: _on_invalidation})
+    except redis.RedisError as exc:
+        logger.warning("Drug cache invalidation listener not started: %s", exc)
+        return None
+    return pubsub.run_in_thread(
+        sleep_time=1.0, daemon=True, exception_handler=_on_subscriber_error
+    )
@@ -0,0 +1,41 @@
+# app/etags.py
+import hashlib
+
+from fastapi import Response
+
+
+def drug_etag(drug_id: int, version: int) -> str:
+    """
+    Strong ETag for one drug: changes exactly when its version does.
+    """
+    return f'"{drug_id}-{version}"'
+
+
+def page_etag(rows, next_cursor: str | None) -> str:
+    """
+    Strong ETag for a list page: any update, insert or delete that changes
+    which rows (or which versions) are on the page changes the tag.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for row in rows:
+        digest.update(f"{row.id}-{row.version};".encode())
+    digest.update((next_cursor or "").encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    If-None-Match uses weak comparison: W/"x" matches "x", and * matches
+    anything.
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
@@ -0,0 +1,108 @@
+# app/export.py
+import csv
+import io
+import json
+import os
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+
+from app.db import SessionLocal
+from app.models import DeletedProduct, Product
+from app.schemas import DrugResponse
+
+# ---------------------------------------------------------
+# Settings
+# ---------------------------------------------------------
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+# X-Export-As-Of is this far behind the export start, so the next delta
+# also covers writes whose transactions were still open when this one
+# began. Consumers upsert by id, so the overlap is harmless.
+EXPORT_SAFETY_MARGIN = timedelta(seconds=int(os.getenv("EXPORT_SAFETY_MARGIN", "60")))
+
+CSV_COLUMNS = [
+    "id", "name", "manufacturer", "ndc", "form", "strength", "price",
+    "image_url", "created_by", "created_at", "updated_at", "deleted",
+]
+
+
+def export_as_of() -> datetime:
+    """
+    Timestamp to pass as `updated_since` on the next delta export.
+    """
+    return datetime.now(timezone.utc) - EXPORT_SAFETY_MARGIN
+
+
+def _product_records(rows) -> list[dict]:
+    return [DrugResponse.model_validate(row).model_dump(mode="json") for row in rows]
+
+
+async def _batches(updated_since: datetime | None) -> AsyncIterator[list[dict]]:
+    """
+    Products (then tombstones, in delta mode) as lists of JSON-ready
+    dicts. Rows are streamed with a server-side cursor in
+    EXPORT_BATCH_SIZE chunks, so memory stays flat however big the
+    catalog is.
+    """
+    async with SessionLocal() as db:
+        products = select(Product.__table__)
+        if updated_since is None:
+            products = products.order_by(Product.id)
+        else:
+            products = products.where(Product.updated_at > updated_since).order_by(Product.updated_at, Product.id)
+
+        result = await db.stream(products.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            yield await run_in_threadpool(_product_records, rows)
+
+        if updated_since is not None:
+            deletions = (
+                select(DeletedProduct.product_id, DeletedProduct.ndc, DeletedProduct.deleted_at)
+                .where(DeletedProduct.deleted_at > updated_since)
+                .order_by(DeletedProduct.deleted_at, DeletedProduct.id)
+                .execution_options(yield_per=EXPORT_BATCH_SIZE)
+            )
+            result = await db.stream(deletions)
+            async for rows in result.partitions():
+                yield [
+                    {"id": product_id, "ndc": ndc, "deleted": True, "updated_at": deleted_at.isoformat()}
+                    for product_id, ndc, deleted_at in rows
+                ]
+
+
+def _ndjson_lines(records: list[dict]) -> bytes:
+    return b"".join(json.dumps(record).encode() + b"\n" for record in records)
+
+
+async def export_ndjson(updated_since: datetime | None) -> AsyncIterator[bytes]:
+    async for records in _batches(updated_since):
+        yield await run_in_threadpool(_ndjson_lines, records)
+
+
+async def export_csv_gzip(updated_since: datetime | None) -> AsyncIterator[bytes]:
+    """
+    CSV with a header row, gzip-compressed on the fly (one compressor
+    for the whole stream, flushed once per batch).
+    """
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    text = io.StringIO()
+    writer = csv.DictWriter(text, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+
+    def compress(records: list[dict]) -> bytes:
+        for record in records:
+            writer.writerow({**record, "deleted": record.get("deleted", False)})
+        chunk = compressor.compress(text.getvalue().encode())
+        text.seek(0)
+        text.truncate()
+        return chunk
+
+    async for records in _batches(updated_since):
+        chunk = await run_in_threadpool(compress, records)
+        if chunk:
+            yield chunk
+
+    yield compressor.compress(text.getvalue().encode()) + compressor.flush()
@@ -0,0 +1,192 @@
+# app/images.py
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+logger = logging.getLogger("uvicorn")
+
+# ---------------------------------------------------------
+# Settings
+# ---------------------------------------------------------
+UPLOAD_DIR = "uploads"
+STATIC_URL_PREFIX = "/catalog/static"
+MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_BYTES", str(5 * 1024 * 1024)))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+CHUNK_SIZE = 1024 * 1024
+
+# variant name -> longest side in pixels (always WebP)
+VARIANTS = {"thumb": 256, "medium": 1024}
+
+# Type is decided by the file's magic bytes, never by the client's
+# filename or Content-Type
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+)
+
+
+def _sniff(head: bytes) -> str | None:
+    for signature, ext in _SIGNATURES:
+        if head.startswith(signature):
+            return ext
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+# <sha256>.<ext> originals and <sha256>_<variant>.webp variants. Their
+# content never changes under the same name, so they are cached forever.
+_CONTENT_ADDRESSED = re.compile(
+    r"^[0-9a-f]{64}(_(%s)\.webp|\.(jpg|png|gif|webp))$" % "|".join(VARIANTS)
+)
+
+
+def is_content_addressed(filename: str) -> bool:
+    return bool(_CONTENT_ADDRESSED.match(filename))
+
+
+def variant_name(filename: str, variant: str) -> str:
+    digest = filename.rsplit(".", 1)[0]
+    return f"{digest}_{variant}.webp"
+
+
+def variant_urls(image_url: str | None) -> dict[str, str] | None:
+    """
+    Public URLs of the pre-generated variants (images uploaded before
+    variants existed have none).
+    """
+    if not image_url:
+        return None
+    filename = image_url.split("/")[-1]
+    if not is_content_addressed(filename):
+        return None
+    return {variant: f"{STATIC_URL_PREFIX}/{variant_name(filename, variant)}" for variant in VARIANTS}
+
+
+# ---------------------------------------------------------
+# Process pool (Pillow work is CPU bound)
+# ---------------------------------------------------------
+_pool: ProcessPoolExecutor | None = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def _make_variants(path: str) -> None:
+    """
+    Runs in a worker process: write the resized WebP variants next to the
+    original. Existing variants are kept (same content, same name).
+    """
+    from PIL import Image, ImageOps
+
+    directory, filename = os.path.split(path)
+    with Image.open(path) as original:
+        image = ImageOps.exif_transpose(original)
+        image.load()
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        for variant, size in VARIANTS.items():
+            target = os.path.join(directory, variant_name(filename, variant))
+            if os.path.exists(target):
+                continue
+            resized = image.copy()
+            resized.thumbnail((size, size))
+            partial = f"{target}.part"
+            resized.save(partial, "WEBP", quality=80, method=4)
+            os.replace(partial, target)
+
+
+# ---------------------------------------------------------
+# Upload
+# ---------------------------------------------------------
+def _write_chunk(out, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    out.write(chunk)
+
+
+def _discard(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def store_image(upload: UploadFile) -> str:
+    """
+    Stream an uploaded image to disk and return its public URL.
+
+    Chunks are hashed and written in the threadpool, so a large upload
+    never blocks the event loop. Files are named by their SHA-256, so the
+    same image uploaded twice is stored once. Variants are generated in
+    the process pool before returning.
+    """
+    fd, partial = tempfile.mkstemp(dir=UPLOAD_DIR, suffix=".part")
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await upload.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_IMAGE_BYTES:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Image larger than {MAX_IMAGE_BYTES // (1024 * 1024)} MB",
+                    )
+                if len(head) < 16:
+                    head += chunk[:16]
+                await run_in_threadpool(_write_chunk, out, digest, chunk)
+
+        ext = _sniff(head)
+        if ext is None:
+            raise HTTPException(status_code=415, detail="Image must be JPEG, PNG, GIF or WebP")
+
+        filename = f"{digest.hexdigest()}.{ext}"
+        path = os.path.join(UPLOAD_DIR, filename)
+        if os.path.exists(path):
+            _discard(partial)          # identical image already stored
+        else:
+            os.replace(partial, path)
+    except BaseException:
+        _discard(partial)
+        raise
+
+    try:
+        await asyncio.get_running_loop().run_in_executor(_get_pool(), _make_variants, path)
+    except Exception as exc:
+        logger.warning("Image %s could not be processed: %s", filename, exc)
+        await run_in_threadpool(remove_image, f"{STATIC_URL_PREFIX}/{filename}")
+        raise HTTPException(status_code=400, detail="Image could not be read")
+
+    return f"{STATIC_URL_PREFIX}/{filename}"
+
+
+def remove_image(image_url: str) -> None:
+    """
+    Delete an image and its variants. Callers must check that no other
+    drug still references it (identical uploads share one file).
+    """
+    filename = image_url.split("/")[-1]
+    _discard(os.path.join(UPLOAD_DIR, filename))
+    for variant in VARIANTS:
+        _discard(os.path.join(UPLOAD_DIR, variant_name(filename, variant)))
@@ -1,8 +1,11 @@
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 import os
-from app.db import Base, engine
+from app.db import Base, engine, create_tables, ensure_columns, ensure_extensions, ensure_indexes
 from app.routers.drugs import router as drugs_router
+from app.routers.images import router as images_router
+from app.drug_cache import start_invalidation_listener
+from app.search import ensure_search_words
+from app.images import UPLOAD_DIR, shutdown_pool
 import logging
 import socket
 from app.observability.metrics import metrics_middleware, metrics_endpoint
@@ -17,10 +20,23 @@ app.middleware("http")(metrics_middleware("catalog_service"))
 logger = logging.getLogger("uvicorn")
 
 @app.on_event("startup")
-def startup():
+async def startup():
     logger.info("CATALOG SERVICE — Creating tables...")
-    Base.metadata.create_all(bind=engine)
+    await ensure_extensions()
+    await create_tables()
+    await ensure_columns(Base.metadata.tables["products"])
+    await ensure_indexes(Base.metadata.tables["products"])
+    await ensure_search_words()
     logger.info("CATALOG SERVICE — Tables ready!")
+    app.state.cache_listener = start_invalidation_listener()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    if app.state.cache_listener is not None:
+        app.state.cache_listener.stop()
+    shutdown_pool()
+    await engine.dispose()
 
 
 
@@ -43,10 +59,9 @@ def metrics():
 
 
 # Ensure uploads directory exists
-UPLOAD_DIR = "uploads"
 if not os.path.exists(UPLOAD_DIR):
     os.makedirs(UPLOAD_DIR)
 
-app.mount("/static", StaticFiles(directory=UPLOAD_DIR), name="static")
+app.include_router(images_router)
 
 app.include_router(drugs_router, prefix="/drugs")
@@ -1,7 +1,14 @@
-from sqlalchemy import Column, Integer, String, DateTime, Numeric
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, Index, text
 from sqlalchemy.sql import func
 from app.db import Base
-from datetime import datetime
+from datetime import datetime, timezone
+
+# Full-text document for drug search. The query (app/search.py) must use
+# this exact expression so Postgres picks the GIN expression index.
+SEARCH_DOCUMENT_SQL = (
+    "to_tsvector('simple'::regconfig, "
+    "name || ' ' || manufacturer || ' ' || coalesce(strength, ''))"
+)
 
 
 class Product(Base):
@@ -16,6 +23,82 @@ class Product(Base):
     price = Column(Numeric(10, 2), nullable=False)
     image_url = Column(String, nullable=True)
     created_by = Column(String, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Python-side default too, so ORM inserts store the same format that
+    # bound datetime parameters use (keeps created_at cursors exact on SQLite)
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+    )
+    # Bumped on every update; the drug's ETag is derived from it
+    version = Column(Integer, nullable=False, default=1, server_default=text("1"))
+    # Delta exports (?updated_since=). Writes that bypass the ORM's
+    # onupdate (bulk upserts) must set it themselves.
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+    )
+
+    __table_args__ = (
+        # Keyset pagination: (sort column, id) for every sortable column
+        Index("ix_products_name_id", "name", "id"),
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_created_at_id", "created_at", "id"),
+        # Delta export: everything changed since a point in time
+        Index("ix_products_updated_at_id", "updated_at", "id"),
+        # Filter + sort: (filter column, sort column, id)
+        *(
+            Index(f"ix_products_{col}_{sort}_id", col, sort, "id")
+            for col in ("manufacturer", "form")
+            for sort in ("name", "price", "created_at")
+        ),
+        # Filter with the default id sort
+        Index("ix_products_manufacturer_id", "manufacturer", "id"),
+        Index("ix_products_form_id", "form", "id"),
+        # Search (Postgres only; SQLite uses the in-process index)
+        Index(
+            "ix_products_search_document", text(SEARCH_DOCUMENT_SQL),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_products_ndc_prefix", "ndc",
+            postgresql_ops={"ndc": "text_pattern_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
+
+class SearchWord(Base):
+    """
+    Every distinct word of the search document (Postgres only). Typos are
+    matched against this small vocabulary with trigrams, never against
+    the products themselves; see app/search.py. Words are only added, so
+    one whose drugs are gone simply matches nothing.
+    """
+    __tablename__ = "drug_search_words"
+
+    word = Column(String, primary_key=True)
+
+    __table_args__ = (
+        Index(
+            "ix_drug_search_words_trgm", "word",
+            postgresql_using="gin", postgresql_ops={"word": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
 
+class DeletedProduct(Base):
+    """
+    Tombstones, so delta exports can tell consumers what was removed.
+    """
+    __tablename__ = "product_deletions"
 
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, nullable=False)
+    ndc = Column(String)
+    deleted_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        index=True,
+    )
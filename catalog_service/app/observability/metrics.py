@@ -14,6 +14,13 @@ REQUEST_LATENCY = Histogram(
     ["service", "method", "path"]
 )
 
+# get_drug_by_id read-through cache (hit rate = hit / (hit + miss))
+DRUG_CACHE = Counter(
+    "catalog_drug_cache_requests_total",
+    "Drug-by-id cache lookups",
+    ["result"]
+)
+
 def metrics_middleware(service_name: str):
     async def middleware(request: Request, call_next):
         start_time = time.time()
@@ -0,0 +1,43 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable
+
+from fastapi import HTTPException
+
+
+# Opaque keyset cursor: base64(json([sort, last_sort_value, last_id]))
+
+def _to_json(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(sort: str, value, last_id: int) -> str:
+    raw = json.dumps([sort, _to_json(value), last_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, convert: Callable[[Any], Any]) -> tuple:
+    """
+    Returns (last_sort_value, last_id), the value converted back to the
+    sort column's type with `convert`. Any malformed or tampered cursor
+    is a 400, never a 500.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+        if isinstance(last_id, bool) or not isinstance(last_id, int):
+            raise TypeError("last id must be an integer")
+        value = convert(value)
+    except (ValueError, TypeError, ArithmeticError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if cursor_sort != sort:
+        raise HTTPException(status_code=400, detail="Cursor does not match sort order")
+
+    return value, last_id
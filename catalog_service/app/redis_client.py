@@ -0,0 +1,40 @@
+# app/redis_client.py
+import os
+from functools import lru_cache
+
+import redis
+from redis.backoff import ExponentialBackoff
+from redis.retry import Retry
+
+# ---------------------------------------------------------
+# Settings (all env-driven, defaults suit docker-compose)
+# ---------------------------------------------------------
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "20"))
+# Seconds to wait for a free pooled connection before giving up
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "0.5"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.5"))
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", "0.5"))
+REDIS_RETRIES = int(os.getenv("REDIS_RETRIES", "2"))
+REDIS_BACKOFF_BASE = float(os.getenv("REDIS_BACKOFF_BASE", "0.05"))
+REDIS_BACKOFF_CAP = float(os.getenv("REDIS_BACKOFF_CAP", "0.2"))
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+
+
+@lru_cache
+def get_redis() -> redis.Redis:
+    """
+    Shared sync Redis client (cache invalidation broadcasts). Catalog
+    routes run in FastAPI's threadpool, so a sync client fits.
+    """
+    pool = redis.BlockingConnectionPool.from_url(
+        REDIS_URL,
+        retry=Retry(ExponentialBackoff(cap=REDIS_BACKOFF_CAP, base=REDIS_BACKOFF_BASE), REDIS_RETRIES),
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=REDIS_POOL_TIMEOUT,
+        socket_timeout=REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+        health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+        decode_responses=True,
+    )
+    return redis.Redis(connection_pool=pool)
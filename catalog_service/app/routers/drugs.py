@@ -1,42 +1,260 @@
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form
-from sqlalchemy.orm import Session
-import shutil
-import os
-import uuid
-
-from app.schemas import DrugCreate, DrugResponse
-from app.models import Product
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form, Query, Response, Header, Request
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Literal
+import json
+
+from app.schemas import DrugCreate, DrugResponse, DrugBatchRequest, DrugBatchResponse
+from app.models import Product, DeletedProduct
 from app.db import get_db
-from shared.auth_utils import verify_jwt
+from app.pagination import encode_cursor, decode_cursor
+from app.search import reindex_drugs, search_drugs
+from app.drug_cache import drug_cache, invalidate_drug
+from app.etags import drug_etag, page_etag, etag_matches, not_modified
+from app.images import store_image, remove_image
+from app.bulk_import import IMPORT_FORMATS, spool_body, run_import
+from app.export import export_as_of, export_ndjson, export_csv_gzip
+from shared.auth_utils import Principal, require_role, verify_jwt
 
 router = APIRouter()
-UPLOAD_DIR = "uploads"
+# Writes (create / update / delete / import) are admin-only
+require_admin = require_role("admin")
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+
+def _cursor_str(value) -> str:
+    if not isinstance(value, str):
+        raise TypeError("expected a string")
+    return value
+
 
+# sort name -> (column, convert cursor JSON value back to column type)
+SORT_COLUMNS = {
+    "id": (Product.id, int),
+    "name": (Product.name, _cursor_str),
+    "price": (Product.price, Decimal),
+    "created_at": (Product.created_at, datetime.fromisoformat),
+}
 
 
-#get all drugs
+async def _image_in_use(db: AsyncSession, image_url: str) -> bool:
+    return await db.scalar(select(Product.id).where(Product.image_url == image_url).limit(1)) is not None
+
+
+#get all drugs (keyset paginated)
 @router.get("", response_model=list[DrugResponse])
 @router.get("/", response_model=list[DrugResponse])
-def list_drugs(
-    db: Session = Depends(get_db),
-    user=Depends(verify_jwt),
+async def list_drugs(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    manufacturer: str | None = None,
+    form: str | None = None,
+    min_price: float | None = Query(None, ge=0),
+    max_price: float | None = Query(None, ge=0),
+    sort: Literal["id", "name", "price", "created_at"] = "id",
+    order: Literal["asc", "desc"] = "asc",
+    if_none_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_db),
+    user: Principal = Depends(verify_jwt),
+):
+    """
+    One page of drugs. Pass the `X-Next-Cursor` response header back as
+    `cursor` to get the next page; the header is absent on the last page.
+    The page carries an ETag; a matching If-None-Match gets a 304 and the
+    rows are never serialized.
+    Indexes: (sort, id) for every sort and (manufacturer|form, sort, id)
+    for every filter + sort pair (see Product.__table_args__).
+    """
+    column, from_cursor = SORT_COLUMNS[sort]
+
+    query = select(Product)
+
+    if manufacturer:
+        query = query.where(Product.manufacturer == manufacturer)
+    if form:
+        query = query.where(Product.form == form)
+    if min_price is not None:
+        query = query.where(Product.price >= min_price)
+    if max_price is not None:
+        query = query.where(Product.price <= max_price)
+
+    # Keyset: continue strictly after the last (sort value, id) seen
+    key = tuple_(column, Product.id) if sort != "id" else Product.id
+    if cursor:
+        value, last_id = decode_cursor(cursor, f"{sort}:{order}", from_cursor)
+        last = tuple_(value, last_id) if sort != "id" else last_id
+        query = query.where(key > last if order == "asc" else key < last)
+
+    if order == "asc":
+        query = query.order_by(column.asc(), Product.id.asc())
+    else:
+        query = query.order_by(column.desc(), Product.id.desc())
+
+    # Fetch one extra row to know whether another page exists
+    rows = (await db.scalars(query.limit(limit + 1))).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_row = rows[-1]
+        next_cursor = encode_cursor(f"{sort}:{order}", getattr(last_row, sort), last_row.id)
+
+    etag = page_etag(rows, next_cursor)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    response.headers["ETag"] = etag
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
+
+
+#search drugs (must be declared before /{drug_id})
+@router.get("/search", response_model=list[DrugResponse])
+async def search(
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    user: Principal = Depends(verify_jwt),
+):
+    """
+    Ranked, typo-tolerant search on name, manufacturer, NDC prefix and
+    strength. Postgres full-text + trigram indexes; in-process index on
+    SQLite.
+    """
+    return await search_drugs(db, q.strip(), limit)
+
+
+#get many drugs by id
+@router.post("/batch", response_model=DrugBatchResponse)
+async def get_drugs_batch(
+    request: DrugBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    user: Principal = Depends(verify_jwt),
 ):
-    return db.query(Product).all()
+    """
+    Many drugs in one round trip: cached drugs come straight from the
+    drug cache, the rest from a single `WHERE id IN (...)` query. Items
+    keep the request order; unknown ids are listed in `missing`.
+    """
+    ids = list(dict.fromkeys(request.ids))
+    payloads: dict[int, bytes] = {}
+    misses: dict[int, int] = {}
+
+    for drug_id in ids:
+        cached, generation = drug_cache.get(drug_id)
+        if cached is not None:
+            payloads[drug_id] = cached[1]
+        else:
+            misses[drug_id] = generation
+
+    if misses:
+        for drug in await db.scalars(select(Product).where(Product.id.in_(misses))):
+            payload = DrugResponse.model_validate(drug).model_dump_json().encode()
+            drug_cache.put(drug.id, drug_etag(drug.id, drug.version), payload, misses[drug.id])
+            payloads[drug.id] = payload
+
+    # Assemble the cached JSON fragments without re-parsing them
+    items = b",".join(payloads[drug_id] for drug_id in ids if drug_id in payloads)
+    missing = [drug_id for drug_id in ids if drug_id not in payloads]
+    body = b'{"items":[' + items + b'],"missing":' + json.dumps(missing).encode() + b"}"
+    return Response(content=body, media_type="application/json")
+
+
+#bulk import (admin)
+@router.post("/import")
+async def import_drugs(
+    request: Request,
+    user: Principal = Depends(require_admin),
+):
+    """
+    Upsert drugs by NDC from a CSV (`Content-Type: text/csv`, header row
+    name,manufacturer,ndc,form,strength,price) or NDJSON
+    (`application/x-ndjson`) body.
+
+    The body is spooled to disk, then imported in batches of
+    IMPORT_BATCH_SIZE rows with one INSERT ... ON CONFLICT (ndc) each.
+    The response streams one NDJSON line per committed batch with the
+    running totals and that batch's per-row errors, then a final
+    `{"done": true, ...}` summary.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    fmt = IMPORT_FORMATS.get(content_type)
+    if fmt is None:
+        raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson")
+
+    path = await spool_body(request)
+    return StreamingResponse(run_import(path, fmt, user.sub), media_type="application/x-ndjson")
+
+
+#export the catalog (streaming, optionally only changes)
+@router.get("/export")
+async def export_drugs(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    updated_since: datetime | None = None,
+    user: Principal = Depends(verify_jwt),
+):
+    """
+    The whole formulary as NDJSON, or as gzip-compressed CSV with
+    `format=csv`, streamed from a server-side cursor.
+
+    With `updated_since`, only drugs changed after it are sent, followed
+    by `{"id", "ndc", "deleted": true}` records for drugs deleted since.
+    Pass the `X-Export-As-Of` response header as the next
+    `updated_since`.
+    """
+    if updated_since is not None:
+        if updated_since.tzinfo is None:
+            updated_since = updated_since.replace(tzinfo=timezone.utc)
+        updated_since = updated_since.astimezone(timezone.utc)
+
+    headers = {"X-Export-As-Of": export_as_of().isoformat()}
+    if format == "csv":
+        headers["Content-Disposition"] = 'attachment; filename="catalog.csv.gz"'
+        return StreamingResponse(export_csv_gzip(updated_since), media_type="application/gzip", headers=headers)
+    return StreamingResponse(export_ndjson(updated_since), media_type="application/x-ndjson", headers=headers)
 
 
 #get drug by id
 @router.get("/{drug_id}", response_model=DrugResponse)
-def get_drug_by_id(
+async def get_drug_by_id(
     drug_id: int,
-    db: Session=Depends(get_db),
-    user=Depends(verify_jwt),
+    if_none_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_db),
+    user: Principal = Depends(verify_jwt),
 ):
-    
-    drug= db.query(Product).filter(Product.id== drug_id).first()
+    """
+    Served from the in-process cache when possible: cached JSON is
+    returned as-is, with no ORM load or pydantic work. A matching
+    If-None-Match gets a 304 with no body.
+    """
+    cached, generation = drug_cache.get(drug_id)
+    if cached is not None:
+        etag, payload = cached
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        return Response(content=payload, media_type="application/json", headers={"ETag": etag})
+
+    drug = await db.get(Product, drug_id)
 
     if not drug:
         raise HTTPException(status_code=404, detail="Drug not found")
-    return drug
+
+    etag = drug_etag(drug.id, drug.version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    payload = DrugResponse.model_validate(drug).model_dump_json().encode()
+    drug_cache.put(drug_id, etag, payload, generation)
+    return Response(content=payload, media_type="application/json", headers={"ETag": etag})
 
 #create drug
 @router.post("", response_model=DrugResponse)
@@ -49,30 +267,18 @@ async def create_drug(
     strength: str = Form(None),
     price: float = Form(...),
     image: UploadFile = File(None),
-    db: Session = Depends(get_db),
-    user=Depends(verify_jwt),
+    db: AsyncSession = Depends(get_db),
+    user: Principal = Depends(require_admin),
 ):
-    # user is the decoded JWT payload
-    role = user.get("role", "user")
-    if role != "admin":
-        raise HTTPException(status_code=403, detail="Admins only can create drugs")
-    
     #checking if the drug is existing 
-    existing_drug = db.query(Product).filter(Product.ndc == ndc).first()
+    existing_drug = await db.scalar(select(Product.id).where(Product.ndc == ndc))
     if existing_drug:
         raise HTTPException(status_code=400, detail="Drug with this NDC already exists")
 
     image_url = None
     if image:
-        file_ext = image.filename.split(".")[-1]
-        file_name = f"{uuid.uuid4()}.{file_ext}"
-        file_path = os.path.join(UPLOAD_DIR, file_name)
-        
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-        
         # URL that the frontend will use (Kong will proxy /catalog/static to this)
-        image_url = f"/catalog/static/{file_name}"
+        image_url = await store_image(image)
 
     item = Product(
         name=name,
@@ -82,11 +288,13 @@ async def create_drug(
         strength=strength,
         price=price,
         image_url=image_url,
-        created_by=user.get("sub")
+        created_by=user.sub
     )
     db.add(item)
-    db.commit()
-    db.refresh(item)
+    await db.commit()
+    await db.refresh(item)
+    await reindex_drugs(db, [item.id])
+    await run_in_threadpool(invalidate_drug, item.id)
     return item
 
 
@@ -102,41 +310,26 @@ async def update_drug(
     strength: str = Form(None),
     price: float = Form(...),
     image: UploadFile = File(None),
-    db: Session=Depends(get_db),
-    user=Depends(verify_jwt)
+    db: AsyncSession = Depends(get_db),
+    user: Principal = Depends(require_admin)
 ):
-    #to if it is admin
-    role = user.get("role", "user")
-    if role != "admin":
-        raise HTTPException(status_code=403, detail="Only Admins can delete")
-    
     # To check if the drug is present in the DB
-    existing_drug = db.query(Product).filter(Product.id == drug_id).first()
+    existing_drug = await db.get(Product, drug_id)
     if not existing_drug:
         raise HTTPException(status_code=404, detail={"message": "Drug not found"})
 
     # Check if the new NDC is already taken by ANOTHER drug
     if ndc != existing_drug.ndc:
-        conflict_drug = db.query(Product).filter(Product.ndc == ndc, Product.id != drug_id).first()
+        conflict_drug = await db.scalar(select(Product).where(Product.ndc == ndc, Product.id != drug_id))
         if conflict_drug:
             raise HTTPException(status_code=400, detail=f"The NDC '{ndc}' is already assigned to another drug ({conflict_drug.name})")
 
+    old_image_url = None
     if image:
-        file_ext = image.filename.split(".")[-1]
-        file_name = f"{uuid.uuid4()}.{file_ext}"
-        file_path = os.path.join(UPLOAD_DIR, file_name)
-        
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-        
-        # Optional: Delete old image if it exists
-        if existing_drug.image_url:
-            old_file_name = existing_drug.image_url.split("/")[-1]
-            old_file_path = os.path.join(UPLOAD_DIR, old_file_name)
-            if os.path.exists(old_file_path):
-                os.remove(old_file_path)
-
-        existing_drug.image_url = f"/catalog/static/{file_name}"
+        new_image_url = await store_image(image)
+        if existing_drug.image_url != new_image_url:
+            old_image_url = existing_drug.image_url
+        existing_drug.image_url = new_image_url
 
     #update the drug
     existing_drug.name = name
@@ -145,31 +338,41 @@ async def update_drug(
     existing_drug.form = form
     existing_drug.strength = strength
     existing_drug.price = price
-    existing_drug.updated_by = user.get("sub")
+    existing_drug.updated_by = user.sub
+    # in SQL, so concurrent updates can never end up with the same version
+    existing_drug.version = Product.version + 1
 
     
-    db.commit()
-    db.refresh(existing_drug)
+    await db.commit()
+    await db.refresh(existing_drug)
+    await reindex_drugs(db, [drug_id])
+    await run_in_threadpool(invalidate_drug, drug_id)
+
+    # Identical uploads share one file: only delete it once unreferenced
+    if old_image_url and not await _image_in_use(db, old_image_url):
+        await run_in_threadpool(remove_image, old_image_url)
     return existing_drug
 
 
 #delte drug
 @router.delete("/{drug_id}")
-def delete_drug(
+async def delete_drug(
     drug_id: int,
-    db: Session = Depends(get_db),
-    user=Depends(verify_jwt),
+    db: AsyncSession = Depends(get_db),
+    user: Principal = Depends(require_admin),
 ):
-
-    role =user.get("role", "user")
-    if role  != "admin":
-        raise HTTPException(status_code=403, detail="Admins only can delete drugs")
-    drug= db.query(Product).filter(Product.id== drug_id).first()
+    drug = await db.get(Product, drug_id)
     
     if not drug:
         raise HTTPException(status_code=404, detail="Drug not found")
 
-    db.delete(drug)
-    db.commit()
+    await db.delete(drug)
+    db.add(DeletedProduct(product_id=drug.id, ndc=drug.ndc))
+    await db.commit()
+    await reindex_drugs(db, [drug_id])
+    await run_in_threadpool(invalidate_drug, drug_id)
+
+    if drug.image_url and not await _image_in_use(db, drug.image_url):
+        await run_in_threadpool(remove_image, drug.image_url)
     
     return {"message": "Drug deleted successfully"}
\ No newline at end of file
@@ -0,0 +1,49 @@
+import os
+
+from fastapi import APIRouter, Header, HTTPException, Response
+from fastapi.responses import FileResponse
+
+from app import images
+from app.etags import etag_matches
+
+router = APIRouter()
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Images uploaded before content-addressed names can still be replaced
+# under the same URL, so they are only cached briefly.
+LEGACY_CACHE_CONTROL = "public, max-age=3600"
+
+
+#serve an uploaded image or one of its variants
+@router.api_route("/static/{filename}", methods=["GET", "HEAD"])
+def serve_image(filename: str, if_none_match: str | None = Header(None)):
+    """
+    Content-addressed files are immutable: a year of caching, with the
+    hashed filename as a strong ETag. FileResponse answers Range requests and,
+    on servers that support the ASGI pathsend extension, hands the file
+    to sendfile instead of copying it through Python.
+    """
+    if filename.startswith("."):
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    path = os.path.join(images.UPLOAD_DIR, filename)
+    try:
+        stat_result = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    headers = {"Cache-Control": LEGACY_CACHE_CONTROL}
+    if images.is_content_addressed(filename):
+        headers = {
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+            "ETag": f'"{filename}"',
+        }
+
+    response = FileResponse(path, stat_result=stat_result, headers=headers)
+    etag = response.headers["etag"]
+    if etag_matches(if_none_match, etag):
+        return Response(
+            status_code=304,
+            headers={"ETag": etag, "Cache-Control": headers["Cache-Control"]},
+        )
+    return response
@@ -1,6 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, computed_field, field_validator
 from datetime import datetime
 
+from app.images import variant_urls
+
 
 class DrugBase(BaseModel):
     name: str
@@ -20,6 +22,42 @@ class DrugResponse(DrugBase):
     id: int
     created_by: str
     created_at: datetime
+    updated_at: datetime | None = None
 
     class Config:
         from_attributes = True   # replaces orm_mode=True
+
+    @computed_field
+    @property
+    def image_variants(self) -> dict[str, str] | None:
+        # e.g. {"thumb": ".../<sha256>_thumb.webp", "medium": ...}
+        return variant_urls(self.image_url)
+
+
+class DrugBatchRequest(BaseModel):
+    ids: list[int] = Field(..., min_length=1, max_length=500)
+
+
+class DrugBatchResponse(BaseModel):
+    items: list[DrugResponse]   # in request order, duplicates dropped
+    missing: list[int]
+
+
+class DrugImportRow(BaseModel):
+    """
+    One CSV/NDJSON row of a bulk import (images are uploaded separately).
+    """
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    name: str = Field(..., min_length=1)
+    manufacturer: str = Field(..., min_length=1)
+    ndc: str = Field(..., min_length=1)
+    form: str | None = None
+    strength: str | None = None
+    price: float = Field(..., ge=0)
+
+    @field_validator("form", "strength", mode="before")
+    @classmethod
+    def _blank_is_none(cls, value):
+        # empty CSV cells
+        return value or None
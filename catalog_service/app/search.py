@@ -0,0 +1,442 @@
+import bisect
+import heapq
+import os
+import re
+import threading
+from collections import defaultdict
+from functools import reduce
+from itertools import chain, groupby
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import case, func, literal_column, select, text, true, union
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import engine
+from app.models import Product, SearchWord, SEARCH_DOCUMENT_SQL
+
+# Same cut-off pg_trgm uses by default for its % operator
+SIMILARITY_THRESHOLD = 0.3
+# Vocabulary words one query word may stand for (typos), closest first
+SIMILAR_WORDS_PER_TERM = 5
+# Rows each Postgres candidate branch (exact words, corrected words, NDC
+# prefix) contributes before ranking. A manufacturer or a common word
+# matches tens of thousands of drugs; past the first few hundred their
+# scores tie anyway, so only this many are ranked.
+SEARCH_CANDIDATES = int(os.getenv("SEARCH_CANDIDATES", "200"))
+# Pending in-process index updates beyond which a full rebuild is cheaper
+INDEX_PATCH_MAX = 5000
+
+_WORD = re.compile(r"[a-z0-9]+")
+_SIMPLE = literal_column("'simple'::regconfig")
+
+
+# ---------------------------------------------------------
+# Postgres: full-text (GIN) + typo correction on the vocabulary
+# ---------------------------------------------------------
+def _like_prefix(q: str) -> str:
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
+
+async def _corrected_tsquery(db: AsyncSession, q: str):
+    """
+    tsquery for q with each word widened to its closest vocabulary words:
+    (w1 | w1' | ...) & (w2 | ...). None when every word is in the
+    vocabulary as typed (the exact query already finds those drugs), or
+    when some word has nothing close enough (the AND could never match).
+    """
+    terms = func.unnest(func.tsvector_to_array(func.to_tsvector(_SIMPLE, q))).table_valued("term").render_derived(name="terms")
+    similar = (
+        select(SearchWord.word)
+        .where(
+            SearchWord.word.op("%")(terms.c.term),
+            func.similarity(SearchWord.word, terms.c.term) >= SIMILARITY_THRESHOLD,
+        )
+        .order_by(SearchWord.word.op("<->")(terms.c.term), SearchWord.word)
+        .limit(SIMILAR_WORDS_PER_TERM)
+        .lateral("similar")
+    )
+    alternatives: dict[str, list[str]] = {}
+    for term, word in await db.execute(select(terms.c.term, similar.c.word).outerjoin(similar, true())):
+        words = alternatives.setdefault(term, [])
+        if word is not None:
+            words.append(word)
+
+    if not alternatives or not all(alternatives.values()):
+        return None
+    if all(term in words for term, words in alternatives.items()):
+        return None
+    any_of = [
+        reduce(lambda a, b: a.op("||")(b), (func.plainto_tsquery(_SIMPLE, word) for word in words))
+        for words in alternatives.values()
+    ]
+    return reduce(lambda a, b: a.op("&&")(b), any_of)
+
+
+async def search_postgres(db: AsyncSession, q: str, limit: int) -> list[Product]:
+    """
+    Take up to SEARCH_CANDIDATES drugs from each index-backed branch:
+      - full-text match on name / manufacturer / strength (GIN tsvector)
+      - the same with typos corrected against the word vocabulary
+      - NDC prefix (text_pattern_ops btree)
+    and rank only those by full-text rank (exact words count double),
+    trigram word similarity on name and manufacturer, NDC prefix and
+    exact strength.
+    """
+    document = literal_column(SEARCH_DOCUMENT_SQL)
+    exact = func.websearch_to_tsquery(_SIMPLE, q)
+    corrected = await _corrected_tsquery(db, q)
+    ndc_match = Product.ndc.like(_like_prefix(q), escape="\\")
+
+    branches = [select(Product.id).where(document.op("@@")(exact)).limit(SEARCH_CANDIDATES)]
+    if corrected is not None:
+        branches.append(select(Product.id).where(document.op("@@")(corrected)).limit(SEARCH_CANDIDATES))
+    branches.append(select(Product.id).where(ndc_match).order_by(Product.ndc).limit(SEARCH_CANDIDATES))
+    candidates = union(*branches).subquery("candidates")
+
+    score = (
+        func.ts_rank(document, exact) * 2
+        + (func.ts_rank(document, corrected) if corrected is not None else 0)
+        + func.word_similarity(q, Product.name)
+        + func.word_similarity(q, Product.manufacturer) * 0.5
+        + case((ndc_match, 3), else_=0)
+        + case((func.lower(Product.strength) == q.lower(), 0.5), else_=0)
+    )
+
+    result = await db.scalars(
+        select(Product)
+        .join(candidates, Product.id == candidates.c.id)
+        .order_by(score.desc(), Product.id)
+        .limit(limit)
+    )
+    return list(result)
+
+
+def _add_words_statement(*where):
+    """
+    Add the search words of the drugs matching `where` to the vocabulary.
+    Sorted, so writers adding the same new words in one go cannot
+    deadlock.
+    """
+    words = (
+        select(func.unnest(func.tsvector_to_array(literal_column(SEARCH_DOCUMENT_SQL))).label("word"))
+        .select_from(Product)
+        .where(*where)
+        .distinct()
+        .order_by("word")
+    )
+    return pg_insert(SearchWord).from_select(["word"], words).on_conflict_do_nothing()
+
+
+async def ensure_search_words() -> None:
+    """
+    Fill the vocabulary from the existing drugs on first start (Postgres).
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    async with engine.begin() as conn:
+        if await conn.scalar(select(SearchWord.word).limit(1)) is not None:
+            return
+        await conn.execute(text("SET LOCAL statement_timeout = 0"))
+        await conn.execute(_add_words_statement())
+
+
+async def reindex_drugs(db: AsyncSession, product_ids: list[int]) -> None:
+    """
+    Bring search up to date with drugs that were just created, updated or
+    deleted. Call after the write commits. Postgres only needs their new
+    words in the vocabulary; the in-process index patches them in on the
+    next search instead of being rebuilt.
+    """
+    if not product_ids:
+        return
+    if db.bind.dialect.name == "postgresql":
+        await db.execute(_add_words_statement(Product.id.in_(product_ids)))
+        await db.commit()
+    else:
+        search_index.invalidate(product_ids)
+
+
+# ---------------------------------------------------------
+# SQLite / tests: in-process index with the same ranking idea
+# ---------------------------------------------------------
+def _words(value: str | None) -> list[str]:
+    return _WORD.findall(value.lower()) if value else []
+
+
+def _trigrams(word: str) -> set[str]:
+    # pg_trgm style: two spaces before, one after
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class InProcessSearchIndex:
+    """
+    Built lazily from the products table. Writes mark their drugs dirty
+    and the next search re-reads just those rows and patches them in; only
+    bulk changes (or more than INDEX_PATCH_MAX pending drugs) drop the
+    whole index. Building, patching and searching are CPU work: call them
+    from the threadpool. Products with the same name / manufacturer /
+    strength share a text group (packs of one drug under different NDCs),
+    so scores are accumulated per group over word -> groups postings and
+    only the best groups are expanded to product ids. Fuzzy matching works
+    on the vocabulary (trigram -> words), never on rows.
+    """
+
+    # Columns build() and patch() expect, in order
+    COLUMNS = (Product.id, Product.name, Product.manufacturer, Product.ndc, Product.strength)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._built = False
+        self._generation = 0
+        self._dirty: set[int] = set()
+
+    @property
+    def built(self) -> bool:
+        return self._built
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def invalidate(self, product_ids=None) -> None:
+        """
+        Mark drugs as changed, or drop the whole index when product_ids is
+        None.
+        """
+        with self._lock:
+            self._generation += 1
+            if not self._built:
+                return
+            if product_ids is not None:
+                self._dirty.update(product_ids)
+            if product_ids is None or len(self._dirty) > INDEX_PATCH_MAX:
+                self._built = False
+                self._dirty.clear()
+
+    def take_dirty(self) -> tuple[list[int], int]:
+        """
+        (drugs changed since the last patch, generation). Read their rows
+        and hand both to patch().
+        """
+        with self._lock:
+            ids, self._dirty = sorted(self._dirty), set()
+            return ids, self._generation
+
+    def build(self, rows, generation: int) -> None:
+        """
+        Index `rows` (COLUMNS, ordered by id), read after noting
+        `generation`. If a write invalidated the index meanwhile, the
+        rows are still used but the next search reloads them.
+        """
+        with self._lock:
+            self._reset()
+            for row in rows:
+                self._add(*row, sorted_ndcs=False)
+            self._ndcs.sort()
+            self._dirty.clear()
+            self._built = generation == self._generation
+
+    def patch(self, rows, product_ids: list[int], generation: int) -> None:
+        """
+        Re-index `product_ids` from `rows` (their COLUMNS, read after
+        take_dirty(); ids without a row were deleted). If a write came in
+        meanwhile these rows may predate it, so the drugs stay dirty.
+        """
+        with self._lock:
+            if not self._built:
+                return
+            for pid in product_ids:
+                self._remove(pid)
+            for row in rows:
+                self._add(*row, sorted_ndcs=True)
+            if generation != self._generation:
+                self._dirty.update(product_ids)
+
+    def _reset(self) -> None:
+        self._group_of_text: dict[tuple, int] = {}
+        self._text_of_group: dict[int, tuple] = {}
+        self._group_members: dict[int, list[int]] = {}
+        self._group_of_product: dict[int, int] = {}
+        self._ndc_of_product: dict[int, str] = {}
+        self._name_groups: dict[str, set[int]] = defaultdict(set)
+        self._manufacturer_groups: dict[str, set[int]] = defaultdict(set)
+        self._any_groups: dict[str, set[int]] = defaultdict(set)
+        self._strength_groups: dict[str, set[int]] = defaultdict(set)
+        self._trigram_words: dict[str, set[str]] = defaultdict(set)
+        self._trigram_counts: dict[str, int] = {}
+        self._ndcs: list[tuple[str, int]] = []
+        self._next_group = 0
+
+    def _group_postings(self, text: tuple):
+        """
+        (postings, key) pairs a text group is listed under.
+        """
+        name, manufacturer, strength = text
+        name_words, manufacturer_words = set(_words(name)), set(_words(manufacturer))
+        for word in name_words:
+            yield self._name_groups, word
+        for word in manufacturer_words:
+            yield self._manufacturer_groups, word
+        for word in name_words | manufacturer_words | set(_words(strength)):
+            yield self._any_groups, word
+        if strength:
+            yield self._strength_groups, strength.lower()
+
+    def _add(self, pid: int, name, manufacturer, ndc, strength, sorted_ndcs: bool) -> None:
+        text = (name, manufacturer, strength)
+        gid = self._group_of_text.get(text)
+        if gid is None:
+            gid = self._group_of_text[text] = self._next_group
+            self._next_group += 1
+            self._text_of_group[gid] = text
+            self._group_members[gid] = []
+            for postings, key in self._group_postings(text):
+                if postings is self._any_groups and key not in postings:
+                    for trigram in _trigrams(key):
+                        self._trigram_words[trigram].add(key)
+                    self._trigram_counts[key] = len(_trigrams(key))
+                postings[key].add(gid)
+        # rows arrive by id when building; patched ones may not
+        bisect.insort(self._group_members[gid], pid)
+        self._group_of_product[pid] = gid
+        if ndc:
+            self._ndc_of_product[pid] = ndc
+            if sorted_ndcs:
+                bisect.insort(self._ndcs, (ndc, pid))
+            else:
+                self._ndcs.append((ndc, pid))
+
+    def _remove(self, pid: int) -> None:
+        gid = self._group_of_product.pop(pid, None)
+        if gid is None:
+            return
+        members = self._group_members[gid]
+        del members[bisect.bisect_left(members, pid)]
+        ndc = self._ndc_of_product.pop(pid, None)
+        if ndc is not None:
+            del self._ndcs[bisect.bisect_left(self._ndcs, (ndc, pid))]
+        if members:
+            return
+
+        # last drug of its group: unlist the group, and words left unused
+        del self._group_members[gid]
+        text = self._text_of_group.pop(gid)
+        del self._group_of_text[text]
+        for postings, key in self._group_postings(text):
+            groups = postings[key]
+            groups.discard(gid)
+            if groups:
+                continue
+            del postings[key]
+            if postings is self._any_groups:
+                for trigram in _trigrams(key):
+                    self._trigram_words[trigram].discard(key)
+                del self._trigram_counts[key]
+
+    def _similar_words(self, word: str) -> list[tuple[float, str]]:
+        """
+        Vocabulary words with trigram similarity >= threshold, ascending.
+        """
+        query_trigrams = _trigrams(word)
+        shared: dict[str, int] = defaultdict(int)
+        for trigram in query_trigrams:
+            for candidate in self._trigram_words.get(trigram, ()):
+                shared[candidate] += 1
+
+        similar = []
+        for candidate, count in shared.items():
+            candidate_trigrams = self._trigram_counts[candidate]
+            score = count / (len(query_trigrams) + candidate_trigrams - count)
+            if score >= SIMILARITY_THRESHOLD:
+                similar.append((score, candidate))
+        return sorted(similar)
+
+    @staticmethod
+    def _best_similarity(similar: list[tuple[float, str]], postings: dict) -> dict[int, float]:
+        # ascending similarity: later (better) words overwrite earlier ones
+        best: dict[int, float] = {}
+        for score, word in similar:
+            ids = postings.get(word)
+            if ids:
+                best.update(dict.fromkeys(ids, score))
+        return best
+
+    def _group_scores(self, q: str) -> dict[int, float]:
+        query_words = _words(q)
+        weight = 1 / max(len(query_words), 1)
+        scores: dict[int, float] = defaultdict(float)
+
+        for word in query_words:
+            similar = self._similar_words(word)
+            for postings, field_weight in (
+                (self._name_groups, weight),
+                (self._manufacturer_groups, 0.5 * weight),
+            ):
+                for gid, score in self._best_similarity(similar, postings).items():
+                    scores[gid] += field_weight * score
+            # exact word anywhere (name, manufacturer, strength)
+            for gid in self._any_groups.get(word, ()):
+                scores[gid] += 2 * weight
+
+        for gid in self._strength_groups.get(q.lower(), ()):
+            scores[gid] += 0.5
+        return scores
+
+    def search(self, q: str, limit: int) -> list[int]:
+        """
+        Ranked product ids for `q` (score desc, then id asc). Only after
+        build().
+        """
+        with self._lock:
+            group_scores = self._group_scores(q)
+            candidates: dict[int, float] = {}
+
+            # Walk score bands best-first. Within a band only the `need` groups
+            # with the lowest first id can hold one of the `need` lowest ids.
+            members = self._group_members
+            ranked = sorted(group_scores.items(), key=lambda kv: kv[1], reverse=True)
+            for score, band in groupby(ranked, key=lambda kv: kv[1]):
+                need = limit - len(candidates)
+                if need <= 0:
+                    break
+                leaders = heapq.nsmallest(need, (gid for gid, _ in band), key=lambda g: members[g][0])
+                for pid in heapq.nsmallest(need, chain.from_iterable(members[g][:need] for g in leaders)):
+                    candidates[pid] = score
+
+            # NDC prefix via binary search on the sorted NDC list
+            start = bisect.bisect_left(self._ndcs, (q, -1))
+            for ndc, pid in self._ndcs[start:]:
+                if not ndc.startswith(q):
+                    break
+                candidates[pid] = group_scores.get(self._group_of_product[pid], 0) + 3
+
+        return [
+            pid for pid, _ in heapq.nlargest(limit, candidates.items(), key=lambda kv: (kv[1], -kv[0]))
+        ]
+
+
+search_index = InProcessSearchIndex()
+
+
+async def search_drugs(db: AsyncSession, q: str, limit: int) -> list[Product]:
+    if db.bind.dialect.name == "postgresql":
+        return await search_postgres(db, q, limit)
+
+    if not search_index.built:
+        generation = search_index.generation
+        rows = (await db.execute(select(*search_index.COLUMNS).order_by(Product.id))).all()
+        await run_in_threadpool(search_index.build, rows, generation)
+    else:
+        dirty, generation = search_index.take_dirty()
+        if dirty:
+            rows = (await db.execute(select(*search_index.COLUMNS).where(Product.id.in_(dirty)))).all()
+            await run_in_threadpool(search_index.patch, rows, dirty, generation)
+
+    ids = await run_in_threadpool(search_index.search, q, limit)
+    if not ids:
+        return []
+    by_id = {p.id: p for p in await db.scalars(select(Product).where(Product.id.in_(ids)))}
+    return [by_id[pid] for pid in ids if pid in by_id]
@@ -0,0 +1,60 @@
+# tests/conftest.py
+import os
+import tempfile
+
+import fakeredis
+import pytest
+
+# app.db refuses to import without a database URL; tests run on SQLite.
+os.environ.setdefault(
+    "CATALOG_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'catalog_test.db')}",
+)
+
+
+@pytest.fixture(autouse=True)
+def fake_redis(monkeypatch):
+    """
+    In-memory Redis for cache invalidation broadcasts; the drug cache
+    starts empty in every test.
+    """
+    from app import drug_cache
+
+    r = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(drug_cache, "get_redis", lambda: r)
+    drug_cache.drug_cache.invalidate()
+    yield r
+
+
+@pytest.fixture
+def client():
+    """
+    TestClient logged in as an admin (JWT check overridden).
+    """
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from shared.auth_utils import Principal, verify_jwt
+
+    app.dependency_overrides[verify_jwt] = lambda: Principal("t", {"sub": "admin", "role": "admin"})
+    with TestClient(app) as c:
+        yield c
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def make_drug(client):
+    def make(ndc: str, **fields):
+        data = {
+            "name": "Drug",
+            "manufacturer": "Acme",
+            "ndc": ndc,
+            "form": "tablet",
+            "strength": "10mg",
+            "price": "1.00",
+        }
+        data.update(fields)
+        resp = client.post("/drugs", data=data)
+        assert resp.status_code == 200, resp.text
+        return resp.json()
+
+    return make
@@ -0,0 +1,41 @@
+# tests/test_batch.py
+import uuid
+
+from app.drug_cache import drug_cache
+
+
+def test_batch_keeps_request_order_and_lists_missing(client, make_drug):
+    tag = f"bt{uuid.uuid4().hex[:8]}"
+    a, b, c = (make_drug(f"{tag}-{i}") for i in range(3))
+    client.get(f"/drugs/{b['id']}")  # one of them served from the cache
+
+    resp = client.post("/drugs/batch", json={"ids": [c["id"], 999999, a["id"], b["id"], c["id"]]})
+
+    assert resp.status_code == 200
+    assert resp.json() == {"items": [c, a, b], "missing": [999999]}
+
+
+def test_batch_runs_one_query_for_misses(client, make_drug):
+    from sqlalchemy import event
+
+    from app.db import engine
+
+    tag = f"bt{uuid.uuid4().hex[:8]}"
+    ids = [make_drug(f"{tag}-{i}")["id"] for i in range(5)]
+    drug_cache.invalidate()
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        resp = client.post("/drugs/batch", json={"ids": ids})
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", listener)
+
+    assert [d["id"] for d in resp.json()["items"]] == ids
+    assert len([s for s in statements if "FROM products" in s]) == 1
+
+
+def test_batch_limits(client):
+    assert client.post("/drugs/batch", json={"ids": []}).status_code == 422
+    assert client.post("/drugs/batch", json={"ids": list(range(501))}).status_code == 422
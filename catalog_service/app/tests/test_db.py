@@ -0,0 +1,19 @@
+# tests/test_db.py
+from app import db
+
+
+def test_async_url_swaps_in_asyncio_drivers():
+    assert db.async_url("postgresql://u:p@host/catalog").drivername == "postgresql+asyncpg"
+    assert db.async_url("postgresql+psycopg2://u:p@host/catalog").drivername == "postgresql+asyncpg"
+    assert db.async_url("sqlite:///catalog.db").drivername == "sqlite+aiosqlite"
+
+
+def test_postgres_connections_get_timeout_and_statement_cache(monkeypatch):
+    monkeypatch.setattr(db, "DB_STATEMENT_TIMEOUT_MS", 1500)
+    monkeypatch.setattr(db, "DB_STATEMENT_CACHE_SIZE", 0)
+
+    args = db._connect_args(db.async_url("postgresql://u:p@host/catalog"))
+
+    assert args["server_settings"]["statement_timeout"] == "1500"
+    assert args["prepared_statement_cache_size"] == 0
+    assert db._connect_args(db.async_url("sqlite:///catalog.db")) == {}
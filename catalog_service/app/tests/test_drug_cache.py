@@ -0,0 +1,87 @@
+# tests/test_drug_cache.py
+import time
+import uuid
+
+from app import drug_cache as drug_cache_module
+from app.drug_cache import INVALIDATION_CHANNEL, DrugCache, drug_cache
+
+
+def _ndc():
+    return f"dc-{uuid.uuid4().hex[:8]}"
+
+
+def _next_message(pubsub):
+    # get_message() also returns None for the subscribe confirmation
+    for _ in range(5):
+        message = pubsub.get_message(timeout=1)
+        if message:
+            return message
+    return None
+
+
+def test_hit_returns_cached_bytes(client, make_drug, fake_redis):
+    drug = make_drug(_ndc())
+    first = client.get(f"/drugs/{drug['id']}")
+    assert first.json() == drug
+
+    # Whatever is cached is returned verbatim, without touching the DB
+    drug_cache.invalidate(drug["id"])
+    drug_cache.put(drug["id"], '"etag"', b'{"cached": true}', drug_cache.get(drug["id"])[1])
+    second = client.get(f"/drugs/{drug['id']}")
+
+    assert second.content == b'{"cached": true}'
+    assert second.headers["content-type"] == "application/json"
+
+
+def test_writes_invalidate_and_broadcast(client, make_drug, fake_redis):
+    drug = make_drug(_ndc(), name="Before")
+    client.get(f"/drugs/{drug['id']}")
+
+    listener = fake_redis.pubsub(ignore_subscribe_messages=True)
+    listener.subscribe(INVALIDATION_CHANNEL)
+
+    update = {k: drug[k] for k in ("manufacturer", "ndc", "form", "strength", "price")}
+    assert client.put(f"/drugs/{drug['id']}", data={**update, "name": "After"}).status_code == 200
+    assert client.get(f"/drugs/{drug['id']}").json()["name"] == "After"
+    assert _next_message(listener)["data"] == str(drug["id"])
+
+    assert client.delete(f"/drugs/{drug['id']}").status_code == 200
+    assert client.get(f"/drugs/{drug['id']}").status_code == 404
+
+
+def test_other_replica_invalidation_drops_entry(client, make_drug, fake_redis):
+    drug = make_drug(_ndc())
+    client.get(f"/drugs/{drug['id']}")
+    assert drug_cache.get(drug["id"])[0] is not None
+
+    worker = drug_cache_module.start_invalidation_listener()
+    try:
+        fake_redis.publish(INVALIDATION_CHANNEL, str(drug["id"]))
+        deadline = time.monotonic() + 5
+        while drug_cache.get(drug["id"])[0] is not None and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert drug_cache.get(drug["id"])[0] is None
+    finally:
+        worker.stop()
+
+
+def test_fill_after_invalidation_is_dropped():
+    cache = DrugCache(max_size=10, ttl=60)
+    _, generation = cache.get(1)      # reader misses, goes to the DB
+    cache.invalidate(1)               # a write commits meanwhile
+    cache.put(1, '"1-1"', b"stale", generation)
+    assert cache.get(1)[0] is None
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    cache = DrugCache(max_size=2, ttl=60)
+    for drug_id in (1, 2):
+        cache.put(drug_id, '"e"', b"x", cache.get(drug_id)[1])
+    cache.get(1)                      # 1 is now most recently used
+    cache.put(3, '"e"', b"x", cache.get(3)[1])
+    assert cache.get(2)[0] is None
+    assert cache.get(1)[0] == ('"e"', b"x")
+
+    now = time.monotonic()
+    monkeypatch.setattr(drug_cache_module.time, "monotonic", lambda: now + 61)
+    assert cache.get(1)[0] is None
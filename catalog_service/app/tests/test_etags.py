@@ -0,0 +1,67 @@
+# tests/test_etags.py
+import uuid
+
+from app.drug_cache import drug_cache
+
+
+def _tag():
+    return f"et{uuid.uuid4().hex[:8]}"
+
+
+def _update(client, drug, **changes):
+    data = {k: drug[k] for k in ("name", "manufacturer", "ndc", "form", "strength", "price")}
+    data.update(changes)
+    resp = client.put(f"/drugs/{drug['id']}", data=data)
+    assert resp.status_code == 200, resp.text
+
+
+def test_drug_revalidates_with_304_until_updated(client, make_drug):
+    drug = make_drug(_tag())
+    first = client.get(f"/drugs/{drug['id']}")
+    etag = first.headers["ETag"]
+
+    # Cached and uncached paths both honour If-None-Match
+    for _ in range(2):
+        again = client.get(f"/drugs/{drug['id']}", headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.content == b""
+        assert again.headers["ETag"] == etag
+        drug_cache.invalidate()
+
+    _update(client, drug, price="9.99")
+    changed = client.get(f"/drugs/{drug['id']}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json()["price"] == 9.99
+
+
+def test_if_none_match_list_and_weak_forms(client, make_drug):
+    drug = make_drug(_tag())
+    etag = client.get(f"/drugs/{drug['id']}").headers["ETag"]
+
+    for header in (f'"other", {etag}', f"W/{etag}", "*"):
+        assert client.get(f"/drugs/{drug['id']}", headers={"If-None-Match": header}).status_code == 304
+    assert client.get(f"/drugs/{drug['id']}", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_list_page_etag_follows_updates_and_deletes(client, make_drug):
+    tag = _tag()
+    drugs = [make_drug(f"{tag}-{i}", manufacturer=tag) for i in range(3)]
+    params = {"manufacturer": tag, "limit": 2}
+
+    first = client.get("/drugs", params=params)
+    etag = first.headers["ETag"]
+    unchanged = client.get("/drugs", params=params, headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+
+    _update(client, drugs[0], name="Renamed")
+    updated = client.get("/drugs", params=params, headers={"If-None-Match": etag})
+    assert updated.status_code == 200
+    assert updated.json()[0]["name"] == "Renamed"
+
+    etag = updated.headers["ETag"]
+    client.delete(f"/drugs/{drugs[1]['id']}")
+    after_delete = client.get("/drugs", params=params, headers={"If-None-Match": etag})
+    assert after_delete.status_code == 200
+    assert [d["id"] for d in after_delete.json()] == [drugs[0]["id"], drugs[2]["id"]]
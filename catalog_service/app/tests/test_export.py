@@ -0,0 +1,60 @@
+# tests/test_export.py
+import csv
+import gzip
+import io
+import json
+import uuid
+from datetime import datetime, timezone
+
+from app import export
+
+
+def _ndjson(resp):
+    assert resp.status_code == 200, resp.text
+    return [json.loads(line) for line in resp.text.splitlines()]
+
+
+def test_full_export_streams_every_drug(client, make_drug, monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 2)
+    tag = f"ex{uuid.uuid4().hex[:6]}"
+    made = [make_drug(f"{tag}-{i}") for i in range(5)]
+
+    resp = client.get("/drugs/export")
+    records = _ndjson(resp)
+
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    ids = [r["id"] for r in records]
+    assert ids == sorted(ids)
+    assert made == [r for r in records if r["ndc"].startswith(tag)]
+
+
+def test_delta_export_sends_changes_and_deletions(client, make_drug):
+    tag = f"ex{uuid.uuid4().hex[:6]}"
+    kept, changed, removed = (make_drug(f"{tag}-{i}") for i in range(3))
+    since = datetime.now(timezone.utc).isoformat()
+
+    data = {k: changed[k] for k in ("name", "manufacturer", "ndc", "form", "strength", "price")}
+    client.put(f"/drugs/{changed['id']}", data={**data, "name": "Changed"})
+    client.delete(f"/drugs/{removed['id']}")
+
+    records = _ndjson(client.get("/drugs/export", params={"updated_since": since}))
+
+    assert [(r["id"], r.get("deleted", False)) for r in records] == [
+        (changed["id"], False),
+        (removed["id"], True),
+    ]
+    assert records[0]["name"] == "Changed"
+    assert kept["id"] not in [r["id"] for r in records]
+
+
+def test_csv_export_is_gzipped(client, make_drug):
+    tag = f"ex{uuid.uuid4().hex[:6]}"
+    drug = make_drug(f"{tag}-1", name="Csv, Quoted")
+
+    resp = client.get("/drugs/export", params={"format": "csv"})
+
+    assert resp.headers["content-type"] == "application/gzip"
+    assert "X-Export-As-Of" in resp.headers
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(resp.content).decode())))
+    row = next(r for r in rows if r["ndc"] == drug["ndc"])
+    assert (row["name"], row["deleted"]) == ("Csv, Quoted", "False")
@@ -0,0 +1,72 @@
+# tests/test_images.py
+import io
+import os
+import uuid
+
+import pytest
+from PIL import Image
+
+from app import images
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(images, "UPLOAD_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _png(width=800, height=600, color=(200, 30, 30)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _create(client, content: bytes, filename="photo.png"):
+    return client.post(
+        "/drugs",
+        data={"name": "Drug", "manufacturer": "Acme", "ndc": f"im-{uuid.uuid4().hex[:8]}", "price": "1.00"},
+        files={"image": (filename, content, "image/png")},
+    )
+
+
+def test_upload_is_content_addressed_with_variants(client, upload_dir):
+    content = _png()
+    resp = _create(client, content)
+    assert resp.status_code == 200, resp.text
+
+    filename = resp.json()["image_url"].split("/")[-1]
+    digest = filename.split(".")[0]
+    assert filename.endswith(".png")
+    assert (upload_dir / filename).read_bytes() == content
+
+    with Image.open(upload_dir / f"{digest}_thumb.webp") as thumb:
+        assert thumb.format == "WEBP"
+        assert max(thumb.size) == 256
+    assert (upload_dir / f"{digest}_medium.webp").exists()
+
+
+def test_identical_uploads_share_one_file(client, upload_dir):
+    content = _png(color=(1, 2, 3))
+    first = _create(client, content).json()
+    second = _create(client, content, filename="other-name.jpg").json()
+
+    assert first["image_url"] == second["image_url"]
+    assert len([f for f in os.listdir(upload_dir) if f.endswith(".png")]) == 1
+
+    # Replacing the image on one drug keeps the file the other still uses
+    data = {k: first[k] for k in ("name", "manufacturer", "ndc", "price")}
+    resp = client.put(f"/drugs/{first['id']}", data=data, files={"image": ("new.png", _png(color=(9, 9, 9)), "image/png")})
+    assert resp.status_code == 200
+    assert (upload_dir / second["image_url"].split("/")[-1]).exists()
+
+
+def test_rejects_oversized_and_non_images(client, upload_dir, monkeypatch):
+    monkeypatch.setattr(images, "MAX_IMAGE_BYTES", 1024)
+    assert _create(client, _png()).status_code == 413
+
+    monkeypatch.setattr(images, "MAX_IMAGE_BYTES", 5 * 1024 * 1024)
+    assert _create(client, b"<html>not an image</html>").status_code == 415
+    # A valid signature with a broken body is caught while decoding
+    assert _create(client, b"\x89PNG\r\n\x1a\n" + b"\x00" * 64).status_code == 400
+
+    assert os.listdir(upload_dir) == []
@@ -0,0 +1,94 @@
+# tests/test_import.py
+import json
+import uuid
+
+import pytest
+
+from app import bulk_import
+
+
+def _lines(resp):
+    assert resp.status_code == 200, resp.text
+    return [json.loads(line) for line in resp.text.splitlines()]
+
+
+def _csv(*rows: str) -> bytes:
+    return ("name,manufacturer,ndc,form,strength,price\n" + "\n".join(rows) + "\n").encode()
+
+
+@pytest.fixture
+def tag():
+    return f"imp{uuid.uuid4().hex[:6]}"
+
+
+def test_csv_import_upserts_in_batches_and_reports_row_errors(client, tag, monkeypatch):
+    monkeypatch.setattr(bulk_import, "IMPORT_BATCH_SIZE", 2)
+    body = _csv(
+        f"Alpha,Acme,{tag}-1,tablet,10mg,1.50",
+        f"Beta,Acme,{tag}-2,,,2",
+        f"Broken,Acme,{tag}-3,tablet,10mg,not-a-price",
+        f"Gamma,Acme,{tag}-4,capsule,5mg,3",
+        f',Acme,{tag}-5,tablet,10mg,1',
+    )
+
+    lines = _lines(client.post("/drugs/import", content=body, headers={"Content-Type": "text/csv"}))
+
+    # one progress line per committed batch, then the summary
+    assert len(lines) == 3
+    assert lines[0]["written"] == 2
+    summary = lines[-1]
+    assert summary["done"] is True
+    assert (summary["processed"], summary["written"], summary["failed"]) == (5, 3, 2)
+    errors = [e for line in lines[:-1] for e in line["errors"]]
+    assert [e["line"] for e in errors] == [4, 6]
+    assert errors[0]["errors"][0].startswith("price:")
+
+    beta = client.get("/drugs", params={"manufacturer": "Acme", "limit": 200}).json()
+    beta = next(d for d in beta if d["ndc"] == f"{tag}-2")
+    assert (beta["form"], beta["strength"], beta["price"]) == (None, None, 2.0)
+
+
+def test_reimport_updates_changed_rows_only(client, make_drug, tag):
+    drug = make_drug(f"{tag}-1", name="Old", manufacturer="Acme", price="1.00")
+    make_drug(f"{tag}-2", name="Same", manufacturer="Acme", form="tablet", strength="10mg", price="2.00")
+    etag = client.get(f"/drugs/{drug['id']}").headers["ETag"]
+
+    body = "\n".join(json.dumps(row) for row in [
+        {"name": "New", "manufacturer": "Acme", "ndc": f"{tag}-1", "price": 1},
+        {"name": "Same", "manufacturer": "Acme", "ndc": f"{tag}-2", "form": "tablet", "strength": "10mg", "price": 2},
+        {"name": "Fresh", "manufacturer": "Acme", "ndc": f"{tag}-3", "price": 3},
+    ])
+    summary = _lines(client.post("/drugs/import", content=body, headers={"Content-Type": "application/x-ndjson"}))[-1]
+
+    assert (summary["written"], summary["unchanged"]) == (2, 1)
+    # the cached copy was dropped and the ETag moved on
+    updated = client.get(f"/drugs/{drug['id']}")
+    assert updated.json()["name"] == "New"
+    assert updated.headers["ETag"] != etag
+
+
+def test_duplicates_and_bad_lines_in_ndjson(client, tag):
+    body = "\n".join([
+        json.dumps({"name": "First", "manufacturer": "Acme", "ndc": f"{tag}-1", "price": 1}),
+        "{not json",
+        json.dumps([1, 2]),
+        json.dumps({"name": "Second", "manufacturer": "Acme", "ndc": f"{tag}-1", "price": 1}),
+    ])
+    lines = _lines(client.post("/drugs/import", content=body, headers={"Content-Type": "application/x-ndjson"}))
+
+    summary = lines[-1]
+    assert (summary["written"], summary["superseded"], summary["failed"]) == (1, 1, 2)
+    assert [e["errors"] for e in lines[0]["errors"]] == [["Invalid JSON"], ["Expected a JSON object"]]
+
+
+def test_import_guards(client, monkeypatch):
+    from app.main import app
+    from shared.auth_utils import Principal, verify_jwt
+
+    assert client.post("/drugs/import", content=b"x", headers={"Content-Type": "text/plain"}).status_code == 415
+
+    monkeypatch.setattr(bulk_import, "IMPORT_MAX_BYTES", 10)
+    assert client.post("/drugs/import", content=_csv(), headers={"Content-Type": "text/csv"}).status_code == 413
+
+    app.dependency_overrides[verify_jwt] = lambda: Principal("t", {"sub": "u", "role": "user"})
+    assert client.post("/drugs/import", content=_csv(), headers={"Content-Type": "text/csv"}).status_code == 403
@@ -0,0 +1,104 @@
+# tests/test_list_drugs.py
+import base64
+import json
+import uuid
+
+import pytest
+
+
+@pytest.fixture
+def catalog(make_drug):
+    """
+    25 drugs of one (unique) manufacturer with heavy ties on name/price.
+    """
+    manufacturer = f"Maker-{uuid.uuid4().hex[:8]}"
+    drugs = [
+        make_drug(
+            f"{manufacturer}-{i}",
+            name=f"Drug {i % 3}",
+            manufacturer=manufacturer,
+            form="tablet" if i % 2 else "syrup",
+            price=f"{1 + i % 4}.50",
+        )
+        for i in range(25)
+    ]
+    return manufacturer, drugs
+
+
+def _walk(client, **params):
+    """
+    Follow X-Next-Cursor until the last page, returning pages of drugs.
+    """
+    pages, cursor = [], None
+    while len(pages) < 50:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        resp = client.get("/drugs", params=query)
+        assert resp.status_code == 200, resp.text
+        pages.append(resp.json())
+        cursor = resp.headers.get("x-next-cursor")
+        if not cursor:
+            return pages
+    raise AssertionError("pagination did not terminate")
+
+
+def _key(drug, sort):
+    return (float(drug["price"]) if sort == "price" else drug[sort], drug["id"])
+
+
+@pytest.mark.parametrize("sort", ["id", "name", "price", "created_at"])
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_cursor_round_trip_visits_every_row_once_in_order(client, catalog, sort, order):
+    manufacturer, drugs = catalog
+
+    pages = _walk(client, manufacturer=manufacturer, sort=sort, order=order, limit=4)
+    seen = [drug for page in pages for drug in page]
+
+    assert [len(p) for p in pages] == [4] * 6 + [1]
+    assert sorted(d["id"] for d in seen) == sorted(d["id"] for d in drugs)
+    assert [_key(d, sort) for d in seen] == sorted(
+        (_key(d, sort) for d in seen), reverse=(order == "desc")
+    )
+
+
+def test_filters(client, catalog):
+    manufacturer, drugs = catalog
+
+    seen = [
+        d for page in _walk(
+            client, manufacturer=manufacturer, form="tablet",
+            min_price=2, max_price=3, limit=200,
+        ) for d in page
+    ]
+
+    expected = {
+        d["id"] for d in drugs
+        if d["form"] == "tablet" and 2 <= d["price"] <= 3
+    }
+    assert expected and {d["id"] for d in seen} == expected
+
+
+def test_last_page_has_no_cursor(client, catalog):
+    manufacturer, _ = catalog
+
+    resp = client.get("/drugs", params={"manufacturer": manufacturer, "limit": 25})
+    assert len(resp.json()) == 25
+    assert "x-next-cursor" not in resp.headers
+
+
+def _cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+@pytest.mark.parametrize("sort, cursor", [
+    ("id", "not-base64!"),
+    ("id", _cursor(["id:asc", 1])),
+    ("id", _cursor(["id:asc", "x", "x"])),
+    ("id", _cursor(["id:asc", [1], [1]])),
+    ("price", _cursor(["price:asc", "abc", 1])),
+    ("created_at", _cursor(["created_at:asc", 5, 1])),
+    ("name", _cursor(["name:asc", {"a": 1}, 1])),
+    ("name", _cursor(["price:asc", "1.00", 1])),
+])
+def test_tampered_cursor_is_a_400(client, sort, cursor):
+    resp = client.get("/drugs", params={"sort": sort, "cursor": cursor})
+    assert resp.status_code == 400
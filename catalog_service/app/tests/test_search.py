@@ -0,0 +1,82 @@
+# tests/test_search.py
+import uuid
+
+import pytest
+
+from app.search import InProcessSearchIndex, search_index
+
+
+@pytest.fixture
+def tag():
+    # unique manufacturer word so tests do not see each other's rows
+    return f"lab{uuid.uuid4().hex[:6]}"
+
+
+def _names(resp):
+    assert resp.status_code == 200, resp.text
+    return [d["name"] for d in resp.json()]
+
+
+def test_ranks_name_match_first_and_tolerates_typos(client, make_drug, tag):
+    make_drug(f"{tag}-1", name="Amoxicillin", manufacturer=f"{tag} Pharma", strength="500mg")
+    make_drug(f"{tag}-2", name="Azithromycin", manufacturer=f"{tag} Pharma", strength="250mg")
+
+    assert _names(client.get("/drugs/search", params={"q": "amoxicillin"}))[0] == "Amoxicillin"
+    assert _names(client.get("/drugs/search", params={"q": "amoxicilin"}))[0] == "Amoxicillin"
+
+
+def test_matches_manufacturer_and_ndc_prefix(client, make_drug, tag):
+    drug = make_drug(f"{tag}-77-1", name="Ibuprofen", manufacturer=f"{tag} Labs")
+
+    by_manufacturer = client.get("/drugs/search", params={"q": tag}).json()
+    assert drug["id"] in [d["id"] for d in by_manufacturer]
+
+    by_ndc = client.get("/drugs/search", params={"q": f"{tag}-77"}).json()
+    assert by_ndc[0]["id"] == drug["id"]
+
+
+def test_index_follows_writes(client, make_drug, tag):
+    drug = make_drug(f"{tag}-9", name="Metformin", manufacturer=f"{tag} Inc")
+    assert drug["id"] in [d["id"] for d in client.get("/drugs/search", params={"q": "metformin"}).json()]
+
+    client.delete(f"/drugs/{drug['id']}")
+    assert drug["id"] not in [d["id"] for d in client.get("/drugs/search", params={"q": "metformin"}).json()]
+
+
+def test_writes_patch_the_index_without_rebuilding(client, make_drug, tag, monkeypatch):
+    drug = make_drug(f"{tag}-5", name="Losartan", manufacturer=f"{tag} Inc")
+    client.get("/drugs/search", params={"q": "losartan"})
+
+    def rebuild(*args):
+        raise AssertionError("index rebuilt")
+
+    monkeypatch.setattr(search_index, "build", rebuild)
+    resp = client.put(f"/drugs/{drug['id']}", data={
+        "name": "Warfarin", "manufacturer": f"{tag} Inc", "ndc": f"{tag}-5", "price": "2.00",
+    })
+    assert resp.status_code == 200, resp.text
+
+    assert drug["id"] not in [d["id"] for d in client.get("/drugs/search", params={"q": "losartan"}).json()]
+    assert _names(client.get("/drugs/search", params={"q": "warfarin"}))[0] == "Warfarin"
+
+
+def test_patched_index_matches_a_fresh_build():
+    rows = [
+        (1, "Amoxicillin", "Acme", "111-1", "500mg"),
+        (2, "Amoxicillin", "Acme", "111-2", "500mg"),
+        (3, "Metformin", "Zenith", "222-1", "10mg"),
+    ]
+    changed = [(2, "Atorvastatin", "Acme", "333-1", "20mg"), (4, "Metformin", "Zenith", "222-2", "10mg")]
+    patched, fresh = InProcessSearchIndex(), InProcessSearchIndex()
+    patched.build(rows, patched.generation)
+    patched.invalidate([2, 3, 4])
+    patched.patch(changed, *patched.take_dirty())
+    fresh.build([rows[0], *changed], fresh.generation)
+
+    assert patched.built
+    for q in ("amoxicillin", "atorvastatin", "metformin", "zenith", "acme", "333", "111", "20mg"):
+        assert patched.search(q, 10) == fresh.search(q, 10), q
+
+
+def test_query_too_short(client):
+    assert client.get("/drugs/search", params={"q": "a"}).status_code == 422
@@ -0,0 +1,74 @@
+# tests/test_static.py
+import io
+import uuid
+
+import pytest
+from PIL import Image
+
+from app import images
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(images, "UPLOAD_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def drug(client, upload_dir):
+    buffer = io.BytesIO()
+    Image.new("RGB", (640, 480), (10, 120, 200)).save(buffer, "PNG")
+    resp = client.post(
+        "/drugs",
+        data={"name": "Drug", "manufacturer": "Acme", "ndc": f"st-{uuid.uuid4().hex[:8]}", "price": "1.00"},
+        files={"image": ("photo.png", buffer.getvalue(), "image/png")},
+    )
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def _local(url: str) -> str:
+    # Kong/nginx strip the /catalog prefix
+    return url.removeprefix("/catalog")
+
+
+def test_content_addressed_images_are_immutable(client, drug):
+    resp = client.get(_local(drug["image_url"]))
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "image/png"
+    assert resp.headers["cache-control"] == "public, max-age=31536000, immutable"
+
+    again = client.get(_local(drug["image_url"]), headers={"If-None-Match": resp.headers["etag"]})
+    assert again.status_code == 304
+    assert again.headers["cache-control"] == "public, max-age=31536000, immutable"
+
+
+def test_variants_are_listed_and_served(client, drug):
+    assert set(drug["image_variants"]) == {"thumb", "medium"}
+
+    thumb = client.get(_local(drug["image_variants"]["thumb"]))
+    original = client.get(_local(drug["image_url"]))
+    assert thumb.status_code == 200
+    assert thumb.headers["content-type"] == "image/webp"
+    assert thumb.headers["etag"] != original.headers["etag"]
+
+
+def test_range_requests(client, drug):
+    full = client.get(_local(drug["image_url"])).content
+    part = client.get(_local(drug["image_url"]), headers={"Range": "bytes=0-9"})
+
+    assert part.status_code == 206
+    assert part.content == full[:10]
+    assert part.headers["content-range"] == f"bytes 0-9/{len(full)}"
+
+
+def test_legacy_names_get_short_caching(client, upload_dir):
+    (upload_dir / "3f2b1c9e-legacy.png").write_bytes(b"legacy")
+
+    resp = client.get("/static/3f2b1c9e-legacy.png")
+    assert resp.status_code == 200
+    assert resp.headers["cache-control"] == "public, max-age=3600"
+
+    assert client.get("/static/missing.png").status_code == 404
+    assert client.get("/static/.hidden").status_code == 404
@@ -0,0 +1,72 @@
+"""
+Bulk import benchmark
+=====================
+Builds an N-row CSV (default 200k) and imports it through
+POST /drugs/import twice: once into an empty catalog (all inserts) and
+once more unchanged (all conflict checks, no writes). Prints wall time
+and rows/s for each pass.
+
+Runs against CATALOG_DATABASE_URL (a fresh SQLite file by default). Use
+a scratch DB: rows are upserted by NDC.
+
+    cd catalog_service
+    CATALOG_DATABASE_URL=postgresql://... python benchmarks/bench_import.py [N]
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault(
+    "CATALOG_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_import.db')}",
+)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+from shared.auth_utils import Principal, verify_jwt  # noqa: E402
+
+FORMS = ["tablet", "capsule", "syrup", "injection", "cream"]
+MAKERS = ["Pfizer", "Cipla", "Sun Pharma", "Lupin", "Teva", "Mylan", "Sandoz"]
+
+
+def build_csv(n: int) -> bytes:
+    rng = random.Random(42)
+    lines = ["name,manufacturer,ndc,form,strength,price"]
+    for i in range(n):
+        lines.append(
+            f"Drug {i},{rng.choice(MAKERS)},bench-{i:07d},{rng.choice(FORMS)},"
+            f"{rng.choice([5, 10, 20, 50])}mg,{rng.uniform(1, 500):.2f}"
+        )
+    return ("\n".join(lines) + "\n").encode()
+
+
+def run(client: TestClient, body: bytes, label: str) -> None:
+    start = time.perf_counter()
+    resp = client.post("/drugs/import", content=body, headers={"Content-Type": "text/csv"})
+    elapsed = time.perf_counter() - start
+    summary = json.loads(resp.text.splitlines()[-1])
+    print(f"{label}: {summary['processed']} rows in {elapsed:.1f}s "
+          f"({summary['processed'] / elapsed:,.0f} rows/s)  "
+          f"written {summary['written']}  unchanged {summary['unchanged']}  failed {summary['failed']}")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    body = build_csv(n)
+    print(f"CSV: {n} rows, {len(body) / 1e6:.1f} MB")
+
+    app.dependency_overrides[verify_jwt] = lambda: Principal("t", {"sub": "bench", "role": "admin"})
+    with TestClient(app) as client:
+        run(client, body, "first import ")
+        run(client, body, "re-import    ")
+
+
+if __name__ == "__main__":
+    main()
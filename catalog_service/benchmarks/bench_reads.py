@@ -0,0 +1,157 @@
+"""
+Read throughput benchmark (one replica)
+=======================================
+Starts one catalog replica (a single uvicorn worker) in a subprocess,
+seeds N drugs (default 20k) through POST /drugs/import, then drives
+three read paths over HTTP from several client processes for a fixed
+time each:
+
+    list   GET  /drugs?manufacturer=..&sort=price&limit=50
+    get    GET  /drugs/{id}
+    batch  POST /drugs/batch   (50 ids)
+
+The drug cache is disabled (DRUG_CACHE_SIZE=0) so every request reaches
+the database. Prints requests/s and p50/p99 latency per path; run it on
+two commits to compare them.
+
+Runs against CATALOG_DATABASE_URL (a fresh SQLite file by default). Use
+a scratch DB: rows are upserted by NDC.
+
+    cd catalog_service
+    CATALOG_DATABASE_URL=postgresql://... python benchmarks/bench_reads.py \\
+        [--rows N] [--seconds S] [--clients P] [--concurrency C]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault(
+    "CATALOG_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_reads.db')}",
+)
+
+PORT = 8765
+BASE_URL = f"http://127.0.0.1:{PORT}"
+MAKERS = ["Pfizer", "Cipla", "Sun Pharma", "Lupin", "Teva", "Mylan", "Sandoz"]
+
+
+def serve() -> None:
+    import uvicorn
+
+    from app.main import app
+    from shared.auth_utils import Principal, verify_jwt
+
+    app.dependency_overrides[verify_jwt] = lambda: Principal("t", {"sub": "bench", "role": "admin"})
+    uvicorn.run(app, host="127.0.0.1", port=PORT, log_level="warning", access_log=False)
+
+
+def start_server() -> subprocess.Popen:
+    env = {**os.environ, "DRUG_CACHE_SIZE": "0", "PYTHONPATH": os.pathsep.join(sys.path)}
+    env.setdefault("REDIS_URL", "redis://127.0.0.1:1/0")
+    env.setdefault("REDIS_RETRIES", "0")
+    server = subprocess.Popen([sys.executable, __file__, "--serve"], cwd=ROOT, env=env)
+    for _ in range(300):
+        try:
+            if httpx.get(f"{BASE_URL}/health").status_code == 200:
+                return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("catalog replica did not start")
+
+
+def seed(n: int) -> list[int]:
+    rng = random.Random(42)
+    lines = ["name,manufacturer,ndc,form,strength,price"]
+    for i in range(n):
+        lines.append(f"Drug {i},{rng.choice(MAKERS)},read-{i:07d},tablet,10mg,{rng.uniform(1, 500):.2f}")
+    body = ("\n".join(lines) + "\n").encode()
+    with httpx.Client(base_url=BASE_URL, timeout=None) as client:
+        client.post("/drugs/import", content=body, headers={"Content-Type": "text/csv"}).raise_for_status()
+        ids, cursor = [], None
+        while True:
+            resp = client.get("/drugs", params={"limit": 200, **({"cursor": cursor} if cursor else {})})
+            ids += [drug["id"] for drug in resp.json()]
+            cursor = resp.headers.get("x-next-cursor")
+            if not cursor:
+                return ids
+
+
+def request_for(path: str, ids: list[int], rng: random.Random) -> tuple[str, str, dict]:
+    if path == "list":
+        return "GET", "/drugs", {"params": {"manufacturer": rng.choice(MAKERS), "sort": "price", "limit": 50}}
+    if path == "get":
+        return "GET", f"/drugs/{rng.choice(ids)}", {}
+    return "POST", "/drugs/batch", {"json": {"ids": rng.sample(ids, 50)}}
+
+
+async def drive(path: str, ids: list[int], seconds: float, concurrency: int, seed_: int) -> tuple[list[float], int]:
+    rng = random.Random(seed_)
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=BASE_URL, limits=limits, timeout=30) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                method, url, kwargs = request_for(path, ids, rng)
+                start = time.perf_counter()
+                resp = await client.request(method, url, **kwargs)
+                latencies.append(time.perf_counter() - start)
+                errors += resp.status_code != 200
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors
+
+
+def client_process(args) -> tuple[list[float], int]:
+    return asyncio.run(drive(*args))
+
+
+def main():
+    if "--serve" in sys.argv:
+        return serve()
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=16, help="connections per client process")
+    args = parser.parse_args()
+
+    server = start_server()
+    try:
+        ids = seed(args.rows)
+        print(f"catalog: {len(ids)} drugs, {args.clients} x {args.concurrency} connections, {args.seconds:.0f}s per path")
+        with multiprocessing.Pool(args.clients) as pool:
+            for path in ("list", "get", "batch"):
+                jobs = [(path, ids, args.seconds, args.concurrency, i) for i in range(args.clients)]
+                results = pool.map(client_process, jobs)
+                latencies = sorted(l for result, _ in results for l in result)
+                errors = sum(e for _, e in results)
+                p99 = latencies[int(len(latencies) * 0.99)]
+                print(f"{path:6} {len(latencies) / args.seconds:8,.0f} req/s  "
+                      f"p50 {statistics.median(latencies) * 1000:6.1f} ms  p99 {p99 * 1000:6.1f} ms  "
+                      f"errors {errors}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
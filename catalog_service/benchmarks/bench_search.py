@@ -0,0 +1,132 @@
+"""
+Drug search benchmark
+=====================
+Seeds a synthetic catalog (default 500k rows) and reports search latency
+percentiles for a mix of name, typo, manufacturer, NDC-prefix and strength
+queries. Target: p95 < 20 ms on Postgres.
+
+Runs against CATALOG_DATABASE_URL: Postgres exercises the full-text index
+and the trigram-indexed word vocabulary, SQLite the in-process index that
+backs dev and tests (reported, not held to the target). Use a scratch DB:
+rows are added until the table holds N products. With WRITE_EVERY, every
+that many queries one drug is renamed and reindexed first, as the write
+endpoints do.
+
+    cd catalog_service
+    CATALOG_DATABASE_URL=postgresql://... python benchmarks/bench_search.py [N] [QUERIES] [WRITE_EVERY]
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault(
+    "CATALOG_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_catalog.db')}",
+)
+
+from sqlalchemy import func, insert, select, update  # noqa: E402
+
+from app.db import SessionLocal, create_tables, engine, ensure_extensions  # noqa: E402
+from app.models import Product  # noqa: E402
+from app.search import ensure_search_words, reindex_drugs, search_drugs  # noqa: E402
+
+STEMS = [
+    "amoxi", "azithro", "cipro", "metfor", "atorva", "simva", "losar", "lisino",
+    "omepra", "panto", "ibupro", "parace", "cetiri", "levo", "predni", "warfa",
+    "clopido", "montelu", "sertra", "fluoxe", "gabapen", "tramad", "insul", "hydro",
+]
+SUFFIXES = ["cillin", "mycin", "floxacin", "min", "statin", "tan", "pril", "zole", "fen", "mol", "zine", "done"]
+MAKERS = [
+    "Pfizer", "Cipla", "Sun Pharma", "Lupin", "Teva", "Mylan", "Sandoz",
+    "Novartis", "Aurobindo", "Zydus", "Glenmark", "Dr Reddys", "Abbott", "Bayer",
+]
+FORMS = ["tablet", "capsule", "syrup", "injection", "cream"]
+STRENGTHS = ["5mg", "10mg", "20mg", "50mg", "100mg", "250mg", "500mg", "1g"]
+
+
+async def seed(target: int) -> None:
+    await ensure_extensions()
+    await create_tables()
+    async with SessionLocal() as db:
+        have = await db.scalar(select(func.count(Product.id)))
+    rng = random.Random(42)
+    batch = []
+    for i in range(have, target):
+        batch.append({
+            "name": drug_name(rng),
+            "manufacturer": rng.choice(MAKERS),
+            "ndc": f"{i // 10000:05d}-{i % 10000:04d}-{rng.randint(0, 99):02d}",
+            "form": rng.choice(FORMS),
+            "strength": rng.choice(STRENGTHS),
+            "price": round(rng.uniform(1, 500), 2),
+            "created_by": "bench",
+        })
+        if len(batch) == 10000 or i == target - 1:
+            async with engine.begin() as conn:
+                await conn.execute(insert(Product), batch)
+            batch = []
+    if engine.dialect.name == "postgresql":
+        async with engine.begin() as conn:
+            await conn.exec_driver_sql("ANALYZE products")
+    await ensure_search_words()
+
+
+def drug_name(rng: random.Random) -> str:
+    return f"{rng.choice(STEMS)}{rng.choice(SUFFIXES)} {rng.choice(FORMS)}"
+
+
+def queries(count: int) -> list[str]:
+    rng = random.Random(7)
+    makers = [
+        lambda: rng.choice(STEMS) + rng.choice(SUFFIXES),                    # name
+        lambda: (lambda w: w[:3] + w[4:])(rng.choice(STEMS) + rng.choice(SUFFIXES)),  # typo
+        lambda: rng.choice(MAKERS),                                          # manufacturer
+        lambda: f"{rng.randint(0, 49):05d}-{rng.randint(0, 9999):04d}",      # NDC prefix
+        lambda: f"{rng.choice(STEMS)}{rng.choice(SUFFIXES)} {rng.choice(STRENGTHS)}",
+    ]
+    return [makers[i % len(makers)]() for i in range(count)]
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    write_every = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+
+    start = time.perf_counter()
+    await seed(n)
+    print(f"catalog: {n} rows on {engine.dialect.name} (seeded in {time.perf_counter() - start:.1f}s)")
+
+    async with SessionLocal() as db:
+        if engine.dialect.name != "postgresql":
+            start = time.perf_counter()
+            await search_drugs(db, "warmup", 1)
+            print(f"in-process index built in {time.perf_counter() - start:.1f}s")
+
+        rng = random.Random(11)
+        timings = []
+        for i, q in enumerate(queries(count)):
+            if write_every and i % write_every == 0:
+                drug_id = rng.randint(1, n)
+                await db.execute(update(Product).where(Product.id == drug_id).values(name=drug_name(rng)))
+                await db.commit()
+                await reindex_drugs(db, [drug_id])
+            start = time.perf_counter()
+            await search_drugs(db, q, 20)
+            timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    p = lambda pct: timings[min(len(timings) - 1, int(len(timings) * pct))]  # noqa: E731
+    writes = f"  (1 write / {write_every})" if write_every else ""
+    print(f"queries: {count}{writes}  mean {statistics.mean(timings):.2f} ms  "
+          f"p50 {p(0.50):.2f} ms  p95 {p(0.95):.2f} ms  p99 {p(0.99):.2f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
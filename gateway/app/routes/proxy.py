@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Request, HTTPException
 from fastapi.responses import Response
 import httpx
-from shared.auth_utils import verify_jwt
+from shared.auth_utils import verify_jwt_async
 
 router = APIRouter()
 
@@ -34,7 +34,7 @@ async def _proxy_request(service: str, path: str | None, request: Request):
     service_conf = SERVICE_CONFIG[service]
     
     # -------- LOGIN + REGISTER ARE PUBLIC --------
-    public_auth_paths = {"token", "login", "register", "docs", "openapi.json"} 
+    public_auth_paths = {"token", "login", "register", "refresh", "docs", "openapi.json"} 
     # Added docs/openapi for convenience if needed, strictly keeping to request is fine too.
     # Original logic only checked first segment.
     
@@ -54,11 +54,11 @@ async def _proxy_request(service: str, path: str | None, request: Request):
         if not auth_header:
             raise HTTPException(401, "Missing Authorization header")
 
-        payload = verify_jwt(auth_header)
+        principal = await verify_jwt_async(auth_header)
         injected_headers = {
-            "x-user-id": str(payload.get("sub")),
-            "x-username": payload.get("username", str(payload.get("sub"))),
-            "x-role": payload.get("role", "user"),
+            "x-user-id": str(principal.sub),
+            "x-username": principal.claims.get("username", str(principal.sub)),
+            "x-role": principal.role,
         }
 
     # ====================================================
@@ -91,6 +91,12 @@ async def _proxy_request(service: str, path: str | None, request: Request):
     
     clean_headers.update(injected_headers)
 
+    # Append the caller, like any proxy: services trust only the entries
+    # their known proxies added (auth rate-limits logins by it)
+    if request.client:
+        forwarded = clean_headers.pop("x-forwarded-for", None)
+        clean_headers["x-forwarded-for"] = f"{forwarded}, {request.client.host}" if forwarded else request.client.host
+
     # Stream the body
     body = await request.body()
 
@@ -69,12 +69,35 @@ catalog_breaker = CircuitBreaker(failure_threshold=5, recovery_timeout=30)
 # ---------------------------
 # Cache helpers
 # ---------------------------
+PRODUCT_CACHE_TTL = 300
+
+
 def _cache_key(product_id: int) -> str:
     return f"catalog:product:{product_id}"
 
 
-async def cache_product(product_id: int, data: dict):
-    await redis_client.set(_cache_key(product_id), json.dumps(data), ex=300)
+def _etag_key(product_id: int) -> str:
+    return f"catalog:product:{product_id}:etag"
+
+
+async def cache_product(product_id: int, data: dict, etag: str | None = None):
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.set(_cache_key(product_id), json.dumps(data), ex=PRODUCT_CACHE_TTL)
+    if etag:
+        pipe.set(_etag_key(product_id), etag, ex=PRODUCT_CACHE_TTL)
+    else:
+        pipe.delete(_etag_key(product_id))
+    await pipe.execute()
+
+
+async def touch_cached_product(product_id: int):
+    """
+    Catalog confirmed the copy is current (304): keep it for another TTL.
+    """
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.expire(_cache_key(product_id), PRODUCT_CACHE_TTL)
+    pipe.expire(_etag_key(product_id), PRODUCT_CACHE_TTL)
+    await pipe.execute()
 
 
 async def get_cached_product(product_id: int):
@@ -84,13 +107,36 @@ async def get_cached_product(product_id: int):
     return None
 
 
+async def get_cached_product_with_etag(product_id: int) -> tuple[dict | None, str | None]:
+    """
+    (cached product, its catalog ETag) in one round trip. A Redis error
+    counts as a miss: the catalog is simply asked unconditionally.
+    """
+    try:
+        raw, etag = await redis_client.mget(_cache_key(product_id), _etag_key(product_id))
+    except redis.RedisError as e:
+        logger.warning(f"Product cache read failed: {e}")
+        return None, None
+    if not raw:
+        return None, None
+    return json.loads(raw), etag
+
+
 # ---------------------------
 # MAIN catalog validator
 # ---------------------------
-async def _fetch_from_catalog(product_id: int, token: str, override_url: str = None) -> dict:
+# _fetch_from_catalog() result when the cached copy is still current
+NOT_MODIFIED = object()
+
+
+async def _fetch_from_catalog(
+    product_id: int, token: str, override_url: str = None, etag: str = None
+) -> tuple[dict | object | None, str | None]:
     """
     Internal function to make the HTTP request.
     This is wrapped by the circuit breaker.
+    Returns (product, etag); product is None on 404 and NOT_MODIFIED when
+    `etag` is still current (304, no body transferred).
     """
     base_url = override_url if override_url else CATALOG_URL
     url = f"{base_url}/drugs/{product_id}"
@@ -98,6 +144,8 @@ async def _fetch_from_catalog(product_id: int, token: str, override_url: str = N
     headers = {}
     if token:
         headers["Authorization"] = f"Bearer {token}"
+    if etag:
+        headers["If-None-Match"] = etag
     
     async with httpx.AsyncClient() as client:
         # If connection fails or 5xx, httpx raises generic errors or we can raise custom ones.
@@ -105,25 +153,35 @@ async def _fetch_from_catalog(product_id: int, token: str, override_url: str = N
         resp = await client.get(url, headers=headers, timeout=2)
         
         if resp.status_code == 404:
-            return None
+            return None, None
+        if resp.status_code == 304:
+            return NOT_MODIFIED, etag
             
         resp.raise_for_status()  # This will raise HTTPStatusError for 4xx/5xx
-        return resp.json()
+        return resp.json(), resp.headers.get("ETag")
 
 
 async def get_product(product_id: int, token: str = None, simulate_failure_url: str = None) -> dict | None:
     """
     Fetch product from Catalog service with fallback to Redis cache.
-    Uses Circuit Breaker for the HTTP call.
+    Uses Circuit Breaker for the HTTP call. A cached copy is revalidated
+    with If-None-Match, so an unchanged product costs a bodiless 304.
     """
+    cached, etag = await get_cached_product_with_etag(product_id)
     try:
         # Wrap the HTTP call with Circuit Breaker
         # Note: If simulate_failure_url is passed, we use that to force a connection error
-        data = await catalog_breaker.call(_fetch_from_catalog, product_id, token, simulate_failure_url)
-        
+        data, etag = await catalog_breaker.call(
+            _fetch_from_catalog, product_id, token, simulate_failure_url, etag
+        )
+
+        if data is NOT_MODIFIED:
+            await touch_cached_product(product_id)
+            return cached
+
         # If success, verify and cache
         if data:
-            await cache_product(product_id, data)
+            await cache_product(product_id, data, etag)
             return data
             
     except CircuitBreakerOpen:
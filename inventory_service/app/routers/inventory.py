@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 from app.db import SessionLocal
 from app.models import Inventory
 from app.schemas import ReserveRequest, InventoryItem
-from shared.auth_utils import verify_jwt  # ⬅️ JWT from shared
+from shared.auth_utils import Principal, require_role, verify_jwt  # ⬅️ JWT from shared
 from app.catalog_client import get_product, CircuitBreakerOpen  # ⬅️ Import client
 
 router = APIRouter(prefix="/inventory")
@@ -18,17 +18,12 @@ def get_db():
         db.close() 
 
 
-def require_admin(user=Depends(verify_jwt)):
-    """
-    Allow only users with role == 'admin'.
-    """
-    if user.get("role") != "admin":
-        raise HTTPException(status_code=403, detail="Admins only")
-    return user
+# Allow only users with role == 'admin'
+require_admin = require_role("admin")
 
 
 @router.get("/test-circuit-breaker")
-async def test_circuit_breaker(user=Depends(verify_jwt)):
+async def test_circuit_breaker(user: Principal = Depends(verify_jwt)):
     """
     Test endpoint to demonstrate Circuit Breaker.
     It forces a connection to a non-existent service to simulate failure.
@@ -37,7 +32,7 @@ async def test_circuit_breaker(user=Depends(verify_jwt)):
     1. First 5 calls: Fail with Connection Timeout/Error -> Returns 503 Service Unavailable
     2. 6th call onwards: Fail immediately -> Returns 503 Circuit breaker open
     """
-    token = user.get("token")
+    token = user.token
     try:
         # 1. Force failure by using a bad URL
         await get_product(999, token=token, simulate_failure_url="http://localhost:11111")
@@ -54,7 +49,7 @@ async def test_circuit_breaker(user=Depends(verify_jwt)):
 def check_inventory(
     product_id: int,
     db: Session = Depends(get_db),
-    user=Depends(verify_jwt),  # ⬅️ any valid user
+    user: Principal = Depends(verify_jwt),  # ⬅️ any valid user
 ):
     item = db.query(Inventory).filter_by(product_id=product_id).first()
     if not item:
@@ -66,7 +61,7 @@ def check_inventory(
 def reserve_inventory(
     request: ReserveRequest,
     db: Session = Depends(get_db),
-    user=Depends(verify_jwt),  # user placing an order
+    user: Principal = Depends(verify_jwt),  # user placing an order
 ):
     for item in request.items:
         row = db.query(Inventory).filter_by(product_id=item.product_id).first()
@@ -87,10 +82,10 @@ def reserve_inventory(
 async def set_stock(
     item: InventoryItem,
     db: Session = Depends(get_db),
-    admin=Depends(require_admin),  # ⬅️ admin-only
+    admin: Principal = Depends(require_admin),  # ⬅️ admin-only
 ):
     # 1. Validate against Catalog (or Cache)
-    token = admin.get("token")
+    token = admin.token
     try:
         product_data = await get_product(item.product_id, token=token)
         if not product_data:
@@ -1,6 +1,10 @@
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from app.db import Base, engine
 from app.routers.orders import router as orders_router
+from app.routers.stats import router as stats_router
+from app.redis_client import get_redis
+import logging
 import socket
 from app.observability.metrics import metrics_middleware, metrics_endpoint
 from app.observability.logging import setup_logging
@@ -9,13 +13,24 @@ setup_logging()
 
 app = FastAPI(title="Orders Service")
 app.middleware("http")(metrics_middleware("orders_service"))
+logger = logging.getLogger("uvicorn")
 
 
 @app.on_event("startup")
-def startup():
+async def startup():
     print("📌 ORDERS SERVICE — Creating tables...")
     Base.metadata.create_all(bind=engine)
     print("✅ ORDERS SERVICE — Tables ready!")
+    try:
+        await run_in_threadpool(get_redis().ping)
+        logger.info("Redis OK")
+    except Exception as exc:
+        logger.warning("Redis not available at startup: %s", exc)
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    get_redis().connection_pool.disconnect()
 
 
 @app.get("/health")
@@ -37,3 +52,4 @@ def metrics():
 
 
 app.include_router(orders_router, prefix="/orders")
+app.include_router(stats_router, prefix="/orders/stats")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, JSON
+from sqlalchemy import Column, Integer, SmallInteger, String, JSON, Date
 from app.db import Base
 
 class OrderModel(Base):
@@ -8,3 +8,36 @@ class OrderModel(Base):
     username = Column(String, index=True)  # who placed the order
     status = Column(String, default="CONFIRMED")
     items = Column(JSON)  # store list of items as JSON
+
+
+# ---------------------------------------------------------
+# Rollup tables for analytics.
+# Incremented in the same transaction that writes the orders
+# (see app/services/order_stats.py), so reads never scan `items`.
+# Every key is split over STATS_SHARDS rows (`shard`) so concurrent
+# writers do not queue on one row lock; reads sum the shards.
+# ---------------------------------------------------------
+class OrderStatusStat(Base):
+    __tablename__ = "order_stats_by_status"
+
+    status = Column(String, primary_key=True)
+    shard = Column(SmallInteger, primary_key=True, default=0)
+    order_count = Column(Integer, nullable=False, default=0)
+
+
+class ProductUnitStat(Base):
+    __tablename__ = "order_stats_by_product"
+
+    product_id = Column(Integer, primary_key=True)
+    shard = Column(SmallInteger, primary_key=True, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    order_count = Column(Integer, nullable=False, default=0)
+
+
+class UserDailyStat(Base):
+    __tablename__ = "order_stats_by_user_day"
+
+    username = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True, index=True)
+    shard = Column(SmallInteger, primary_key=True, default=0)
+    order_count = Column(Integer, nullable=False, default=0)
@@ -14,6 +14,13 @@ REQUEST_LATENCY = Histogram(
     ["service", "method", "path"]
 )
 
+# Per-user order history cache (hit rate = hit / (hit + miss))
+ORDER_HISTORY_CACHE = Counter(
+    "orders_history_cache_requests_total",
+    "Per-user order history cache lookups",
+    ["result"]
+)
+
 def metrics_middleware(service_name: str):
     async def middleware(request: Request, call_next):
         start_time = time.time()
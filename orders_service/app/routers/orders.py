@@ -1,27 +1,118 @@
+from collections import defaultdict
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from shared.auth_utils import verify_jwt
+from shared.auth_utils import Principal, verify_jwt
 from app.db import get_db
 from app.models import OrderModel
-from app.schemas import Order, OrderCreate
-from app.services.inventory_client import safe_reserve
+from app.schemas import Order, OrderCreate, BulkOrderCreate, BulkOrderResponse
+from app.services.inventory_client import safe_reserve, record_pending_reconcile
+from app.services.order_stats import record_orders
+from app.services.order_cache import get_cached_history, cache_history, invalidate_history
 import requests
 
 router = APIRouter()
 
+orders_adapter = TypeAdapter(list[Order])
+
+# Bulk intake limits
+BULK_RESERVE_BATCH = 100   # orders merged into one inventory reserve call
+
+# inventory reserve status -> order status
+RESERVE_STATUS_TO_ORDER_STATUS = {
+    "reserved": "CONFIRMED",
+    # Inventory is down, but cached info says it's fine.
+    # Mark order differently so ops can review or reconcile later.
+    "reserved_from_cache": "PENDING_RESERVE",
+}
+
+
+def _merge_demand(orders_items: list[list[dict]]) -> list[dict]:
+    """
+    Sum the requested quantity per product across several orders,
+    so a whole batch can be reserved with a single inventory call.
+    """
+    demand: dict[int, int] = defaultdict(int)
+    for items in orders_items:
+        for item in items:
+            demand[item["product_id"]] += item["quantity"]
+    return [{"product_id": pid, "quantity": qty} for pid, qty in demand.items()]
+
+
+def _validate_items(items: list[dict]) -> str | None:
+    if not items:
+        return "Order has no items"
+    for item in items:
+        if item["quantity"] <= 0:
+            return f"Quantity must be positive for product {item['product_id']}"
+    return None
+
+
+# Reasons a reservation can fail
+SHORT_STOCK = "Not enough inventory"
+INVENTORY_UNAVAILABLE = "Inventory service unavailable"
+
+
+def _reserve(items: list[dict], token: str | None) -> tuple[str | None, str | None]:
+    """
+    Reserve items for bulk intake.
+    Returns (order_status, None) on success or (None, error) on failure.
+    error == SHORT_STOCK means inventory (live or cached) answered but
+    does not hold enough units; anything else will not get better by
+    retrying a smaller batch.
+    """
+    try:
+        reserve_result = safe_reserve(items, token)
+    except requests.HTTPError as exc:
+        code = exc.response.status_code if exc.response is not None else None
+        if code == 400:
+            return None, SHORT_STOCK
+        if code is not None and code < 500:
+            return None, f"Inventory rejected the request ({code})"
+        return None, INVENTORY_UNAVAILABLE
+    except requests.RequestException:
+        return None, INVENTORY_UNAVAILABLE
+
+    status = RESERVE_STATUS_TO_ORDER_STATUS.get(reserve_result.get("status"))
+    if status is not None:
+        return status, None
+
+    # Breaker open and the Redis fallback said no
+    if reserve_result.get("reason") == "inventory_down_no_cache":
+        return None, SHORT_STOCK
+    return None, INVENTORY_UNAVAILABLE
+
+
+def _reserve_orders(batch: list[list[dict]], token: str | None) -> list[tuple[str | None, str | None]]:
+    """
+    Reserve a batch of orders with ONE call for their merged demand.
+    If the batch is short on stock, bisect it so only the orders that
+    really do not fit are rejected: O(k log n) calls for k short orders
+    instead of one call per order.
+    """
+    status, error = _reserve(_merge_demand(batch), token)
+
+    if error != SHORT_STOCK or len(batch) == 1:
+        return [(status, error)] * len(batch)
+
+    middle = len(batch) // 2
+    return _reserve_orders(batch[:middle], token) + _reserve_orders(batch[middle:], token)
+
 
 @router.post("", response_model=Order)
 @router.post("/", response_model=Order)
 def create_order(
     payload: OrderCreate,
-    user=Depends(verify_jwt),
+    user: Principal = Depends(verify_jwt),
     db: Session = Depends(get_db)
 ):
     # 1) Prepare items
     order_items = [item.model_dump() for item in payload.items]
 
-    # 2) Extract raw token (we put this into payload["token"] in shared/auth_utils)
-    token = user.get("token")
+    # 2) Raw token to forward (the Principal from shared/auth_utils carries it)
+    token = user.token
 
     # 3) Reserve inventory with circuit breaker + Redis fallback
     try:
@@ -33,17 +124,9 @@ def create_order(
             detail="Inventory service unavailable, please try again later."
         )
 
-    status = "CONFIRMED"
-
-    if reserve_result.get("status") == "reserved":
-        status = "CONFIRMED"
+    status = RESERVE_STATUS_TO_ORDER_STATUS.get(reserve_result.get("status"))
 
-    elif reserve_result.get("status") == "reserved_from_cache":
-        # Inventory is down, but cached info says it's fine.
-        # Mark order differently so ops can review or reconcile later.
-        status = "PENDING_RESERVE"
-
-    else:
+    if status is None:
         # Any other status means failure or unsafe fallback.
         raise HTTPException(
             status_code=400,
@@ -51,7 +134,7 @@ def create_order(
         )
 
     # 4) Create order in DB
-    username = user["sub"]
+    username = user.sub
 
     order = OrderModel(
         username=username,
@@ -60,32 +143,120 @@ def create_order(
     )
 
     db.add(order)
+    db.flush()  # assigns order.id, which picks the stats shard
+    record_orders(db, [{"username": username, "status": status, "items": order_items}], order.id)
     db.commit()
     db.refresh(order)
+    invalidate_history(username)
+
+    if status == "PENDING_RESERVE":
+        record_pending_reconcile([(order.id, order_items)])
 
     return order
 
 
+@router.post("/bulk", response_model=BulkOrderResponse)
+def create_orders_bulk(
+    payload: BulkOrderCreate,
+    user: Principal = Depends(verify_jwt),
+    db: Session = Depends(get_db)
+):
+    """
+    Submit many orders at once (B2B intake).
+
+    - JWT is verified once for the whole request.
+    - Demand of up to BULK_RESERVE_BATCH orders is merged into ONE
+      inventory reserve call. If that batch is short on stock (live or
+      cached inventory), it is bisected so only the short orders fail.
+    - All accepted orders are written with a single multi-row INSERT
+      and one commit.
+    - Returns a result per order, in request order.
+    - More than BULK_MAX_ORDERS orders is a 422 from validation.
+    """
+    token = user.token
+    username = user.sub
+
+    results: list[dict | None] = [None] * len(payload.orders)
+
+    # 1) Validate every order up front
+    valid: list[tuple[int, list[dict]]] = []
+    for index, order in enumerate(payload.orders):
+        order_items = [item.model_dump() for item in order.items]
+        error = _validate_items(order_items)
+        if error:
+            results[index] = {"index": index, "status": "REJECTED", "error": error}
+        else:
+            valid.append((index, order_items))
+
+    # 2) Reserve inventory per batch of orders
+    accepted: list[tuple[int, dict]] = []
+    for start in range(0, len(valid), BULK_RESERVE_BATCH):
+        batch = valid[start:start + BULK_RESERVE_BATCH]
+        outcomes = _reserve_orders([order_items for _, order_items in batch], token)
+
+        for (index, order_items), (status, error) in zip(batch, outcomes):
+            if status is None:
+                results[index] = {"index": index, "status": "REJECTED", "error": error}
+            else:
+                accepted.append((index, {
+                    "username": username,
+                    "items": order_items,
+                    "status": status,
+                }))
+
+    # 3) Single multi-row insert + single commit
+    if accepted:
+        order_ids = db.scalars(
+            insert(OrderModel).returning(OrderModel.id, sort_by_parameter_order=True),
+            [row for _, row in accepted],
+        ).all()
+        record_orders(db, [row for _, row in accepted], order_ids[0])
+        db.commit()
+        invalidate_history(username)
+
+        record_pending_reconcile([
+            (order_id, row["items"])
+            for (_, row), order_id in zip(accepted, order_ids)
+            if row["status"] == "PENDING_RESERVE"
+        ])
+
+        for (index, row), order_id in zip(accepted, order_ids):
+            results[index] = {"index": index, "status": row["status"], "order_id": order_id}
+
+    return {
+        "created": len(accepted),
+        "failed": len(payload.orders) - len(accepted),
+        "results": results,
+    }
+
+
 @router.get("", response_model=list[Order])
 @router.get("/", response_model=list[Order])
 def list_orders(
-    user=Depends(verify_jwt),
+    user: Principal = Depends(verify_jwt),
     db: Session = Depends(get_db)
 ):
-    username = user["sub"]
+    username = user.sub
+
+    if user.is_admin:
+        return db.query(OrderModel).all()
+
+    # Regular users poll this a lot -> serve their list straight from Redis
+    cached, generation = get_cached_history(username)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
 
-    if user["role"] in ["admin", "superadmin"]:
-        result = db.query(OrderModel).all()
-    else:
-        result = db.query(OrderModel).filter(OrderModel.username == username).all()
+    result = db.query(OrderModel).filter(OrderModel.username == username).all()
+    payload = orders_adapter.dump_json(orders_adapter.validate_python(result, from_attributes=True))
+    cache_history(username, payload, generation)
 
-    return result
+    return Response(content=payload, media_type="application/json")
 
 
 @router.get("/check-inventory/{product_id}")
 def check_inventory_proxy(
     product_id: int,
-    user=Depends(verify_jwt)
+    user: Principal = Depends(verify_jwt)
 ):
     """
     Helper endpoint to populate Redis cache for a product.
@@ -95,7 +266,7 @@ def check_inventory_proxy(
     from fastapi import HTTPException
     from app.services.inventory_client import call_inventory_get, get_cached_inventory
     
-    token = user.get("token")
+    token = user.token
     
     try:
         # 1. Try to get fresh data (this also updates cache)
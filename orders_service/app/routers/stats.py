@@ -0,0 +1,74 @@
+from datetime import date
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from shared.auth_utils import ADMIN_ROLES, Principal, require_role
+from app.db import get_db
+from app.models import OrderStatusStat, ProductUnitStat, UserDailyStat
+from app.schemas import StatusStat, ProductStat, UserDailyStatOut
+
+router = APIRouter()
+
+
+# Analytics are for ops: admin / superadmin only
+require_admin = require_role(*ADMIN_ROLES)
+
+
+@router.get("/status", response_model=list[StatusStat])
+def orders_per_status(
+    admin: Principal = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    return (
+        db.query(OrderStatusStat.status, func.sum(OrderStatusStat.order_count).label("order_count"))
+        .group_by(OrderStatusStat.status)
+        .order_by(OrderStatusStat.status)
+        .all()
+    )
+
+
+@router.get("/products", response_model=list[ProductStat])
+def units_per_product(
+    limit: int = Query(100, ge=1, le=1000),
+    admin: Principal = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Top products by units ordered.
+    """
+    units = func.sum(ProductUnitStat.units).label("units")
+    return (
+        db.query(ProductUnitStat.product_id, units, func.sum(ProductUnitStat.order_count).label("order_count"))
+        .group_by(ProductUnitStat.product_id)
+        .order_by(units.desc(), ProductUnitStat.product_id)
+        .limit(limit)
+        .all()
+    )
+
+
+@router.get("/users-daily", response_model=list[UserDailyStatOut])
+def orders_per_user_per_day(
+    username: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    limit: int = Query(500, ge=1, le=5000),
+    admin: Principal = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    query = db.query(
+        UserDailyStat.username, UserDailyStat.day, func.sum(UserDailyStat.order_count).label("order_count")
+    )
+
+    if username:
+        query = query.filter(UserDailyStat.username == username)
+    if date_from:
+        query = query.filter(UserDailyStat.day >= date_from)
+    if date_to:
+        query = query.filter(UserDailyStat.day <= date_to)
+
+    return (
+        query.group_by(UserDailyStat.username, UserDailyStat.day)
+        .order_by(UserDailyStat.day.desc(), UserDailyStat.username)
+        .limit(limit)
+        .all()
+    )
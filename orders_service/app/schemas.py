@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List
+from datetime import date
 
 
 class OrderItem(BaseModel):
@@ -18,3 +19,48 @@ class Order(BaseModel):
     items: List[OrderItem]
 
     model_config = {"from_attributes": True}
+
+
+# Orders accepted per POST /orders/bulk; enforced while the body is
+# validated, so an oversized request is rejected before it is built
+BULK_MAX_ORDERS = 1000
+
+
+class BulkOrderCreate(BaseModel):
+    orders: List[OrderCreate] = Field(..., max_length=BULK_MAX_ORDERS)
+
+
+class BulkOrderResult(BaseModel):
+    index: int
+    status: str
+    order_id: int | None = None
+    error: str | None = None
+
+
+class BulkOrderResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkOrderResult]
+
+
+class StatusStat(BaseModel):
+    status: str
+    order_count: int
+
+    model_config = {"from_attributes": True}
+
+
+class ProductStat(BaseModel):
+    product_id: int
+    units: int
+    order_count: int
+
+    model_config = {"from_attributes": True}
+
+
+class UserDailyStatOut(BaseModel):
+    username: str
+    day: date
+    order_count: int
+
+    model_config = {"from_attributes": True}
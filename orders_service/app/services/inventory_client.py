@@ -1,15 +1,69 @@
 # app/services/inventory_client.py
+import json
+import logging
+import time
+from collections import defaultdict
+from functools import lru_cache
+
 import requests
 import pybreaker
+import redis
 
 from app.redis_client import get_redis
 
+logger = logging.getLogger("uvicorn")
+
 INVENTORY_BASE = "http://inventory_service:9004" 
 
+# Orders reserved from cache while inventory was down, waiting to be
+# replayed against the real inventory service. Entries are written AFTER
+# the orders are committed and carry their ids, so every entry points at
+# a real order. The list is only a work queue: orders with status
+# PENDING_RESERVE in Postgres remain the source of truth, so it is capped
+# (oldest entries dropped) to stay bounded while no reconciler drains it.
+PENDING_RECONCILE_KEY = "inventory:pending_reconcile"
+PENDING_RECONCILE_MAX = 10000
+
+# Check AND decrement cached stock for every item in ONE atomic step,
+# so concurrent fallback orders can never reserve the same cached units.
+#   KEYS   -> inventory cache keys
+#   ARGV   -> quantity needed for the matching key
+# Returns {0, 0} on success, or {index, cached} of the first short item
+# (cached = -1 when nothing is cached).
+RESERVE_FROM_CACHE_LUA = """
+for i = 1, #KEYS do
+    local cached = tonumber(redis.call('GET', KEYS[i]))
+    if cached == nil then
+        return {i, -1}
+    end
+    if cached < tonumber(ARGV[i]) then
+        return {i, cached}
+    end
+end
+for i = 1, #KEYS do
+    redis.call('DECRBY', KEYS[i], ARGV[i])
+end
+return {0, 0}
+"""
+
+
+def _is_business_error(exc: Exception) -> bool:
+    """
+    4xx answers (e.g. "Not enough inventory") mean inventory is UP and
+    rejected the request. They must not count towards opening the breaker.
+    """
+    return (
+        isinstance(exc, requests.HTTPError)
+        and exc.response is not None
+        and exc.response.status_code < 500
+    )
+
+
 # Circuit breaker for inventory calls
 inventory_breaker = pybreaker.CircuitBreaker(
     fail_max=5,        # after 5 failures -> OPEN
     reset_timeout=30,  # after 30s -> HALF-OPEN
+    exclude=[_is_business_error],
 )
 
 
@@ -17,18 +71,103 @@ def _cache_key(product_id: int) -> str:
     return f"inventory:{product_id}"
 
 
+# Cache helpers fail open: a Redis outage must never fail or hang an order.
+# The client's socket timeouts + retries bound how long they can take.
+
 def cache_inventory(product_id: int, quantity: int) -> None:
-    r = get_redis()
-    # Cache for 60 seconds (tune as needed)
-    r.set(_cache_key(product_id), quantity, ex=60)
+    try:
+        r = get_redis()
+        # Cache for 60 seconds (tune as needed)
+        r.set(_cache_key(product_id), quantity, ex=60)
+    except redis.RedisError as exc:
+        logger.warning("Inventory cache write failed: %s", exc)
 
 
 def get_cached_inventory(product_id: int) -> int | None:
-    r = get_redis()
-    val = r.get(_cache_key(product_id))
+    try:
+        r = get_redis()
+        val = r.get(_cache_key(product_id))
+    except redis.RedisError as exc:
+        logger.warning("Inventory cache read failed: %s", exc)
+        return None
     return int(val) if val is not None else None
 
 
+@lru_cache
+def _reserve_from_cache_script():
+    # register_script -> EVALSHA, falls back to EVAL if Redis lost the script
+    return get_redis().register_script(RESERVE_FROM_CACHE_LUA)
+
+
+def reserve_from_cache(items: list[dict]) -> dict:
+    """
+    Reserve items against cached inventory in a single Redis round trip.
+
+    Either every item is decremented, or nothing changes and the first
+    short item is reported. If the order is then not committed, the cache
+    simply under-reports stock until it expires (never overcommits).
+    Call record_pending_reconcile() once the orders are committed.
+    """
+    demand: dict[int, int] = defaultdict(int)
+    for item in items:
+        demand[item["product_id"]] += item["quantity"]
+    product_ids = list(demand)
+
+    try:
+        failed_index, cached = _reserve_from_cache_script()(
+            keys=[_cache_key(pid) for pid in product_ids],
+            args=[demand[pid] for pid in product_ids],
+        )
+    except redis.RedisError as exc:
+        logger.warning("Inventory cache reservation failed: %s", exc)
+        return {
+            "status": "fallback",
+            "reason": "inventory_down_cache_unavailable",
+        }
+
+    if failed_index:
+        pid = product_ids[int(failed_index) - 1]
+        # Fallback is not safe: not enough cached info.
+        return {
+            "status": "fallback",
+            "reason": "inventory_down_no_cache",
+            "details": {
+                "product_id": pid,
+                "needed": demand[pid],
+                "cached": None if int(cached) < 0 else int(cached),
+            },
+        }
+
+    # All items had enough cached stock and were decremented
+    return {
+        "status": "reserved_from_cache",
+        "reason": "inventory_down_but_cache_sufficient",
+    }
+
+
+def record_pending_reconcile(orders: list[tuple[int, list[dict]]]) -> None:
+    """
+    Queue committed PENDING_RESERVE orders, as (order_id, items), for
+    replay against inventory. One round trip for any number of orders.
+    """
+    if not orders:
+        return
+
+    now = time.time()
+    entries = [
+        json.dumps({"order_id": order_id, "items": items, "created_at": now})
+        for order_id, items in orders
+    ]
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.rpush(PENDING_RECONCILE_KEY, *entries)
+        pipe.ltrim(PENDING_RECONCILE_KEY, -PENDING_RECONCILE_MAX, -1)
+        pipe.execute()
+    except redis.RedisError as exc:
+        # The order row (status PENDING_RESERVE) still records it
+        logger.warning("Pending reconcile entry not recorded: %s", exc)
+
+
 @inventory_breaker
 def call_inventory_get(product_id: int, token: str | None = None) -> dict:
     """
@@ -88,7 +227,7 @@ def safe_reserve(items: list[dict], token: str | None = None) -> dict:
     High-level API that Orders router uses.
 
     - If inventory is healthy -> calls reserve normally.
-    - If breaker is OPEN -> uses Redis cache as fallback.
+    - If breaker is OPEN -> reserves against the Redis cache as fallback.
     """
     import pybreaker as _pyb
     try:
@@ -97,25 +236,5 @@ def safe_reserve(items: list[dict], token: str | None = None) -> dict:
 
     except _pyb.CircuitBreakerError:
         # Breaker is OPEN -> inventory is considered DOWN.
-        # Try Redis-based fallback.
-        for item in items:
-            pid = item["product_id"]
-            needed = item["quantity"]
-            cached_qty = get_cached_inventory(pid)
-            if cached_qty is None or cached_qty < needed:
-                # Fallback is not safe: not enough cached info.
-                return {
-                    "status": "fallback",
-                    "reason": "inventory_down_no_cache",
-                    "details": {
-                        "product_id": pid,
-                        "needed": needed,
-                        "cached": cached_qty,
-                    },
-                }
-
-        # All items have enough cached stock
-        return {
-            "status": "reserved_from_cache",
-            "reason": "inventory_down_but_cache_sufficient",
-        }
+        # Try Redis-based fallback (one atomic round trip).
+        return reserve_from_cache(items)
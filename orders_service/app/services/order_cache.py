@@ -0,0 +1,87 @@
+# app/services/order_cache.py
+import logging
+from functools import lru_cache
+
+import redis
+
+from app.redis_client import get_redis
+from app.observability.metrics import ORDER_HISTORY_CACHE
+
+logger = logging.getLogger("uvicorn")
+
+# Serialized order lists live for 60 seconds at most, even if an
+# invalidation is ever missed.
+ORDER_HISTORY_TTL = 60
+# The generation counter must outlive any cached list
+HISTORY_GENERATION_TTL = 24 * 3600
+
+# Fill the cache only if no write happened since the reader looked.
+# A reader that missed, then queried Postgres BEFORE a concurrent order
+# committed, would otherwise cache the old list after the invalidation.
+#   KEYS[1] -> generation counter, KEYS[2] -> cached list
+#   ARGV[1] -> generation seen on the miss, ARGV[2] -> payload, ARGV[3] -> ttl
+FILL_IF_UNCHANGED_LUA = """
+if (redis.call('GET', KEYS[1]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+
+def _history_key(username: str) -> str:
+    return f"orders:history:{username}"
+
+
+def _generation_key(username: str) -> str:
+    return f"orders:history:gen:{username}"
+
+
+@lru_cache
+def _fill_script():
+    return get_redis().register_script(FILL_IF_UNCHANGED_LUA)
+
+
+def get_cached_history(username: str) -> tuple[str | None, str]:
+    """
+    Return (cached JSON order list or None, generation) in one round trip.
+    Pass the generation to cache_history() after a miss.
+    Redis problems count as a miss so listing orders keeps working.
+    """
+    try:
+        cached, generation = get_redis().mget(_history_key(username), _generation_key(username))
+    except redis.RedisError as exc:
+        logger.warning("Order history cache read failed: %s", exc)
+        cached, generation = None, None
+
+    ORDER_HISTORY_CACHE.labels(result="hit" if cached is not None else "miss").inc()
+    return cached, generation or "0"
+
+
+def cache_history(username: str, payload: bytes, generation: str) -> None:
+    try:
+        _fill_script()(
+            keys=[_generation_key(username), _history_key(username)],
+            args=[generation, payload, ORDER_HISTORY_TTL],
+        )
+    except redis.RedisError as exc:
+        logger.warning("Order history cache write failed: %s", exc)
+
+
+def invalidate_history(*usernames: str) -> None:
+    """
+    Drop cached order lists and bump their generation. Call after any
+    committed write that changes a user's orders (creation, status
+    transitions).
+    """
+    if not usernames:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for username in usernames:
+            pipe.incr(_generation_key(username))
+            pipe.expire(_generation_key(username), HISTORY_GENERATION_TTL)
+        pipe.delete(*(_history_key(u) for u in usernames))
+        pipe.execute()
+    except redis.RedisError as exc:
+        logger.warning("Order history cache invalidation failed: %s", exc)
@@ -0,0 +1,78 @@
+# app/services/order_stats.py
+import os
+from collections import Counter
+from datetime import datetime, timezone
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models import OrderStatusStat, ProductUnitStat, UserDailyStat
+
+# Rows per rollup key. Each transaction increments one shard, so up to
+# this many order writes can update the same counter at once. Safe to
+# change at any time: reads sum whatever shards exist.
+STATS_SHARDS = int(os.getenv("ORDER_STATS_SHARDS", "16"))
+
+
+def _upsert_increment(db: Session, model, rows: list[dict], keys: list[str], counters: list[str]) -> None:
+    """
+    Multi-row INSERT ... ON CONFLICT DO UPDATE SET counter = counter + excluded.counter
+    """
+    if not rows:
+        return
+
+    # Same key order in every transaction -> no deadlocks between writers
+    rows = sorted(rows, key=lambda row: tuple(row[k] for k in keys))
+
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    stmt = insert(model).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={c: getattr(model, c) + getattr(stmt.excluded, c) for c in counters},
+    )
+    db.execute(stmt)
+
+
+def record_orders(db: Session, orders: list[dict], shard_key: int) -> None:
+    """
+    Add newly written orders to the rollups.
+    `orders` are dicts with username / status / items. Must be called
+    inside the transaction that inserts the orders (before commit).
+    `shard_key` (e.g. the first order id) picks the shard: one per
+    transaction, so a bulk write locks one row per counter, not N.
+    """
+    if not orders:
+        return
+
+    shard = shard_key % STATS_SHARDS
+    today = datetime.now(timezone.utc).date()
+
+    by_status: Counter = Counter()
+    by_user: Counter = Counter()
+    units: Counter = Counter()
+    product_orders: Counter = Counter()
+
+    for order in orders:
+        by_status[order["status"]] += 1
+        by_user[order["username"]] += 1
+        for product_id in {item["product_id"] for item in order["items"]}:
+            product_orders[product_id] += 1
+        for item in order["items"]:
+            units[item["product_id"]] += item["quantity"]
+
+    _upsert_increment(
+        db, OrderStatusStat,
+        [{"status": s, "shard": shard, "order_count": n} for s, n in by_status.items()],
+        keys=["status", "shard"], counters=["order_count"],
+    )
+    _upsert_increment(
+        db, ProductUnitStat,
+        [{"product_id": p, "shard": shard, "units": units[p], "order_count": product_orders[p]} for p in units],
+        keys=["product_id", "shard"], counters=["units", "order_count"],
+    )
+    _upsert_increment(
+        db, UserDailyStat,
+        [{"username": u, "day": today, "shard": shard, "order_count": n} for u, n in by_user.items()],
+        keys=["username", "day", "shard"], counters=["order_count"],
+    )
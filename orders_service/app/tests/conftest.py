@@ -0,0 +1,26 @@
+# tests/conftest.py
+import os
+import tempfile
+
+import pytest
+
+# app.db refuses to import without a database URL; tests run on SQLite.
+os.environ.setdefault(
+    "ORDERS_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'orders_test.db')}",
+)
+
+
+@pytest.fixture
+def client():
+    """
+    TestClient logged in as a regular user (JWT check overridden).
+    """
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from shared.auth_utils import Principal, verify_jwt
+
+    app.dependency_overrides[verify_jwt] = lambda: Principal("t", {"sub": "pharmacy1", "role": "user"})
+    with TestClient(app) as c:
+        yield c
+    app.dependency_overrides.clear()
@@ -0,0 +1,117 @@
+# tests/test_bulk_orders.py
+import requests
+
+from app.routers import orders as orders_router
+
+
+def test_merge_demand_sums_per_product():
+    merged = orders_router._merge_demand([
+        [{"product_id": 1, "quantity": 2}, {"product_id": 2, "quantity": 1}],
+        [{"product_id": 1, "quantity": 3}],
+    ])
+    assert sorted(merged, key=lambda i: i["product_id"]) == [
+        {"product_id": 1, "quantity": 5},
+        {"product_id": 2, "quantity": 1},
+    ]
+
+
+def test_bulk_reserves_once_per_batch(client, monkeypatch):
+    calls = []
+
+    def fake_reserve(items, token=None):
+        calls.append(items)
+        return {"status": "reserved"}
+
+    monkeypatch.setattr(orders_router, "safe_reserve", fake_reserve)
+
+    orders = [{"items": [{"product_id": 1, "quantity": 1}]} for _ in range(5)]
+    orders.append({"items": []})
+
+    resp = client.post("/orders/bulk", json={"orders": orders})
+    assert resp.status_code == 200
+
+    body = resp.json()
+    assert body["created"] == 5
+    assert body["failed"] == 1
+    assert len(calls) == 1
+    assert calls[0] == [{"product_id": 1, "quantity": 5}]
+    assert [r["index"] for r in body["results"]] == list(range(6))
+    assert all(r["order_id"] for r in body["results"][:5])
+    assert body["results"][5]["status"] == "REJECTED"
+
+
+def _http_error(code):
+    resp = requests.Response()
+    resp.status_code = code
+    return requests.HTTPError(response=resp)
+
+
+def test_short_batch_is_bisected_to_the_short_orders(client, monkeypatch):
+    stock = {1: 62}
+    calls = []
+
+    def fake_reserve(items, token=None):
+        calls.append(items)
+        if any(stock.get(i["product_id"], 0) < i["quantity"] for i in items):
+            raise _http_error(400)
+        for i in items:
+            stock[i["product_id"]] -= i["quantity"]
+        return {"status": "reserved"}
+
+    monkeypatch.setattr(orders_router, "safe_reserve", fake_reserve)
+
+    orders = [{"items": [{"product_id": 1, "quantity": 1}]} for _ in range(64)]
+    body = client.post("/orders/bulk", json={"orders": orders}).json()
+
+    assert body["created"] == 62
+    assert body["failed"] == 2
+    assert {r["error"] for r in body["results"] if r["status"] == "REJECTED"} == {"Not enough inventory"}
+    # bisection: a handful of calls, not one per order
+    assert len(calls) < 30
+
+
+def test_short_cache_fallback_is_bisected_with_clean_error(client, monkeypatch):
+    stock = {1: 1}
+
+    def fake_reserve(items, token=None):
+        if stock[1] < items[0]["quantity"]:
+            return {"status": "fallback", "reason": "inventory_down_no_cache", "details": {}}
+        stock[1] -= items[0]["quantity"]
+        return {"status": "reserved_from_cache"}
+
+    monkeypatch.setattr(orders_router, "safe_reserve", fake_reserve)
+
+    orders = [{"items": [{"product_id": 1, "quantity": 1}]} for _ in range(2)]
+    body = client.post("/orders/bulk", json={"orders": orders}).json()
+
+    assert [r["status"] for r in body["results"]] == ["PENDING_RESERVE", "REJECTED"]
+    assert body["results"][1]["error"] == "Not enough inventory"
+
+
+def test_auth_error_is_not_fanned_out(client, monkeypatch):
+    calls = []
+
+    def fake_reserve(items, token=None):
+        calls.append(items)
+        raise _http_error(401)
+
+    monkeypatch.setattr(orders_router, "safe_reserve", fake_reserve)
+
+    orders = [{"items": [{"product_id": 1, "quantity": 1}]} for _ in range(10)]
+    body = client.post("/orders/bulk", json={"orders": orders}).json()
+
+    assert len(calls) == 1
+    assert body["created"] == 0
+    assert {r["error"] for r in body["results"]} == {"Inventory rejected the request (401)"}
+
+
+def test_bulk_limit_is_enforced_by_the_schema(client, monkeypatch):
+    from app.schemas import BULK_MAX_ORDERS
+
+    def no_reserve(items, token=None):
+        raise AssertionError("oversized requests must not reach the handler")
+
+    monkeypatch.setattr(orders_router, "safe_reserve", no_reserve)
+
+    orders = [{"items": [{"product_id": 1, "quantity": 1}]}] * (BULK_MAX_ORDERS + 1)
+    assert client.post("/orders/bulk", json={"orders": orders}).status_code == 422
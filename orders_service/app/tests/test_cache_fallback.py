@@ -0,0 +1,81 @@
+# tests/test_cache_fallback.py
+import json
+
+import fakeredis
+import pytest
+
+from app.services import inventory_client
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    r = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(inventory_client, "get_redis", lambda: r)
+    inventory_client._reserve_from_cache_script.cache_clear()
+    yield r
+    inventory_client._reserve_from_cache_script.cache_clear()
+
+
+def test_reserve_from_cache_is_all_or_nothing(fake_redis):
+    fake_redis.set("inventory:1", 5)
+    fake_redis.set("inventory:2", 1)
+
+    result = inventory_client.reserve_from_cache([
+        {"product_id": 1, "quantity": 2},
+        {"product_id": 2, "quantity": 2},
+    ])
+
+    assert result["status"] == "fallback"
+    assert result["details"] == {"product_id": 2, "needed": 2, "cached": 1}
+    # nothing was decremented
+    assert fake_redis.get("inventory:1") == "5"
+    assert fake_redis.get("inventory:2") == "1"
+
+
+def test_reserve_from_cache_never_overcommits(fake_redis):
+    fake_redis.set("inventory:1", 5)
+    items = [{"product_id": 1, "quantity": 1}, {"product_id": 1, "quantity": 1}]
+
+    statuses = [inventory_client.reserve_from_cache(items)["status"] for _ in range(4)]
+
+    assert statuses == ["reserved_from_cache", "reserved_from_cache", "fallback", "fallback"]
+    assert fake_redis.get("inventory:1") == "1"
+
+
+def test_missing_cache_entry_is_reported(fake_redis):
+    result = inventory_client.reserve_from_cache([{"product_id": 9, "quantity": 1}])
+
+    assert result["details"]["cached"] is None
+
+
+def test_pending_reconcile_entries_point_at_orders(fake_redis, monkeypatch):
+    monkeypatch.setattr(inventory_client, "PENDING_RECONCILE_MAX", 2)
+
+    inventory_client.record_pending_reconcile([
+        (1, [{"product_id": 1, "quantity": 1}]),
+        (2, [{"product_id": 1, "quantity": 2}]),
+    ])
+    inventory_client.record_pending_reconcile([(3, [{"product_id": 4, "quantity": 1}])])
+
+    entries = [json.loads(e) for e in fake_redis.lrange(inventory_client.PENDING_RECONCILE_KEY, 0, -1)]
+    # capped, oldest dropped
+    assert [e["order_id"] for e in entries] == [2, 3]
+    assert entries[1]["items"] == [{"product_id": 4, "quantity": 1}]
+
+
+def test_pending_orders_are_queued_after_commit(client, fake_redis, monkeypatch):
+    from app.routers import orders as orders_router
+
+    monkeypatch.setattr(
+        orders_router, "safe_reserve", lambda items, token=None: {"status": "reserved_from_cache"}
+    )
+
+    order = client.post("/orders", json={"items": [{"product_id": 1, "quantity": 1}]}).json()
+    bulk = client.post("/orders/bulk", json={"orders": [
+        {"items": [{"product_id": 2, "quantity": 1}]},
+        {"items": [{"product_id": 3, "quantity": 1}]},
+    ]}).json()
+
+    entries = [json.loads(e) for e in fake_redis.lrange(inventory_client.PENDING_RECONCILE_KEY, 0, -1)]
+    assert [e["order_id"] for e in entries] == [order["id"]] + [r["order_id"] for r in bulk["results"]]
+    assert order["status"] == "PENDING_RESERVE"
@@ -0,0 +1,79 @@
+# tests/test_order_cache.py
+import fakeredis
+import pytest
+import redis
+from prometheus_client import REGISTRY
+
+from app.routers import orders as orders_router
+from app.services import order_cache
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    r = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(order_cache, "get_redis", lambda: r)
+    order_cache._fill_script.cache_clear()
+    monkeypatch.setattr(
+        orders_router, "safe_reserve", lambda items, token=None: {"status": "reserved"}
+    )
+    yield r
+    order_cache._fill_script.cache_clear()
+
+
+def _lookups(result: str) -> float:
+    return REGISTRY.get_sample_value(
+        "orders_history_cache_requests_total", {"result": result}
+    ) or 0.0
+
+
+def test_hit_returns_cached_bytes(client, fake_redis):
+    first = client.get("/orders")
+    hits = _lookups("hit")
+
+    # Whatever is cached is returned verbatim, without touching Postgres
+    fake_redis.set("orders:history:pharmacy1", '[{"cached": true}]')
+    second = client.get("/orders")
+
+    assert first.status_code == 200
+    assert second.content == b'[{"cached": true}]'
+    assert second.headers["content-type"] == "application/json"
+    assert _lookups("hit") == hits + 1
+
+
+def test_create_and_bulk_invalidate(client, fake_redis):
+    before = len(client.get("/orders").json())
+
+    client.post("/orders", json={"items": [{"product_id": 1, "quantity": 1}]})
+    assert len(client.get("/orders").json()) == before + 1
+
+    client.post("/orders/bulk", json={"orders": [
+        {"items": [{"product_id": 1, "quantity": 1}]},
+        {"items": [{"product_id": 2, "quantity": 1}]},
+    ]})
+    assert len(client.get("/orders").json()) == before + 3
+
+
+def test_stale_fill_after_concurrent_write_is_dropped(fake_redis):
+    cached, generation = order_cache.get_cached_history("u1")
+    assert cached is None
+
+    # an order commits while the reader is still querying Postgres
+    order_cache.invalidate_history("u1")
+    order_cache.cache_history("u1", b"[]", generation)
+
+    assert fake_redis.get("orders:history:u1") is None
+
+    cached, generation = order_cache.get_cached_history("u1")
+    order_cache.cache_history("u1", b"[]", generation)
+    assert fake_redis.get("orders:history:u1") == "[]"
+
+
+def test_redis_error_counts_as_miss(monkeypatch):
+    def broken():
+        raise redis.ConnectionError("down")
+
+    monkeypatch.setattr(order_cache, "get_redis", broken)
+    misses = _lookups("miss")
+
+    assert order_cache.get_cached_history("u1") == (None, "0")
+    assert _lookups("miss") == misses + 1
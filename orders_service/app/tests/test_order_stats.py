@@ -0,0 +1,74 @@
+# tests/test_order_stats.py
+from datetime import datetime, timezone
+
+from app.main import app
+from app.routers import orders as orders_router
+from shared.auth_utils import Principal, verify_jwt
+
+ADMIN = Principal("t", {"sub": "ops", "role": "admin"})
+USER = Principal("t", {"sub": "stats-user", "role": "user"})
+
+
+def _snapshot(client):
+    app.dependency_overrides[verify_jwt] = lambda: ADMIN
+    products = {p["product_id"]: p for p in client.get("/orders/stats/products").json()}
+    statuses = {s["status"]: s["order_count"] for s in client.get("/orders/stats/status").json()}
+    daily = client.get("/orders/stats/users-daily", params={"username": USER.sub}).json()
+    app.dependency_overrides[verify_jwt] = lambda: USER
+
+    today = datetime.now(timezone.utc).date().isoformat()
+    return {
+        "units_42": products.get(42, {}).get("units", 0),
+        "orders_42": products.get(42, {}).get("order_count", 0),
+        "units_43": products.get(43, {}).get("units", 0),
+        "orders_43": products.get(43, {}).get("order_count", 0),
+        "confirmed": statuses.get("CONFIRMED", 0),
+        "today": sum(d["order_count"] for d in daily if d["day"] == today),
+    }
+
+
+def test_rollups_follow_order_writes(client, monkeypatch):
+    monkeypatch.setattr(
+        orders_router, "safe_reserve", lambda items, token=None: {"status": "reserved"}
+    )
+    app.dependency_overrides[verify_jwt] = lambda: USER
+
+    # regular users cannot read analytics
+    assert client.get("/orders/stats/status").status_code == 403
+
+    before = _snapshot(client)
+
+    client.post("/orders", json={"items": [{"product_id": 42, "quantity": 3}]})
+    client.post("/orders/bulk", json={"orders": [
+        {"items": [{"product_id": 42, "quantity": 1}, {"product_id": 43, "quantity": 2}]},
+        {"items": [{"product_id": 43, "quantity": 5}, {"product_id": 43, "quantity": 1}]},
+    ]})
+
+    after = _snapshot(client)
+
+    assert after["units_42"] - before["units_42"] == 4
+    assert after["orders_42"] - before["orders_42"] == 2
+    assert after["units_43"] - before["units_43"] == 8
+    # one order listing product 43 twice still counts once
+    assert after["orders_43"] - before["orders_43"] == 2
+    assert after["confirmed"] - before["confirmed"] == 3
+    assert after["today"] - before["today"] == 3
+
+
+def test_concurrent_writers_use_separate_shards(client, monkeypatch):
+    from app.db import SessionLocal
+    from app.models import OrderStatusStat
+
+    monkeypatch.setattr(
+        orders_router, "safe_reserve", lambda items, token=None: {"status": "reserved"}
+    )
+    before = _snapshot(client)
+
+    for _ in range(3):
+        client.post("/orders", json={"items": [{"product_id": 44, "quantity": 1}]})
+
+    # consecutive orders land on different rows, and reads sum them
+    with SessionLocal() as db:
+        shards = db.query(OrderStatusStat.shard).filter(OrderStatusStat.status == "CONFIRMED").all()
+    assert len(shards) >= 3
+    assert _snapshot(client)["confirmed"] - before["confirmed"] == 3
@@ -0,0 +1,82 @@
+"""
+Bulk order intake benchmark
+===========================
+Compares N x POST /orders against one POST /orders/bulk with N orders.
+
+Runs in-process (TestClient + SQLite). JWTs are real RS256 tokens signed
+with the shared dev key, so verification cost is included. The inventory
+reserve call is simulated with a fixed latency (INVENTORY_LATENCY_MS) and
+the Redis history cache is switched off, so only intake work is compared.
+
+    cd orders_service
+    python benchmarks/bench_bulk_orders.py [N] [INVENTORY_LATENCY_MS]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault(
+    "ORDERS_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_orders.db')}",
+)
+
+from fastapi.testclient import TestClient  # noqa: E402
+from jose import jwt  # noqa: E402
+
+import shared  # noqa: E402
+from app.main import app  # noqa: E402
+from app.routers import orders as orders_router  # noqa: E402
+
+
+def _token() -> str:
+    key_path = Path(shared.__file__).resolve().parent / "keys" / "private.pem"
+    claims = {
+        "sub": "bench-pharmacy",
+        "role": "user",
+        "exp": datetime.utcnow() + timedelta(minutes=15),
+        "iss": "pharma-auth",
+    }
+    return jwt.encode(claims, key_path.read_text(), algorithm="RS256")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 5.0) / 1000
+
+    def fake_reserve(items, token=None):
+        time.sleep(latency)
+        return {"status": "reserved"}
+
+    orders_router.safe_reserve = fake_reserve
+    orders_router.invalidate_history = lambda *usernames: None
+
+    headers = {"Authorization": f"Bearer {_token()}"}
+    orders = [
+        {"items": [{"product_id": i % 50, "quantity": 1}, {"product_id": 1000, "quantity": 2}]}
+        for i in range(n)
+    ]
+
+    with TestClient(app) as client:
+        start = time.perf_counter()
+        for order in orders:
+            assert client.post("/orders", json=order, headers=headers).status_code == 200
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        resp = client.post("/orders/bulk", json={"orders": orders}, headers=headers)
+        bulk = time.perf_counter() - start
+        assert resp.status_code == 200 and resp.json()["created"] == n
+
+    print(f"orders: {n}, simulated inventory latency: {latency * 1000:.1f} ms")
+    print(f"POST /orders      x{n}: {single:7.3f}s  {n / single:9.1f} orders/s")
+    print(f"POST /orders/bulk x1: {bulk:7.3f}s  {n / bulk:9.1f} orders/s")
+    print(f"speedup: {single / bulk:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
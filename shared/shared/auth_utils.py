@@ -1,24 +1,143 @@
 from jose import jwt, JWTError
 from fastapi import HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
+import os
+import threading
+import time
+
+from shared.jwks import RemoteKeySet, public_jwk, verification_keys
+from shared.revocation import remote_revocation_list
 
 security = HTTPBearer()
 
 # ---------------------------------------------------------
-# Load RSA PUBLIC KEY
+# Verification keys
 # ---------------------------------------------------------
+# Auth's JWKS endpoint, e.g. http://auth_service:9001/.well-known/jwks.json.
+# Without it only the bundled public key is trusted.
+JWKS_URL = os.getenv("JWKS_URL")
+JWKS_REFRESH_SECONDS = float(os.getenv("JWKS_REFRESH_SECONDS", "300"))
+JWKS_RETRY_SECONDS = float(os.getenv("JWKS_RETRY_SECONDS", "5"))
+
+# Bundled public key (any supported algorithm, RS256 in the repo):
+# trusted until the first JWKS fetch, and the key for tokens issued
+# before auth tagged them with a kid
 BASE_DIR = Path(__file__).resolve().parent
 PUBLIC_KEY_PATH = BASE_DIR / "keys" / "public.pem"
 
-if not PUBLIC_KEY_PATH.exists():
-    raise RuntimeError(f"PUBLIC KEY not found at: {PUBLIC_KEY_PATH}")
+if PUBLIC_KEY_PATH.exists():
+    with open(PUBLIC_KEY_PATH, "r") as f:
+        PUBLIC_KEY = f.read()
+    bundled = public_jwk(PUBLIC_KEY)
+    BUNDLED_KID = bundled["kid"]
+    BUNDLED_KEYS = verification_keys({"keys": [bundled]})
+elif JWKS_URL:
+    BUNDLED_KID, BUNDLED_KEYS = None, {}
+else:
+    raise RuntimeError(f"PUBLIC KEY not found at: {PUBLIC_KEY_PATH} and JWKS_URL not set")
+
+if JWKS_URL:
+    verification_keyset = RemoteKeySet(JWKS_URL, JWKS_REFRESH_SECONDS, JWKS_RETRY_SECONDS, bootstrap=BUNDLED_KEYS)
+else:
+    verification_keyset = BUNDLED_KEYS
+
+
+# ---------------------------------------------------------
+# Revoked tokens
+# ---------------------------------------------------------
+# Auth's revocation endpoint, e.g. http://auth_service:9001/auth/revocations.
+# Without it revoked (logged out) tokens keep working until they expire.
+REVOCATION_URL = os.getenv("REVOCATION_URL")
+REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", "10"))
+REVOCATION_RETRY_SECONDS = float(os.getenv("REVOCATION_RETRY_SECONDS", "2"))
+
+if REVOCATION_URL:
+    revocation_list = remote_revocation_list(REVOCATION_URL, REVOCATION_SYNC_SECONDS, REVOCATION_RETRY_SECONDS)
+else:
+    revocation_list = None
+
 
-with open(PUBLIC_KEY_PATH, "r") as f:
-    PUBLIC_KEY = f.read()
+# ---------------------------------------------------------
+# Principal (who is calling)
+# ---------------------------------------------------------
+ADMIN_ROLES = frozenset({"admin", "superadmin"})
 
 
-def verify_jwt(credentials: HTTPAuthorizationCredentials | str = Depends(security)):
+class Principal:
+    """
+    The caller behind a verified access token: `sub`, `role`, `jti`,
+    `exp`, the raw `token` (to forward downstream) and the decoded
+    `claims`. Built once per token and cached with it, so every request
+    reusing the token gets the same object; role flags are worked out
+    here rather than on each check.
+    """
+
+    __slots__ = ("sub", "role", "jti", "exp", "token", "claims", "is_admin", "is_superadmin")
+
+    def __init__(self, token: str, claims: dict):
+        self.sub = claims.get("sub")
+        self.role = claims.get("role", "user")
+        self.jti = claims.get("jti")
+        self.exp = claims.get("exp", 0)
+        self.token = token
+        self.claims = claims
+        self.is_admin = self.role in ADMIN_ROLES
+        self.is_superadmin = self.role == "superadmin"
+
+    def __repr__(self) -> str:
+        return f"Principal(sub={self.sub!r}, role={self.role!r})"
+
+
+# ---------------------------------------------------------
+# Verified-token cache
+# ---------------------------------------------------------
+# Clients reuse an access token for its whole lifetime, so most requests
+# carry a token this process has already verified. Remembering the
+# claims (keyed by the exact token string) skips the signature check,
+# which costs the most with ES256. Entries go at `exp`, or as soon as
+# their kid stops being published. 0 disables the cache.
+VERIFIED_CACHE_SIZE = int(os.getenv("JWT_VERIFIED_CACHE_SIZE", "10000"))
+
+
+class VerifiedTokenCache:
+    def __init__(self, max_size: int = VERIFIED_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[str, Principal]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Principal | None:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            kid, principal = entry
+            if principal.exp <= time.time() or verification_keyset.get(kid) is None:
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return principal
+
+    def put(self, token: str, kid: str, principal: Principal) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[token] = (kid, principal)
+            self._entries.move_to_end(token)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+verified_tokens = VerifiedTokenCache()
+
+
+def verify_jwt(credentials: HTTPAuthorizationCredentials | str = Depends(security)) -> Principal:
     """
     Can be used in TWO ways:
 
@@ -26,29 +145,88 @@ def verify_jwt(credentials: HTTPAuthorizationCredentials | str = Depends(securit
        user = Depends(verify_jwt)
        -> credentials is HTTPAuthorizationCredentials
 
-    2) Called manually (e.g. from gateway) with a raw header string:
-       payload = verify_jwt("Bearer <token>")
+    2) Called manually with a raw header string:
+       principal = verify_jwt("Bearer <token>")
+
+    A revocation filter hit is confirmed inline (blocking), which is fine
+    for the dependency: FastAPI runs it in the threadpool. From async
+    code (e.g. the gateway) await verify_jwt_async() instead.
 
     Returns:
-        Decoded payload + original token under key 'token'
+        The caller's Principal (claims plus the original token, which
+        downstream calls forward)
+    """
+    principal = _verified_principal(credentials)
+    if principal.jti and revocation_list is not None and revocation_list.is_revoked(principal.jti):
+        raise HTTPException(status_code=401, detail="Token revoked")
+    return principal
+
+
+async def verify_jwt_async(credentials: HTTPAuthorizationCredentials | str) -> Principal:
+    """
+    verify_jwt() for the event loop: a revocation filter hit is confirmed
+    in the threadpool instead of blocking every other request.
     """
-    # ----- Case 1: called manually from gateway with a string -----
+    principal = _verified_principal(credentials)
+    if principal.jti and revocation_list is not None and await revocation_list.is_revoked_async(principal.jti):
+        raise HTTPException(status_code=401, detail="Token revoked")
+    return principal
+
+
+def _verified_principal(credentials: HTTPAuthorizationCredentials | str) -> Principal:
+    # Signature, expiry and type only; revocation is up to the caller
+    # ----- Called manually (e.g. from gateway) with a string -----
     if isinstance(credentials, str):
         if not credentials.startswith("Bearer "):
             raise HTTPException(status_code=401, detail="Invalid Authorization header")
         token = credentials.split(" ", 1)[1]
 
-    # ----- Case 2: used as FastAPI dependency -----
+    # ----- Used as FastAPI dependency -----
     else:
         token = credentials.credentials
 
-    # Decode JWT
-    try:
-        payload = jwt.decode(token, PUBLIC_KEY, algorithms=["RS256"])
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+    # Decode JWT with the key its kid names; the algorithm comes from
+    # the key, never from the token header
+    principal = verified_tokens.get(token)
+    if principal is None:
+        try:
+            kid = jwt.get_unverified_header(token).get("kid") or BUNDLED_KID
+            entry = verification_keyset.get(kid)
+            if entry is None:
+                raise HTTPException(status_code=401, detail="Invalid token")
+            key, algorithm = entry
+            claims = jwt.decode(token, key, algorithms=[algorithm])
+        except JWTError:
+            raise HTTPException(status_code=401, detail="Invalid token")
+
+        # Refresh tokens are only good for POST /auth/refresh (and are
+        # never cached here)
+        if claims.get("typ") == "refresh":
+            raise HTTPException(status_code=401, detail="Invalid token")
+        principal = Principal(token, claims)
+        verified_tokens.put(token, kid, principal)
+
+    # Revocation is checked on every call, cached or not
+    return principal
+
+
+@lru_cache
+def require_role(*roles: str):
+    """
+    Dependency letting through only callers with one of `roles` (403
+    otherwise) and returning their Principal:
+
+        admin: Principal = Depends(require_role("admin"))
+
+    The same roles always give the same dependency, and it sits on
+    verify_jwt, so FastAPI resolves both once per request however many
+    places ask for them.
+    """
+    allowed = frozenset(roles)
+
+    def dependency(principal: Principal = Depends(verify_jwt)) -> Principal:
+        if principal.role not in allowed:
+            raise HTTPException(status_code=403, detail="Admins only" if allowed <= ADMIN_ROLES else "Forbidden")
+        return principal
 
-    # Attach the original token so downstream services can forward it
-    payload = dict(payload)
-    payload["token"] = token
-    return payload
+    return dependency
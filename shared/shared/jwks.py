@@ -0,0 +1,157 @@
+import base64
+import hashlib
+import json
+import logging
+import threading
+import time
+import urllib.request
+
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
+from jose import jwk
+from jose.backends.base import Key
+
+logger = logging.getLogger("uvicorn")
+
+# ---------------------------------------------------------
+# JWK helpers (auth publishes, services verify)
+# ---------------------------------------------------------
+# RFC 7638: the members hashed into a key's thumbprint, per key type
+_THUMBPRINT_MEMBERS = {
+    "RSA": ("e", "kty", "n"),
+    "EC": ("crv", "kty", "x", "y"),
+    "OKP": ("crv", "kty", "x"),
+}
+
+
+def thumbprint(public: dict) -> str:
+    """
+    RFC 7638 thumbprint of a public JWK, used as its `kid`: the same key
+    always gets the same kid, whatever file it was loaded from.
+    """
+    members = {name: public[name] for name in _THUMBPRINT_MEMBERS[public["kty"]]}
+    canonical = json.dumps(members, separators=(",", ":"), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(hashlib.sha256(canonical).digest()).rstrip(b"=").decode()
+
+
+# JWS algorithm per key type. ES256 signs far faster than RS256 (RSA
+# verifies faster, though). python-jose has no EdDSA, so Ed25519 keys
+# are refused here rather than failing on the first token.
+_EC_ALGORITHMS = {"secp256r1": "ES256", "secp384r1": "ES384", "secp521r1": "ES512"}
+
+
+def algorithm_for(pem: str) -> str:
+    """
+    The algorithm a PEM key (private or public) signs / verifies with:
+    RS256 for RSA, ES256 / ES384 / ES512 by EC curve.
+    """
+    try:
+        key = load_pem_private_key(pem.encode(), password=None)
+    except ValueError:
+        key = load_pem_public_key(pem.encode())
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return "RS256"
+    if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)) and key.curve.name in _EC_ALGORITHMS:
+        return _EC_ALGORITHMS[key.curve.name]
+    raise ValueError(f"Unsupported JWT signing key type: {type(key).__name__}")
+
+
+def public_jwk(pem: str, algorithm: str | None = None) -> dict:
+    """
+    Public JWK (kty, key material, alg, use, kid) for a PEM key, private
+    or public. The algorithm defaults to the one the key type implies.
+    """
+    algorithm = algorithm or algorithm_for(pem)
+    public = jwk.construct(pem, algorithm).public_key().to_dict()
+    public.update({"alg": algorithm, "use": "sig"})
+    public["kid"] = thumbprint(public)
+    return public
+
+
+def verification_keys(jwks: dict) -> dict[str, tuple[Key, str]]:
+    """
+    kid -> (constructed key, its algorithm) for every signing key in a
+    JWKS document. Keys are parsed once here, not on every verify.
+    """
+    keys = {}
+    for entry in jwks.get("keys", []):
+        if entry.get("use", "sig") != "sig" or not entry.get("kid") or not entry.get("alg"):
+            continue
+        try:
+            keys[entry["kid"]] = (jwk.construct(entry, entry["alg"]), entry["alg"])
+        except Exception as exc:
+            logger.warning("Skipping JWK %s: %s", entry.get("kid"), exc)
+    return keys
+
+
+# ---------------------------------------------------------
+# Remote keyset (services)
+# ---------------------------------------------------------
+class RemoteKeySet:
+    """
+    Verification keys from auth's JWKS endpoint, refreshed on a daemon
+    thread and swapped in whole. get() never does I/O: an unknown kid
+    returns None and wakes the refresher, so a key that was published
+    moments ago is picked up on the next request.
+
+    Until the first successful fetch the `bootstrap` keys (the public key
+    baked into the image) are used, so a service starting before auth
+    still verifies tokens. After that, exactly the published keys are
+    trusted: a key auth stops publishing stops verifying.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        refresh_seconds: float,
+        retry_seconds: float,
+        bootstrap: dict[str, tuple[Key, str]] | None = None,
+        timeout: float = 2.0,
+    ):
+        self.url = url
+        self.refresh_seconds = refresh_seconds
+        self.retry_seconds = retry_seconds
+        self.timeout = timeout
+        self._keys = dict(bootstrap or {})
+        self._wake = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._last_wake = 0.0
+
+    def get(self, kid: str) -> tuple[Key, str] | None:
+        if self._thread is None:
+            self._start()
+        entry = self._keys.get(kid)
+        if entry is None:
+            # at most one early refresh per retry interval, so tokens with
+            # made-up kids cannot hammer auth
+            now = time.monotonic()
+            if now - self._last_wake >= self.retry_seconds:
+                self._last_wake = now
+                self._wake.set()
+        return entry
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="jwks-refresh", daemon=True)
+                self._thread.start()
+
+    def _fetch(self) -> dict[str, tuple[Key, str]]:
+        with urllib.request.urlopen(self.url, timeout=self.timeout) as resp:
+            keys = verification_keys(json.load(resp))
+        if not keys:
+            raise ValueError("JWKS has no usable signing keys")
+        return keys
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self._keys = self._fetch()
+                interval = self.refresh_seconds
+            except Exception as exc:
+                # keep the keys we have; try again soon
+                logger.warning("JWKS refresh from %s failed: %s", self.url, exc)
+                interval = self.retry_seconds
+            self._wake.wait(interval)
+            self._wake.clear()
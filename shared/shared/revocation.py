@@ -0,0 +1,174 @@
+import base64
+import hashlib
+import json
+import logging
+import math
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from fastapi.concurrency import run_in_threadpool
+
+logger = logging.getLogger("uvicorn")
+
+
+# ---------------------------------------------------------
+# Bloom filter (auth builds it, services query it)
+# ---------------------------------------------------------
+class BloomFilter:
+    """
+    Fixed-size set of strings with no false negatives and a tunable false
+    positive rate. Positions come from blake2b, so a filter built by auth
+    answers the same in every service.
+    """
+
+    def __init__(self, m: int, k: int, bits: bytes | None = None):
+        self.m = m
+        self.k = k
+        self.bits = bytearray(bits) if bits is not None else bytearray((m + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float) -> "BloomFilter":
+        capacity = max(1, capacity)
+        m = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        k = max(1, round(m / capacity * math.log(2)))
+        return cls(m, k)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.m for i in range(self.k))
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def to_dict(self) -> dict:
+        return {"m": self.m, "k": self.k, "bits": base64.b64encode(bytes(self.bits)).decode()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BloomFilter":
+        return cls(data["m"], data["k"], base64.b64decode(data["bits"]))
+
+
+# ---------------------------------------------------------
+# Revocation list (every service that verifies tokens)
+# ---------------------------------------------------------
+class RevocationList:
+    """
+    Revoked token ids, answered from memory. A bloom filter of every
+    revoked jti is re-synced on a daemon thread; a jti not in it (nearly
+    every request) is not revoked, with no I/O. Only a filter hit is
+    confirmed against the exact set via `confirm(jti)`, and the answer
+    is remembered until the next filter arrives.
+
+    `fetch(version)` returns (version, BloomFilter), or None if the
+    filter has not changed since `version`. Until the first successful
+    fetch nothing is considered revoked. If a hit cannot be confirmed,
+    the token is treated as revoked. `confirm` may block: on the event
+    loop use is_revoked_async().
+    """
+
+    def __init__(self, fetch, confirm, sync_seconds: float, retry_seconds: float, max_confirmed: int = 10_000):
+        self.fetch = fetch
+        self.confirm = confirm
+        self.sync_seconds = sync_seconds
+        self.retry_seconds = retry_seconds
+        self.max_confirmed = max_confirmed
+        self._filter: BloomFilter | None = None
+        self._version: str | None = None
+        self._confirmed: dict[str, bool] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def is_revoked(self, jti: str) -> bool:
+        bloom, known = self._lookup(jti)
+        return known if known is not None else self._confirm(bloom, jti)
+
+    async def is_revoked_async(self, jti: str) -> bool:
+        """
+        is_revoked() for async callers: misses and remembered answers
+        return inline, only an unconfirmed hit goes to the threadpool.
+        """
+        bloom, known = self._lookup(jti)
+        return known if known is not None else await run_in_threadpool(self._confirm, bloom, jti)
+
+    def _lookup(self, jti: str) -> tuple[BloomFilter | None, bool | None]:
+        # (filter, answer); answer is None for a hit still to be confirmed
+        if self._thread is None and self.sync_seconds > 0:
+            self._start()
+        bloom = self._filter
+        if bloom is None or jti not in bloom:
+            return bloom, False
+        return bloom, self._confirmed.get(jti)
+
+    def _confirm(self, bloom: BloomFilter, jti: str) -> bool:
+        try:
+            confirmed = bool(self.confirm(jti))
+        except Exception as exc:
+            logger.warning("Could not confirm revocation of %s: %s", jti, exc)
+            return True
+        with self._lock:
+            if bloom is self._filter and len(self._confirmed) < self.max_confirmed:
+                self._confirmed[jti] = confirmed
+        return confirmed
+
+    def refresh(self) -> None:
+        """
+        Fetch the filter now (the sync thread calls this; so can a
+        replica that just revoked something itself).
+        """
+        result = self.fetch(self._version)
+        if result is None:
+            return
+        version, bloom = result
+        with self._lock:
+            self._filter, self._version, self._confirmed = bloom, version, {}
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="revocation-sync", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.refresh()
+                interval = self.sync_seconds
+            except Exception as exc:
+                # keep the filter we have; try again soon
+                logger.warning("Revocation list sync failed: %s", exc)
+                interval = self.retry_seconds
+            self._wake.wait(interval)
+            self._wake.clear()
+
+
+def remote_revocation_list(url: str, sync_seconds: float, retry_seconds: float, timeout: float = 2.0) -> RevocationList:
+    """
+    RevocationList fed by auth's GET /auth/revocations (ETag = filter
+    version) and confirmed by GET /auth/revocations/{jti}.
+    """
+
+    def fetch(version: str | None):
+        request = urllib.request.Request(url, headers={"If-None-Match": version} if version else {})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as resp:
+                body = json.load(resp)
+        except urllib.error.HTTPError as exc:
+            if exc.code == 304:
+                return None
+            raise
+        return body["version"], BloomFilter.from_dict(body["filter"])
+
+    def confirm(jti: str) -> bool:
+        with urllib.request.urlopen(f"{url.rstrip('/')}/{jti}", timeout=timeout) as resp:
+            return json.load(resp)["revoked"]
+
+    return RevocationList(fetch, confirm, sync_seconds, retry_seconds)